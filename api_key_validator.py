@@ -0,0 +1,91 @@
+"""
+OpenAI API key validation for Social-GPT.
+Checking a key costs a models.list() round trip, so the result is cached per
+process with a TTL and the check can run in the background while the UI renders.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import openai
+
+from clients import ClientRegistry
+from llm import LLM
+
+
+class ApiKeyValidator:
+    """
+    Cached API key checks. Valid keys and rejected keys (authentication or
+    permission errors) are remembered for `ttl` seconds; other failures, such
+    as a network error, are not cached so the next check tries again.
+    """
+
+    ttl = 600.0
+
+    VALID = "valid"
+    INVALID = "invalid"
+    UNKNOWN = "unknown"
+
+    _results = {}
+    _pending = {}
+    _lock = threading.Lock()
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-key-check")
+
+    @staticmethod
+    def _fingerprint(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def status(api_key: str) -> Tuple[str, Optional[str]]:
+        """Cached result for a key: (VALID | INVALID | UNKNOWN, error message)."""
+        with ApiKeyValidator._lock:
+            result = ApiKeyValidator._results.get(ApiKeyValidator._fingerprint(api_key))
+        if result is None or time.monotonic() - result[0] > ApiKeyValidator.ttl:
+            return ApiKeyValidator.UNKNOWN, None
+        return (ApiKeyValidator.VALID, None) if result[1] is None else (ApiKeyValidator.INVALID, result[1])
+
+    @staticmethod
+    def _check(api_key: str) -> Optional[str]:
+        fingerprint = ApiKeyValidator._fingerprint(api_key)
+        cache = True
+        try:
+            LLM.retry_policy.call(ClientRegistry.get_client(api_key).models.list)
+            error = None
+        except (openai.AuthenticationError, openai.PermissionDeniedError) as e:
+            error = str(e)
+        except Exception as e:
+            # Transient problem: report it but check again next time
+            error = str(e)
+            cache = False
+        with ApiKeyValidator._lock:
+            if cache:
+                ApiKeyValidator._results[fingerprint] = (time.monotonic(), error)
+            ApiKeyValidator._pending.pop(fingerprint, None)
+        return error
+
+    @staticmethod
+    def validate_in_background(api_key: str) -> Future:
+        """
+        Start checking a key unless a check is already running or a cached
+        result exists. The future resolves to None or the error message.
+        """
+        state, error = ApiKeyValidator.status(api_key)
+        if state != ApiKeyValidator.UNKNOWN:
+            future = Future()
+            future.set_result(error)
+            return future
+        fingerprint = ApiKeyValidator._fingerprint(api_key)
+        with ApiKeyValidator._lock:
+            future = ApiKeyValidator._pending.get(fingerprint)
+            if future is None:
+                future = ApiKeyValidator._executor.submit(ApiKeyValidator._check, api_key)
+                ApiKeyValidator._pending[fingerprint] = future
+            return future
+
+    @staticmethod
+    def validate(api_key: str) -> Optional[str]:
+        """Check a key, using the cached result if there is one. Returns None or the error message."""
+        return ApiKeyValidator.validate_in_background(api_key).result()
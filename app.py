@@ -1,43 +1,181 @@
 import streamlit as st
 import os
 import pandas as pd
-from PIL import Image
 import io
 import base64
+import secrets
 from datetime import datetime
-import openai
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
 # Importamos los componentes necesarios de social-GPT
-from generators.topic_generator import TopicGenerator
-from generators.idea_generator import IdeaGenerator
-from generators.tweet_generator import TweetGenerator
-from generators.facebook_generator import FacebookGenerator
-from generators.instagram_generator import InstagramGenerator
-from generators.linkedin_generator import LinkedInGenerator
-from generators.image_prompt_generator import ImagePromptGenerator
-from generators.image_generator import generate_image_with_openai
+from pipeline import ContentPipeline, CampaignSettings, DEFAULT_MAX_CONCURRENCY
+from checkpoint import RunCheckpoint
+from jobs import JobManager, GenerationJob
 from utils import prepare_directories, export_content_to_csv, export_content_to_json, export_content_to_txt
 from brands import Brand
-from llm import GenerationMode
+from api_key_validator import ApiKeyValidator
+from image_cache import ImageCache
+from image_derivatives import ImageDerivatives
+from llm import LLM, GenerationMode, GenerationItemType
 
 # Configuración de la página
 st.set_page_config(page_title="Galileo", page_icon="", layout="wide")
 prepare_directories()
 
-def display_image(image_path):
-    """Muestra una imagen desde una ruta de archivo en Streamlit."""
+# Estilos disponibles al crear una marca
+BRAND_STYLE_OPTIONS = ["Profesional", "Casual", "Informativo", "Inspirador", 
+                       "Humorístico", "Educativo", "Promocional", "Narrativo", 
+                       "Basado en preguntas", "Llamado a la acción", "Atractivo", "Auténtico"]
+
+def display_image(image_path, size=None):
+    """
+    Muestra una imagen desde una ruta de archivo en Streamlit.
+    Con `size` ("thumb" o "preview") se envía la versión reducida en lugar del original.
+    """
     try:
-        image = Image.open(image_path)
-        st.image(image, use_container_width=True)
+        if size is not None:
+            image_path = ImageDerivatives.shared().get(image_path, size)
+        st.image(image_path, use_container_width=True)
         return True
     except Exception as e:
         st.error(f"Error al mostrar la imagen: {e}")
         return False
 
+# Cada cuántos segundos se consulta el estado de una generación en segundo plano
+JOB_POLL_INTERVAL = 1.0
+
+def session_token():
+    """
+    Identificador de esta sesión, guardado en la URL para que al recargar la página
+    se recuperen sus generaciones. Cada sesión solo ve los trabajos y diarios que ha creado.
+    """
+    token = st.query_params.get("sesion")
+    if not token:
+        token = secrets.token_urlsafe(16)
+        st.query_params["sesion"] = token
+    return token
+
+def start_generation(pipeline):
+    """
+    Envía la generación al gestor de trabajos en segundo plano y la asocia a esta sesión.
+    La generación sigue aunque se cierre la pestaña; al volver se puede retomar su seguimiento.
+    """
+    job = JobManager.shared().submit(pipeline, owner=session_token())
+    st.session_state.job_id = job.id
+    st.session_state.generated_content = job.content()
+
+def render_job(job):
+    """Muestra el progreso, los errores y los resultados parciales de un trabajo de generación."""
+    settings = job.pipeline.settings
+    content = job.content()
+    st.session_state.generated_content = content
+    
+    status_labels = {
+        GenerationJob.QUEUED: "En cola...",
+        GenerationJob.RUNNING: f"Generando: {job.last_step or 'temas'}",
+        GenerationJob.DONE: "¡Generación de contenido completada!",
+        GenerationJob.FAILED: "La generación se ha detenido",
+        GenerationJob.CANCELLED: "Generación cancelada",
+    }
+    st.progress(job.progress, text=f"{job.label} · {status_labels[job.status]}")
+    
+    post_count = sum(len(posts) for posts in content["posts"].values())
+    st.caption(f"Temas: {len(content['topics'])} · Ideas: {len(content['ideas'])} · "
+               f"Posts: {post_count} · Imágenes: {len(content['images'])}")
+    
+    for stage, label, message in job.errors:
+        st.error(f"Error en {stage} '{label}': {message}")
+    
+    # Vista previa en vivo de los posts que se están generando
+    for stage, label, text in job.streamed():
+        st.markdown(f"**{stage.split(':')[-1]}** | {label}")
+        st.markdown(text)
+    
+    if job.status == GenerationJob.QUEUED:
+        if st.button("Cancelar", key=f"cancel_{job.id}"):
+            job.cancel()
+    elif job.status == GenerationJob.FAILED:
+        st.error(f"Error en la generación: {job.failure}. Puedes reanudarla para crear solo lo que falta.")
+    elif job.status == GenerationJob.DONE:
+        if job.errors:
+            st.warning(f"{len(job.errors)} elementos no se pudieron generar. Puedes reanudar la generación para crear solo los que faltan.")
+        else:
+            st.success("¡El contenido ha sido generado exitosamente! Ve a la pestaña 'Contenido Generado' para verlo.")
+    
+    # Información de depuración (oculta en una sección colapsada)
+    with st.expander("Información de depuración", expanded=False):
+        st.write(f"Trabajo: {job.id} · Diario de la generación: {job.run_id}")
+        st.write(f"Completado: {job.completed}/{job.total}")
+        st.write(f"Ideas por tema: {settings.ideas_per_topic}")
+        st.write(f"Plataformas seleccionadas: {len(settings.platforms)}")
+        st.write(f"Generar imágenes: {settings.generate_images}")
+        st.write(f"Solicitudes simultáneas: {job.pipeline.executor.max_concurrency}")
+        if job.is_finished:
+            if LLM.response_cache is not None:
+                st.write("Caché de respuestas:")
+                st.json(LLM.response_cache.stats())
+            if ImageCache.instance(create=False) is not None:
+                st.write("Caché de imágenes:")
+                st.json(ImageCache.instance(create=False).stats())
+        
+        # Latencia, tokens, reintentos y coste estimado de cada llamada de esta generación
+        run_id = job.pipeline.run_id
+        run_totals = LLM.metrics.totals(run=run_id)
+        if run_totals:
+            st.write(f"Llamadas de esta generación: {run_totals['calls']} · "
+                     f"Coste estimado: ${run_totals['cost']:.4f} · Reintentos: {run_totals['retries']}")
+            # cached_tokens = prefijo servido por la caché de prompts de OpenAI
+            st.write(f"Tokens de prompt: {run_totals['prompt_tokens']} · "
+                     f"En caché de prompts: {run_totals['cached_tokens']} ({run_totals['cached_ratio']:.0%}) · "
+                     f"Tokens de respuesta: {run_totals['completion_tokens']}")
+            st.write("Por etapa y modelo:")
+            st.dataframe(pd.DataFrame(LLM.metrics.summary(("stage", "model"), run=run_id)), hide_index=True)
+            st.write("Por marca (todas las generaciones de este servidor):")
+            st.dataframe(pd.DataFrame(LLM.metrics.summary(("brand",))), hide_index=True)
+            col1, col2 = st.columns(2)
+            col1.download_button("Descargar llamadas (JSONL)", LLM.metrics.to_jsonl(run=run_id),
+                                 file_name=f"llamadas_{run_id}.jsonl", mime="application/jsonl",
+                                 key=f"metrics_jsonl_{job.id}")
+            col2.download_button("Descargar métricas (Prometheus)", LLM.metrics.prometheus_text(),
+                                 file_name="socialgpt_metrics.prom", mime="text/plain",
+                                 key=f"metrics_prom_{job.id}")
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_job(job_id):
+    """Refresca solo esta sección mientras el trabajo avanza, sin bloquear el resto de la app."""
+    job = JobManager.shared().get(job_id, owner=session_token())
+    if job is None:
+        return
+    render_job(job)
+    if job.is_finished:
+        # Un rerun completo para que la pestaña 'Contenido Generado' muestre el resultado final
+        st.rerun()
+
+def show_generation_status():
+    """Seguimiento del trabajo de esta sesión, o de uno de sus trabajos en curso si se recargó la página."""
+    manager = JobManager.shared()
+    token = session_token()
+    job = manager.get(st.session_state.get('job_id'), owner=token)
+    if job is None:
+        active_jobs = manager.active_jobs(owner=token)
+        if not active_jobs:
+            return
+        jobs_by_label = {f"{job.label} · {job.status} · {job.id}": job for job in active_jobs}
+        selected_job = st.selectbox("Generaciones en curso", options=list(jobs_by_label.keys()))
+        if not st.button("Seguir esta generación"):
+            return
+        job = jobs_by_label[selected_job]
+        st.session_state.job_id = job.id
+    
+    if job.is_finished:
+        render_job(job)
+    else:
+        poll_job(job.id)
+
+
 def main():
     # Añadimos título y descripción
     st.title("Post Generator")
@@ -51,15 +189,17 @@ def main():
         st.error("No se encontró la clave API de OpenAI. Asegúrate de tener un archivo .env con OPENAI_API_KEY configurada.")
         st.stop()
     
-    # Set the API key for OpenAI
-    try:
-        # Test the API key
-        client = openai.OpenAI(api_key=openai_api_key)
-        models = client.models.list()
-        st.success("✅ Conexión a OpenAI establecida correctamente")
-    except Exception as e:
-        st.error(f"❌ Error con la clave API: {e}")
+    # Verificamos la clave una vez por proceso (con caducidad) y en segundo plano,
+    # para no esperar una llamada a models.list() en cada interacción
+    key_status, key_error = ApiKeyValidator.status(openai_api_key)
+    if key_status == ApiKeyValidator.UNKNOWN:
+        ApiKeyValidator.validate_in_background(openai_api_key)
+        st.info("Verificando la conexión a OpenAI...")
+    elif key_status == ApiKeyValidator.INVALID:
+        st.error(f"❌ Error con la clave API: {key_error}")
         st.stop()
+    else:
+        st.success("✅ Conexión a OpenAI establecida correctamente")
     
     # Tabs para diferentes funciones
     tab1, tab2, tab3 = st.tabs(["Configurar Marca", "Generar Contenido", "Contenido Generado"])
@@ -70,8 +210,7 @@ def main():
         # Sección de selección de marca
         st.subheader("Seleccionar o Crear una Marca")
         
-        cached_brands = Brand.get_cached_brands()
-        brand_names = [brand.title for brand in cached_brands]
+        brand_names = [brand.title for brand in Brand.get_cached_brands()]
         brand_names.append("Crear nueva marca")
         
         selected_brand_name = st.selectbox(
@@ -84,10 +223,7 @@ def main():
             new_brand_name = st.text_input("Nombre de la Marca")
             new_brand_description = st.text_area("Descripción de la Marca", height=150)
             
-            style_options = ["Profesional", "Casual", "Informativo", "Inspirador", 
-                            "Humorístico", "Educativo", "Promocional", "Narrativo", 
-                            "Basado en preguntas", "Llamado a la acción", "Atractivo", "Auténtico"]
-            selected_styles = st.multiselect("Selecciona definiciones de estilo", options=style_options, 
+            selected_styles = st.multiselect("Selecciona definiciones de estilo", options=BRAND_STYLE_OPTIONS, 
                                            default=["Profesional", "Informativo"])
             
             if st.button("Crear Marca"):
@@ -100,11 +236,7 @@ def main():
                     st.error("Por favor completa toda la información de la marca.")
         else:
             # Mostrar la información de la marca seleccionada
-            selected_brand = None
-            for brand in cached_brands:
-                if brand.title == selected_brand_name:
-                    selected_brand = brand
-                    break
+            selected_brand = Brand.from_title(selected_brand_name)
             
             if selected_brand:
                 st.subheader(f"Marca: {selected_brand.title}")
@@ -114,10 +246,32 @@ def main():
                 if st.button("Usar Esta Marca"):
                     st.session_state.brand = selected_brand
                     st.success(f"¡Marca '{selected_brand.title}' seleccionada!")
+                
+                if st.button("Eliminar Marca"):
+                    Brand.delete(selected_brand.title)
+                    if st.session_state.get("brand") is not None and st.session_state.brand.title == selected_brand.title:
+                        del st.session_state.brand
+                    st.rerun()
     
     with tab2:
         st.header("Generar Contenido")
         
+        # Generación en segundo plano de esta sesión
+        show_generation_status()
+        
+        # Generaciones interrumpidas (p. ej. al reiniciar el servidor) o con errores: se reanudan desde su diario
+        running_ids = {job.run_id for job in JobManager.shared().active_jobs(owner=session_token())}
+        resumable_runs = [run for run in RunCheckpoint.incomplete_runs(owner=session_token())
+                          if run.run_id not in running_ids]
+        if resumable_runs:
+            with st.expander(f"Reanudar una generación anterior ({len(resumable_runs)})", expanded=False):
+                runs_by_label = {run.describe(): run for run in resumable_runs}
+                selected_run = st.selectbox("Generación", options=list(runs_by_label.keys()))
+                st.caption("Solo se generan los elementos que faltan; el resto se recupera del diario sin volver a llamar a OpenAI.")
+                if st.button("Reanudar Generación"):
+                    start_generation(ContentPipeline.from_checkpoint(RunCheckpoint.open(runs_by_label[selected_run].run_id)))
+                    st.rerun()
+        
         # Verificar si hay una marca seleccionada
         if 'brand' not in st.session_state:
             st.warning("Por favor selecciona o crea una marca en la pestaña 'Configurar Marca'.")
@@ -147,6 +301,24 @@ def main():
                                           options=platform_options,
                                           default=["Twitter", "Instagram"])
         
+        combine_platforms = st.checkbox(
+            "Generar todas las plataformas de cada idea en una sola petición",
+            value=True,
+            help="Reduce el número de llamadas y de tokens enviados cuando hay varias plataformas seleccionadas."
+        )
+        
+        bulk_ideas = st.checkbox(
+            "Generar las ideas de todos los temas en una sola petición",
+            value=True,
+            help="Pide las ideas de todos los temas juntas en lugar de una petición por tema."
+        )
+        
+        stream_posts = st.checkbox(
+            "Mostrar los posts mientras se generan",
+            value=False,
+            help="Muestra el texto de cada post a medida que llega. Los posts se piden por plataforma en lugar de en una sola petición."
+        )
+        
         # Opción de generación de imágenes
         generate_images = st.checkbox("Generar imágenes para el contenido (usando DALL-E 3 de OpenAI)", value=True)
         
@@ -169,11 +341,43 @@ def main():
                 help="HD produce imágenes más detalladas pero consume más créditos."
             )
             
+            # Forma de recibir la imagen
+            image_transport = st.radio(
+                "Transferencia de imágenes",
+                ["Base64 (una sola petición)", "URL (descarga aparte)"],
+                index=0,
+                help="Base64 recibe la imagen en la misma respuesta y evita la segunda descarga."
+            )
+            
+            st.subheader("Rendimiento")
+            max_concurrency = st.number_input(
+                "Solicitudes simultáneas",
+                min_value=1, max_value=32, value=DEFAULT_MAX_CONCURRENCY,
+                help="Número máximo de llamadas a OpenAI en paralelo."
+            )
+            
+            cache_type_options = {
+                "Temas": GenerationItemType.TOPICS,
+                "Ideas": GenerationItemType.IDEAS,
+                "Posts": GenerationItemType.POST,
+                "Prompts de imagen": GenerationItemType.IMAGE_PROMPT,
+                "Imágenes": GenerationItemType.IMAGE
+            }
+            cached_types = st.multiselect(
+                "Reutilizar respuestas en caché para",
+                options=list(cache_type_options.keys()),
+                default=[],
+                help="Las peticiones idénticas se sirven desde la caché local en lugar de volver a llamar a OpenAI."
+            )
+            # Se aplica solo a las llamadas de cada generación, sin tocar la configuración global del proceso
+            cached_types = [cache_type_options[name] for name in cached_types]
+            
             # Guardar en session state
             st.session_state.image_settings = {
                 "model": "dall-e-3",
                 "size": image_size.split(" ")[0],  # Extraer solo las dimensiones
-                "quality": "standard" if image_quality == "Estándar" else "hd"
+                "quality": "standard" if image_quality == "Estándar" else "hd",
+                "transport": "b64_json" if image_transport.startswith("Base64") else "url"
             }
         
         # Selección de calidad de generación
@@ -199,169 +403,36 @@ def main():
                 st.error("No se encuentra la clave API de OpenAI.")
                 st.stop()
             
-            with st.spinner("Generando contenido..."):
-                # Guardamos la instancia de marca
-                brand = st.session_state.brand
-                
-                # Creamos una barra de progreso
-                progress = st.progress(0)
-                status_text = st.empty()
-                
-                # Generamos temas
-                status_text.text("Generando temas...")
-                
-                # Preprocesar instrucciones del usuario para identificar peticiones de promoción
-                is_promotional = any(keyword in topics_ideas_prompt_expansion.lower() for keyword in 
-                                   ["promocion", "promoción", "venta", "producto", "servicio", "app", "aplicación", "lanzamiento", "nueva"])
-                
-                if is_promotional:
-                    # Si detectamos que es una petición promocional, aseguramos que los temas se centran en eso
-                    enhanced_prompt = f"IMPORTANTE: Este contenido debe promocionar o vender un producto/servicio. {topics_ideas_prompt_expansion}"
-                else:
-                    enhanced_prompt = topics_ideas_prompt_expansion
-                
-                # Generar temas con el prompt mejorado
-                topics = TopicGenerator(
-                    brand, topic_count, enhanced_prompt, generation_mode
-                ).generate_topics()
-                
-                # Calculamos total de elementos a generar para seguimiento del progreso
-                # 1 para cada generación de idea + número de plataformas por idea + 1 para generación de imagen si está habilitada
-                items_per_idea = len(selected_platforms) + (1 if generate_images else 0)
-                # Total = (generación de temas) + (ideas por tema) + (plataformas + imágenes por idea)
-                total_items = 1 + (len(topics) * ideas_per_topic * (1 + items_per_idea))
-                items_completed = 1  # Comenzamos en 1 para contabilizar los temas ya generados
-                
-                # Información de depuración (oculta en una sección colapsada)
-                with st.expander("Información de depuración", expanded=False):
-                    st.write(f"Total de elementos a procesar: {total_items}")
-                    st.write(f"Elementos completados: {items_completed}")
-                    st.write(f"Valor de progreso: {items_completed/total_items:.4f}")
-                    st.write(f"Número de temas: {len(topics)}")
-                    st.write(f"Ideas por tema: {ideas_per_topic}")
-                    st.write(f"Plataformas seleccionadas: {len(selected_platforms)}")
-                    st.write(f"Generar imágenes: {generate_images}")
-                
-                # Almacenamos contenido generado para mostrar
-                st.session_state.generated_content = {
-                    "topics": topics,
-                    "ideas": [],
-                    "posts": {},
-                    "images": []
-                }
-                
-                for platform in selected_platforms:
-                    st.session_state.generated_content["posts"][platform] = []
-                
-                # Procesamos cada tema
-                for topic in topics:
-                    status_text.text(f"Generando ideas para el tema: {topic}")
-                    
-                    # Generamos ideas para este tema
-                    if is_promotional:
-                        # Si es promocional, aseguramos que las ideas también lo sean
-                        enhanced_idea_prompt = f"IMPORTANTE: Estas ideas deben promocionar directamente el producto/servicio mencionado: {topics_ideas_prompt_expansion}"
-                    else:
-                        enhanced_idea_prompt = topics_ideas_prompt_expansion
-                        
-                    ideas = IdeaGenerator(
-                        brand, ideas_per_topic, enhanced_idea_prompt, generation_mode
-                    ).generate_ideas(topic)
-                    
-                    st.session_state.generated_content["ideas"].extend([(topic, idea) for idea in ideas])
-                    items_completed += 1
-                    progress_value = min(items_completed / total_items, 1.0)
-                    # Actualizar info de depuración
-                    st.expander("Información de depuración").write(f"Después de ideas para tema '{topic}': {items_completed}/{total_items} = {progress_value:.4f}")
-                    # Actualizar barra de progreso
-                    progress.progress(progress_value)
-                    
-                    # Generamos contenido para cada idea
-                    for idea in ideas:
-                        for platform in selected_platforms:
-                            status_text.text(f"Generando contenido de {platform} para idea: {idea}")
-                            
-                            # Prepara instrucciones específicas para el post
-                            if is_promotional:
-                                enhanced_post_prompt = f"IMPORTANTE - PROMOCIÓN: {topics_ideas_prompt_expansion}\nEstilo específico: {posts_prompt_expansion}"
-                            else:
-                                enhanced_post_prompt = posts_prompt_expansion
-                                
-                            if platform == "Twitter":
-                                post = TweetGenerator(
-                                    brand, posts_language, idea, enhanced_post_prompt, generation_mode
-                                ).generate_tweet()
-                                st.session_state.generated_content["posts"]["Twitter"].append((topic, idea, post))
-                            
-                            elif platform == "Facebook":
-                                post = FacebookGenerator(
-                                    brand, posts_language, idea, enhanced_post_prompt, generation_mode
-                                ).generate_post()
-                                st.session_state.generated_content["posts"]["Facebook"].append((topic, idea, post))
-                            
-                            elif platform == "Instagram":
-                                post = InstagramGenerator(
-                                    brand, posts_language, idea, enhanced_post_prompt, generation_mode
-                                ).generate_post()
-                                st.session_state.generated_content["posts"]["Instagram"].append((topic, idea, post))
-                            
-                            elif platform == "LinkedIn":
-                                post = LinkedInGenerator(
-                                    brand, posts_language, idea, enhanced_post_prompt, generation_mode
-                                ).generate_post()
-                                st.session_state.generated_content["posts"]["LinkedIn"].append((topic, idea, post))
-                            
-                            items_completed += 1
-                            progress_value = min(items_completed / total_items, 1.0)
-                            # Actualizar info de depuración
-                            st.expander("Información de depuración").write(f"Después de post de {platform} para '{idea}': {items_completed}/{total_items} = {progress_value:.4f}")
-                            # Actualizar barra de progreso
-                            progress.progress(progress_value)
-                        
-                        # Generar imagen si está seleccionado
-                        if generate_images:
-                            status_text.text(f"Generando imagen para idea: {idea}")
-                            try:
-                                # Obtener configuración de imágenes del session state
-                                image_settings = st.session_state.get('image_settings', {
-                                    "model": "dall-e-3",
-                                    "size": "1024x1024",
-                                    "quality": "standard"
-                                })
-                                
-                                # Pasar las instrucciones promocionales al generador de prompts de imágenes
-                                if is_promotional:
-                                    image_instructions = f"PROMOCIONAL: {topics_ideas_prompt_expansion}"
-                                else:
-                                    image_instructions = None
-                                    
-                                image_prompt = ImagePromptGenerator(
-                                    brand, idea, generation_mode, image_instructions
-                                ).generate_prompt()
-                                
-                                image_path = generate_image_with_openai(
-                                    image_prompt, 
-                                    generation_mode,
-                                    model_preference="dall-e-3",
-                                    size=image_settings["size"],
-                                    quality=image_settings["quality"]
-                                )
-                                st.session_state.generated_content["images"].append((topic, idea, image_path))
-                            except Exception as e:
-                                st.error(f"Error al generar imagen: {e}")
-                        
-                            items_completed += 1
-                            progress_value = min(items_completed / total_items, 1.0)
-                            # Actualizar info de depuración
-                            st.expander("Información de depuración").write(f"Después de imagen para '{idea}': {items_completed}/{total_items} = {progress_value:.4f}")
-                            # Actualizar barra de progreso
-                            progress.progress(progress_value)
-                
-                # Completado
-                st.expander("Información de depuración").write(f"Completado: {total_items}/{total_items} = 1.0")
-                progress.progress(1.0)  # Establecer exactamente a 1.0 al final
-                status_text.text("¡Generación de contenido completada!")
-                st.success("¡El contenido ha sido generado exitosamente! Ve a la pestaña 'Contenido Generado' para verlo.")
+            # Si la verificación en segundo plano no terminó, la esperamos aquí
+            key_error = ApiKeyValidator.validate(openai_api_key)
+            if key_error is not None:
+                st.error(f"❌ Error con la clave API: {key_error}")
+                st.stop()
+            
+            # Guardamos la instancia de marca
+            brand = st.session_state.brand
+            
+            settings = CampaignSettings(
+                topic_count=topic_count,
+                ideas_per_topic=ideas_per_topic,
+                language=posts_language,
+                platforms=selected_platforms,
+                generation_mode=generation_mode,
+                topics_ideas_prompt_expansion=topics_ideas_prompt_expansion,
+                posts_prompt_expansion=posts_prompt_expansion,
+                generate_images=generate_images,
+                image_settings=st.session_state.get('image_settings'),
+                combine_platforms=combine_platforms,
+                bulk_ideas=bulk_ideas,
+                stream_posts=stream_posts,
+                cached_types=cached_types
+            )
+            
+            # Cada nodo completado se guarda en el diario de la generación para poder reanudarla
+            checkpoint = RunCheckpoint.create(brand.to_record(), settings.to_record(), owner=session_token())
+            pipeline = ContentPipeline(brand, settings, max_concurrency=max_concurrency, checkpoint=checkpoint)
+            start_generation(pipeline)
+            st.rerun()
     
     with tab3:
         st.header("Contenido Generado")
@@ -427,13 +498,20 @@ def main():
                 st.info("No se han generado imágenes.")
                 st.stop()
             
-            # Mostrar imágenes en una cuadrícula (3 columnas)
-            cols = st.columns(3)
+            # Las miniaturas permiten ver más imágenes por fila
+            grid_view = st.radio("Vista", ["Vista previa", "Miniaturas"], horizontal=True)
+            column_count, size = (3, "preview") if grid_view == "Vista previa" else (6, "thumb")
+            
+            # Mostrar imágenes en una cuadrícula; el original solo se carga a petición
+            cols = st.columns(column_count)
             for i, (topic, idea, image_path) in enumerate(st.session_state.generated_content["images"]):
-                with cols[i % 3]:
+                with cols[i % column_count]:
                     st.markdown(f"**Tema:** {topic}")
                     st.markdown(f"**Idea:** {idea}")
-                    display_image(image_path)
+                    if st.toggle("Ver original", key=f"original_{i}_{image_path}"):
+                        display_image(image_path)
+                    else:
+                        display_image(image_path, size)
                     st.markdown("---")
         
         with export_tab:
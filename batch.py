@@ -0,0 +1,294 @@
+"""
+Offline generation through the OpenAI Batch API.
+Every chat completion of a pipeline stage is written to a JSONL batch file,
+submitted in one batch, polled until it finishes and mapped back into the
+content dictionary used by the export helpers.
+"""
+
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from brands import Brand
+from clients import ClientRegistry
+from files import Files
+from llm import LLM, GenerationItemType, TokenUsage
+from logger import Logger
+from metrics import CallMetrics, SOURCE_BATCH
+from pipeline import CampaignSettings, ContentPipeline, DEFAULT_MAX_CONCURRENCY, generate_platform_post
+from generators.topic_generator import TopicGenerator
+from generators.idea_generator import IdeaGenerator
+from generators.tweet_generator import TweetGenerator
+from generators.facebook_generator import FacebookGenerator
+from generators.instagram_generator import InstagramGenerator
+from generators.linkedin_generator import LinkedInGenerator
+from generators.multi_platform_generator import MultiPlatformGenerator
+from generators.image_prompt_generator import ImagePromptGenerator
+
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchError(Exception):
+    """Raised when a batch cannot be submitted or does not complete."""
+
+
+class BatchJob:
+    """
+    One Batch API submission: collect requests, write the JSONL input file,
+    upload it, poll the batch and read back the completion texts.
+    """
+    def __init__(self, name: str = "batch", poll_interval: float = 30.0,
+                 timeout: Optional[float] = None, work_dir: str = Files.batch_dir):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.work_dir = work_dir
+        self.requests = {}
+        self.item_types = {}
+        self.batch_id = None
+        self.errors = {}
+
+    def add(self, custom_id: str, request: Dict[str, Any], item_type: Optional[GenerationItemType] = None):
+        """Queue a chat.completions.create request (as built by LLM.build_request)."""
+        if custom_id in self.requests:
+            raise ValueError(f"Duplicate custom_id in batch: {custom_id}")
+        self.requests[custom_id] = request
+        self.item_types[custom_id] = item_type
+
+    def write_input_file(self) -> str:
+        """Write the queued requests as a Batch API JSONL file and return its path."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        path = os.path.join(self.work_dir, f"{self.name}_{uuid.uuid4().hex[:8]}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for custom_id, request in self.requests.items():
+                line = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": request}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return path
+
+    def submit(self) -> str:
+        """Upload the input file and create the batch. Returns the batch id."""
+        client = ClientRegistry.get_client()
+        path = self.write_input_file()
+
+        def upload():
+            with open(path, "rb") as f:
+                return client.files.create(file=f, purpose="batch")
+
+        input_file = LLM.retry_policy.call(upload)
+        batch = LLM.retry_policy.call(lambda: client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"name": self.name}
+        ))
+        self.batch_id = batch.id
+        Logger.log("Lote enviado", f"{batch.id}: {len(self.requests)} peticiones ({path})")
+        return batch.id
+
+    def wait(self):
+        """Poll the batch until it reaches a final status and return it."""
+        client = ClientRegistry.get_client()
+        started = time.monotonic()
+        while True:
+            batch = LLM.retry_policy.call(lambda: client.batches.retrieve(self.batch_id))
+            if batch.status in FINAL_BATCH_STATUSES:
+                return batch
+            if self.timeout is not None and time.monotonic() - started > self.timeout:
+                raise BatchError(f"Batch {self.batch_id} did not finish in {self.timeout} seconds")
+            time.sleep(self.poll_interval)
+
+    def results(self, batch) -> Dict[str, str]:
+        """Read the output file of a finished batch as {custom_id: completion text}."""
+        client = ClientRegistry.get_client()
+        if batch.status != "completed":
+            raise BatchError(f"Batch {batch.id} ended with status {batch.status}")
+
+        contents = {}
+        if batch.output_file_id:
+            output = LLM.retry_policy.call(lambda: client.files.content(batch.output_file_id).text)
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200:
+                    contents[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                    self._record(item["custom_id"], response["body"].get("usage"))
+                else:
+                    self.errors[item["custom_id"]] = item.get("error") or response
+                    self._record(item["custom_id"], None, self.errors[item["custom_id"]])
+
+        if batch.error_file_id:
+            errors = LLM.retry_policy.call(lambda: client.files.content(batch.error_file_id).text)
+            for line in errors.splitlines():
+                if line.strip():
+                    item = json.loads(line)
+                    self.errors[item["custom_id"]] = item.get("error") or item.get("response")
+                    self._record(item["custom_id"], None, self.errors[item["custom_id"]])
+
+        return contents
+
+    def _record(self, custom_id: str, usage: Optional[Dict[str, Any]], error: Any = None):
+        """Record one batch request in LLM.metrics at batch prices; there is no per-request latency."""
+        item_type = self.item_types.get(custom_id)
+        with CallMetrics.labels(stage=self.name):
+            LLM.metrics.record_completion(
+                item_type.name if item_type is not None else "", self.requests.get(custom_id, {}).get("model", ""),
+                0.0, TokenUsage.from_dict(usage), source=SOURCE_BATCH,
+                error=BatchError(json.dumps(error, ensure_ascii=False)) if error is not None else None
+            )
+
+    def run(self) -> Dict[str, str]:
+        """Submit, wait and return the results. Empty batches are not submitted."""
+        if not self.requests:
+            return {}
+        self.submit()
+        return self.results(self.wait())
+
+
+class BatchCampaignRunner:
+    """
+    Runs a campaign stage by stage through the Batch API: topics, then ideas for
+    every topic, then every post and image prompt. The Batch API does not cover
+    image generation, so images are generated afterwards with the regular
+    concurrent pipeline. Requests missing from a batch fall back to a direct call.
+    """
+    def __init__(self, brand: Brand, settings: CampaignSettings, poll_interval: float = 30.0,
+                 timeout: Optional[float] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 on_stage: Optional[Callable[[str], None]] = None):
+        self.brand = brand
+        self.settings = settings
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.on_stage = on_stage
+        self.pipeline = ContentPipeline(brand, settings, max_concurrency=max_concurrency)
+        self.content = self.pipeline.content
+        # Images that could not be generated; failures of the text stages raise
+        self.errors = 0
+
+    def _job(self, name: str) -> BatchJob:
+        if self.on_stage:
+            self.on_stage(name)
+        return BatchJob(name, self.poll_interval, self.timeout)
+
+    def _add(self, job: BatchJob, custom_id: str, messages, item_type: GenerationItemType, response_format=None):
+        job.add(custom_id, LLM.build_request(messages, item_type, self.settings.generation_mode, response_format),
+                item_type)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the whole campaign and return the filled content dictionary. Batch
+        and direct calls are labelled with the campaign's run and brand in LLM.metrics.
+        """
+        with CallMetrics.labels(run=self.pipeline.run_id, brand=self.brand.title):
+            return self._run()
+
+    def _run(self) -> Dict[str, Any]:
+        settings = self.settings
+
+        # Stage 1: topics
+        topic_generator = TopicGenerator(self.brand, settings.topic_count, settings.topic_prompt(), settings.generation_mode)
+        job = self._job("topics")
+        topic_messages = topic_generator.build_messages()
+        self._add(job, "topics", topic_messages, GenerationItemType.TOPICS, topic_generator.response_format())
+        results = job.run()
+        if "topics" in results:
+            # Short lists are topped up with a synchronous request for the missing topics
+            topics = topic_generator.complete_response(topic_messages, results["topics"])
+        else:
+            topics = topic_generator.generate_topics()
+        self.content["topics"] = topics
+
+        # Stage 2: ideas for every topic
+        idea_generator = IdeaGenerator(self.brand, settings.ideas_per_topic, settings.idea_prompt(), settings.generation_mode)
+        job = self._job("ideas")
+        for t, topic in enumerate(topics):
+            self._add(job, f"ideas-{t}", idea_generator.build_messages(topic), GenerationItemType.IDEAS,
+                      idea_generator.response_format())
+        results = job.run()
+
+        ideas = []
+        for t, topic in enumerate(topics):
+            if f"ideas-{t}" in results:
+                topic_ideas = idea_generator.complete_response(idea_generator.build_messages(topic), results[f"ideas-{t}"])
+            else:
+                topic_ideas = idea_generator.generate_ideas(topic)
+            ideas.extend((topic, idea) for idea in topic_ideas)
+        self.content["ideas"] = ideas
+
+        # Stage 3: posts and image prompts for every idea
+        job = self._job("posts")
+        post_generators = {}
+        prompt_generators = {}
+        for i, (topic, idea) in enumerate(ideas):
+            if settings.uses_combined_posts:
+                generator = MultiPlatformGenerator(self.brand, settings.language, idea, settings.post_prompt(),
+                                                   settings.generation_mode, settings.platforms)
+                post_generators[f"posts-{i}"] = generator
+                self._add(job, f"posts-{i}", generator.build_messages(), GenerationItemType.POST,
+                          generator.response_format())
+            else:
+                for platform in settings.platforms:
+                    generator = self.platform_generator(platform, idea)
+                    post_generators[f"post-{i}-{platform}"] = generator
+                    self._add(job, f"post-{i}-{platform}", generator.build_messages(), GenerationItemType.POST)
+
+            if settings.generate_images:
+                generator = ImagePromptGenerator(self.brand, idea, settings.generation_mode, settings.image_instructions())
+                prompt_generators[f"image-prompt-{i}"] = generator
+                self._add(job, f"image-prompt-{i}", generator.build_messages(), GenerationItemType.IMAGE_PROMPT)
+        results = job.run()
+
+        image_tasks = []
+        for i, (topic, idea) in enumerate(ideas):
+            if settings.uses_combined_posts:
+                custom_id = f"posts-{i}"
+                posts = post_generators[custom_id].process_response(results[custom_id]) if custom_id in results else {}
+            else:
+                posts = {}
+                for platform in settings.platforms:
+                    custom_id = f"post-{i}-{platform}"
+                    if custom_id in results:
+                        posts[platform] = post_generators[custom_id].process_response(results[custom_id])
+
+            for platform in settings.platforms:
+                if platform not in posts:
+                    posts[platform] = generate_platform_post(self.brand, platform, settings.language, idea,
+                                                             settings.post_prompt(), settings.generation_mode)
+                self.content["posts"].setdefault(platform, []).append((topic, idea, posts[platform]))
+
+            if settings.generate_images:
+                custom_id = f"image-prompt-{i}"
+                generator = prompt_generators[custom_id]
+                if custom_id in results:
+                    image_prompt = generator.process_response(results[custom_id])
+                else:
+                    image_prompt = generator.generate_prompt()
+                image_tasks.append(self.pipeline.image_task(topic, idea, image_prompt))
+
+        # Stage 4: images through the regular concurrent pipeline
+        if image_tasks:
+            if self.on_stage:
+                self.on_stage("images")
+            self.pipeline.executor.run(image_tasks, on_error=self._on_image_error)
+
+        self.pipeline.sort_content()
+        return self.content
+
+    def _on_image_error(self, task, error: Exception):
+        self.errors += 1
+        Logger.log("Error generating image", f"{task.label}: {error}")
+
+    def platform_generator(self, platform: str, idea: str):
+        settings = self.settings
+        generator_class = {
+            "Twitter": TweetGenerator,
+            "Facebook": FacebookGenerator,
+            "Instagram": InstagramGenerator,
+            "LinkedIn": LinkedInGenerator,
+        }[platform]
+        return generator_class(self.brand, settings.language, idea, settings.post_prompt(), settings.generation_mode)
@@ -0,0 +1,276 @@
+"""
+Local stand-in for the OpenAI Files, Batch, chat completion and image endpoints,
+for testing batch mode offline.
+
+Usage:
+    python batch_server.py --port 8089
+
+and point the OpenAI client at it before running a BatchCampaignRunner, e.g.:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=local python cli.py spec.json --batch --poll-interval 1
+
+Batches complete on the first status check after `--delay` seconds. Every
+request gets a deterministic fake completion: JSON-schema requests receive an
+object that satisfies the schema, JSON-mode requests an object with the keys the
+prompt asks for, and other requests a short "- item" list. Lists have as many
+items as the prompt asks for ("Genera 5 temas..."). Direct chat completions
+(the runner's fallbacks and top-ups) and image generations are served too, so
+a whole campaign runs without network access.
+"""
+
+import argparse
+import base64
+import json
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Items per list when the prompt does not say how many it wants
+DEFAULT_LIST_LENGTH = 3
+
+# Keys that hold lists in JSON-mode responses (topics and ideas)
+LIST_KEYS = {"topics", "ideas"}
+
+
+def prompt_text(body) -> str:
+    return "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+
+
+def requested_count(body) -> int:
+    """Number of items the last request in the conversation asks for ("Genera 4 ideas...")."""
+    matches = re.findall(r"Genera (?:exactamente )?(\d+)", prompt_text(body))
+    return int(matches[-1]) if matches else DEFAULT_LIST_LENGTH
+
+
+def requested_keys(body):
+    """Keys named in 'Devuelve un objeto JSON con la clave "x"' / 'con las claves "a", "b"'."""
+    matches = re.findall(r'objeto JSON con las? claves? ((?:"[^"]+"(?:, )?)+)', prompt_text(body))
+    return re.findall(r'"([^"]+)"', matches[-1]) if matches else []
+
+
+def fake_value(schema, label="valor", count=DEFAULT_LIST_LENGTH):
+    """Build a value that satisfies a (strict) JSON schema, with `count` items per array."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: fake_value(prop, name, count) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), f"{label} {i + 1}", count) for i in range(count)]
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "boolean":
+        return True
+    return f"Contenido simulado: {label}"
+
+
+def fake_completion(body):
+    """Build a chat.completion body for a request body."""
+    response_format = body.get("response_format") or {}
+    count = requested_count(body)
+    if response_format.get("type") == "json_schema":
+        content = json.dumps(fake_value(response_format["json_schema"]["schema"], count=count), ensure_ascii=False)
+    elif response_format.get("type") == "json_object":
+        content = json.dumps({
+            key: [f"Contenido simulado: {key} {i + 1}" for i in range(count)] if key in LIST_KEYS
+            else f"Contenido simulado: {key}"
+            for key in requested_keys(body)
+        }, ensure_ascii=False)
+    else:
+        content = "\n".join(f"- Contenido simulado {i + 1}" for i in range(5))
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": fake_usage(body, content),
+    }
+
+
+def fake_usage(body, content: str):
+    """Token counts estimated at about 4 characters per token."""
+    prompt_tokens = max(len(prompt_text(body)) // 4, 1)
+    completion_tokens = max(len(content) // 4, 1)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def fake_png(size: int = 64) -> bytes:
+    """A valid single-color PNG, so image previews can be created from it."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x4f\x8a\xc9" * size for _ in range(size))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+
+def fake_image(body, base_url: str):
+    """Build an images.generate body; url responses point at this server."""
+    if body.get("response_format") == "url":
+        image = {"url": f"{base_url}/images/fake.png"}
+    else:
+        image = {"b64_json": base64.b64encode(fake_png()).decode("ascii")}
+    return {"created": int(time.time()), "data": [{**image, "revised_prompt": body.get("prompt", "")}]}
+
+
+class BatchState:
+    """In-memory files and batches."""
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def add_file(self, content: bytes, purpose: str, filename: str = "file.jsonl"):
+        file_id = f"file-{uuid.uuid4().hex}"
+        with self.lock:
+            self.files[file_id] = {
+                "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed", "content": content,
+            }
+        return self.file_info(file_id)
+
+    def file_info(self, file_id):
+        return {k: v for k, v in self.files[file_id].items() if k != "content"}
+
+    def create_batch(self, body):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress", "created_at": int(time.time()), "output_file_id": None,
+            "error_file_id": None, "metadata": body.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        return batch
+
+    def retrieve_batch(self, batch_id):
+        batch = self.batches[batch_id]
+        if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.delay:
+            self.complete(batch)
+        return batch
+
+    def complete(self, batch):
+        lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+        output = []
+        for line in lines:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": item["custom_id"],
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                             "body": fake_completion(item["body"])},
+                "error": None,
+            }, ensure_ascii=False))
+        output_file = self.add_file("\n".join(output).encode("utf-8"), "batch_output", "output.jsonl")
+        batch.update({
+            "status": "completed", "output_file_id": output_file["id"], "completed_at": int(time.time()),
+            "request_counts": {"total": len(output), "completed": len(output), "failed": 0},
+        })
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    state: BatchState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def send_png(self):
+        content = fake_png()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self):
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            return self.send_json(fake_completion(json.loads(self.read_body())))
+        if self.path.rstrip("/").endswith("/images/generations"):
+            host, port = self.server.server_address[:2]
+            return self.send_json(fake_image(json.loads(self.read_body()), f"http://{host}:{port}/v1"))
+        if self.path.rstrip("/").endswith("/files"):
+            return self.upload_file()
+        if self.path.rstrip("/").endswith("/batches"):
+            return self.send_json(self.state.create_batch(json.loads(self.read_body())))
+        self.send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+    def do_GET(self):
+        if self.path.endswith("/images/fake.png"):
+            return self.send_png()
+
+        match = re.search(r"/batches/([^/]+)$", self.path)
+        if match and match.group(1) in self.state.batches:
+            return self.send_json(self.state.retrieve_batch(match.group(1)))
+
+        match = re.search(r"/files/([^/]+)/content$", self.path)
+        if match and match.group(1) in self.state.files:
+            content = self.state.files[match.group(1)]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+
+        match = re.search(r"/files/([^/]+)$", self.path)
+        if match and match.group(1) in self.state.files:
+            return self.send_json(self.state.file_info(match.group(1)))
+
+        self.send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+    def upload_file(self):
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8")
+        message = BytesParser(policy=HTTP).parsebytes(header + self.read_body())
+        fields = {}
+        filename = "file.jsonl"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            fields[name] = part.get_payload(decode=True)
+            if name == "file":
+                filename = part.get_filename() or filename
+        purpose = (fields.get("purpose") or b"batch").decode("utf-8")
+        self.send_json(self.state.add_file(fields.get("file", b""), purpose, filename))
+
+
+def serve(host: str = "127.0.0.1", port: int = 8089, delay: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stand-in server in a background thread and return it."""
+    handler = type("Handler", (BatchHandler,), {"state": BatchState(delay)})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Batch API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before a batch completes")
+    args = parser.parse_args()
+
+    handler = type("Handler", (BatchHandler,), {"state": BatchState(args.delay)})
+    print(f"Batch stand-in listening on http://{args.host}:{args.port}/v1")
+    ThreadingHTTPServer((args.host, args.port), handler).serve_forever()
@@ -0,0 +1,112 @@
+"""
+Brand repository for Social-GPT.
+Brands are kept in a single JSON file with an in-memory index by title. The
+file is only reparsed when its modification time or size changes, and writes
+replace it atomically.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from files import Files
+
+
+class BrandStore:
+    """
+    Brand records ({"title", "description", "style"}) indexed by title, in
+    creation order. `version` increases every time the records change, so
+    callers can memoize anything derived from them.
+    """
+
+    def __init__(self, path: str = Files.brand_store,
+                 legacy_loader: Optional[Callable[[], List[Dict[str, Any]]]] = None):
+        self.path = path
+        # Returns the records of the previous storage format, used once to create the file
+        self.legacy_loader = legacy_loader
+        self.version = 0
+        self._index = {}
+        self._signature = None
+        self._lock = threading.RLock()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        """Reparse the file if it changed since it was last read."""
+        signature = self._file_signature()
+        if signature is None and self.legacy_loader is not None:
+            self._migrate()
+            signature = self._file_signature()
+        if signature == self._signature:
+            return
+
+        index = {}
+        if signature is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for record in json.load(f).get("brands", []):
+                    index[record["title"]] = record
+        self._index = index
+        self._signature = signature
+        self.version += 1
+
+    def _migrate(self):
+        records = self.legacy_loader()
+        if not records:
+            return
+        self._index = {record["title"]: record for record in records}
+        self._write()
+
+    def _write(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json.part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"brands": list(self._index.values())}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._signature = self._file_signature()
+        self.version += 1
+
+    def refresh(self) -> int:
+        """Pick up changes made to the file by other processes and return the current version."""
+        with self._lock:
+            self._load()
+            return self.version
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._load()
+            return list(self._index.values())
+
+    def get(self, title: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._load()
+            return self._index.get(title)
+
+    def put(self, record: Dict[str, Any]):
+        """Add a brand, or update the brand with the same title in place."""
+        with self._lock:
+            self._load()
+            self._index[record["title"]] = dict(record)
+            self._write()
+
+    def delete(self, title: str) -> bool:
+        """Remove a brand. Returns False if there was no brand with that title."""
+        with self._lock:
+            self._load()
+            if title not in self._index:
+                return False
+            del self._index[title]
+            self._write()
+            return True
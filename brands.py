@@ -1,10 +1,17 @@
-from utils import add_item_to_file, ask_boolean
+import os
+
+from utils import ask_boolean
 from style import writting_style_definitions, default_writting_style_definitions
 from files import Files
+from brand_store import BrandStore
 
 
 class Brand:
 
+    _store = None
+    # Brand objects built from the store, reused while the store version does not change
+    _memo = (None, [], {})
+
     def __init__(self, title, description, style):
         self.title = title
         self.description = description
@@ -22,12 +29,40 @@ class Brand:
     def to_style_cache_text(self):
         return f"{self.title} - {', '.join(self.style)}"
 
+    def to_record(self):
+        return {"title": self.title, "description": self.description, "style": list(self.style)}
+
+    @staticmethod
+    def from_record(record):
+        return Brand(record["title"], record["description"], list(record["style"]))
+
+    @staticmethod
+    def store() -> BrandStore:
+        """Repositorio de marcas; se crea a partir de los archivos de texto antiguos si aún no existe."""
+        if Brand._store is None:
+            Brand._store = BrandStore(Files.brand_store, legacy_loader=Brand.load_legacy_records)
+        return Brand._store
+
+    @staticmethod
+    def _memoized():
+        """
+        Marcas guardadas, construidas una sola vez por versión del repositorio.
+        Streamlit vuelve a ejecutar el script en cada interacción; mientras el
+        archivo no cambie (ni se guarde o elimine una marca) no se vuelve a leer.
+        """
+        store = Brand.store()
+        version = store.refresh()
+        memo = Brand._memo
+        if version != memo[0]:
+            brands = [Brand.from_record(record) for record in store.all()]
+            # Una sola asignación: otras sesiones nunca ven una mezcla de versiones
+            memo = (version, brands, {brand.title: brand for brand in brands})
+            Brand._memo = memo
+        return memo[1], memo[2]
+
     @staticmethod
     def from_title(title: str):
-        brands = Brand.get_cached_brands()
-        for brand in brands:
-            if brand.title == title:
-                return brand
+        return Brand._memoized()[1].get(title)
 
     @staticmethod
     def create_new_brand(title="", description="", styles=None):
@@ -39,9 +74,7 @@ class Brand:
             styles = default_writting_style_definitions
         
         brand = Brand(title, description, styles)
-        add_item_to_file(Files.brand_descriptions,
-                         brand.to_description_cache_text())
-        add_item_to_file(Files.brand_styles, brand.to_style_cache_text())
+        brand.save_in_cache()
         return brand
 
     @staticmethod
@@ -79,28 +112,34 @@ class Brand:
             )
         return cached_brands[0]  # Retorna el primer brand disponible
 
+    @staticmethod
+    def load_legacy_records():
+        """Lee las marcas de los archivos separados por '---' usados antes del repositorio JSON."""
+        if not (os.path.exists(Files.brand_descriptions) and os.path.exists(Files.brand_styles)):
+            return []
+        descriptions_map = Brand.parse_brand_file(Files.brand_descriptions)
+        styles_map = Brand.parse_brand_file(Files.brand_styles)
+
+        records = []
+        for brand in descriptions_map:
+            if brand in styles_map:
+                records.append(Brand(brand, descriptions_map[brand], styles_map[brand].split(', ')).to_record())
+        return records
+
     @staticmethod
     def get_cached_brands():
-        """Obtiene las marcas desde los archivos de caché."""
-        descriptions_map = {}
-        styles_map = {}
-        
+        """Obtiene las marcas guardadas."""
         try:
-            descriptions_map = Brand.parse_brand_file(Files.brand_descriptions)
-            styles_map = Brand.parse_brand_file(Files.brand_styles)
+            return Brand._memoized()[0]
         except Exception as e:
             print(f"Error al cargar marcas: {e}")
             return []
 
-        brands = []
-        for brand in descriptions_map:
-            if brand in styles_map:
-                brand_obj = Brand(
-                    brand, descriptions_map[brand], styles_map[brand].split(', '))
-                brands.append(brand_obj)
-        return brands
+    @staticmethod
+    def delete(title: str) -> bool:
+        """Elimina una marca guardada. Devuelve False si no existía."""
+        return Brand.store().delete(title)
 
     def save_in_cache(self):
-        add_item_to_file(Files.brand_descriptions,
-                         self.to_description_cache_text())
-        add_item_to_file(Files.brand_styles, self.to_style_cache_text())
\ No newline at end of file
+        """Guarda la marca; si ya existe una con el mismo título, la actualiza."""
+        Brand.store().put(self.to_record())
\ No newline at end of file
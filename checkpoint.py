@@ -0,0 +1,214 @@
+"""
+Checkpoint journals for Social-GPT generation runs.
+Every completed pipeline node (topics, ideas, posts, image prompts, images) is
+appended to a JSONL file together with its inputs. Resuming a run replays the
+journaled results and only calls the API for the nodes that are missing.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from files import Files
+
+
+class RunCheckpoint:
+    """
+    Journal of one generation run. The first line describes the run (brand and
+    campaign settings), each following line is a completed node, and a final
+    "done" line is written when the run finishes.
+    A line cut short by a crash is ignored when the journal is read back.
+    """
+
+    # Finished runs kept on disk; older ones are removed when a new run starts
+    max_finished_runs = 50
+    # Interrupted runs (or runs with failed nodes) kept on disk, by last activity
+    max_incomplete_runs = 20
+
+    # Journals already read by list_runs, keyed by path: ((mtime, size), RunCheckpoint)
+    _listed = {}
+    _listed_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.run_id = os.path.splitext(os.path.basename(path))[0]
+        self.header = {}
+        self.nodes = {}
+        self.finished = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def path_for(run_id: str, directory: str = Files.run_checkpoints_dir) -> str:
+        return os.path.join(directory, f"{run_id}.jsonl")
+
+    @staticmethod
+    def create(brand_record: Dict[str, Any], settings_record: Dict[str, Any],
+               directory: str = Files.run_checkpoints_dir, owner: Optional[str] = None) -> "RunCheckpoint":
+        """Start the journal of a new run; `owner` is the token of the session that started it."""
+        os.makedirs(directory, exist_ok=True)
+        RunCheckpoint.prune(directory)
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        header = {
+            "type": "run",
+            "run_id": run_id,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "brand": brand_record,
+            "settings": settings_record,
+            "owner": owner,
+        }
+        path = RunCheckpoint.path_for(run_id, directory)
+        with open(path, "x", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        return RunCheckpoint(path)
+
+    @staticmethod
+    def open(run_id: str, directory: str = Files.run_checkpoints_dir) -> "RunCheckpoint":
+        path = RunCheckpoint.path_for(run_id, directory)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No checkpoint for run {run_id}")
+        return RunCheckpoint(path)
+
+    @staticmethod
+    def list_runs(directory: str = Files.run_checkpoints_dir) -> List["RunCheckpoint"]:
+        """
+        All journaled runs, newest first. A journal is only parsed again when its
+        modification time or size changed since the last listing; open a run with
+        RunCheckpoint.open before resuming it.
+        """
+        if not os.path.isdir(directory):
+            return []
+        names = sorted((name for name in os.listdir(directory) if name.endswith(".jsonl")), reverse=True)
+        runs = []
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            with RunCheckpoint._listed_lock:
+                listed = RunCheckpoint._listed.get(path)
+            if listed is None or listed[0] != stamp:
+                listed = (stamp, RunCheckpoint(path))
+                with RunCheckpoint._listed_lock:
+                    RunCheckpoint._listed[path] = listed
+            runs.append(listed[1])
+
+        paths = {run.path for run in runs}
+        with RunCheckpoint._listed_lock:
+            for path in [path for path in RunCheckpoint._listed if os.path.dirname(path) == directory]:
+                if path not in paths:
+                    del RunCheckpoint._listed[path]
+        return runs
+
+    @staticmethod
+    def incomplete_runs(directory: str = Files.run_checkpoints_dir,
+                        owner: Optional[str] = None) -> List["RunCheckpoint"]:
+        """
+        Runs that were interrupted or finished with failed nodes, newest first;
+        with an owner, only the runs that owner started.
+        """
+        return [run for run in RunCheckpoint.list_runs(directory)
+                if not run.is_complete and (owner is None or run.owner == owner)]
+
+    @staticmethod
+    def prune(directory: str = Files.run_checkpoints_dir):
+        """
+        Remove the oldest finished journals beyond max_finished_runs and the
+        least recently written incomplete ones beyond max_incomplete_runs.
+        """
+        runs = RunCheckpoint.list_runs(directory)
+        finished = [run for run in runs if run.is_complete]
+        incomplete = sorted((run for run in runs if not run.is_complete),
+                            key=RunCheckpoint._last_written, reverse=True)
+        for run in finished[RunCheckpoint.max_finished_runs:] + incomplete[RunCheckpoint.max_incomplete_runs:]:
+            try:
+                os.remove(run.path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _last_written(run: "RunCheckpoint") -> float:
+        try:
+            return os.path.getmtime(run.path)
+        except FileNotFoundError:
+            return 0.0
+
+    @staticmethod
+    def make_key(stage: str, inputs: List[Any]) -> str:
+        """Identity of a node: its stage and the inputs it was generated from."""
+        payload = json.dumps([stage] + list(inputs), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                kind = entry.get("type")
+                if kind == "run":
+                    self.header = entry
+                elif kind == "node":
+                    self.nodes[entry["key"]] = entry
+                    self.finished = None
+                elif kind == "done":
+                    self.finished = entry
+
+    def _append(self, entry: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    @property
+    def brand_record(self) -> Dict[str, Any]:
+        return self.header.get("brand", {})
+
+    @property
+    def settings_record(self) -> Dict[str, Any]:
+        return self.header.get("settings", {})
+
+    @property
+    def owner(self) -> Optional[str]:
+        return self.header.get("owner")
+
+    @property
+    def created(self) -> str:
+        return self.header.get("created", "")
+
+    @property
+    def is_complete(self) -> bool:
+        return self.finished is not None and not self.finished.get("errors")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (True, result) for a journaled node and (False, None) otherwise."""
+        entry = self.nodes.get(key)
+        if entry is None:
+            return False, None
+        return True, entry["result"]
+
+    def record(self, key: str, stage: str, inputs: List[Any], result: Any):
+        entry = {"type": "node", "key": key, "stage": stage, "inputs": list(inputs), "result": result}
+        self._append(entry)
+        self.nodes[key] = entry
+        self.finished = None
+
+    def finish(self, errors: int = 0):
+        """Mark the end of a run; runs with errors stay listed as resumable."""
+        entry = {"type": "done", "errors": errors, "finished": datetime.now().isoformat(timespec="seconds")}
+        self._append(entry)
+        self.finished = entry
+
+    def describe(self) -> str:
+        """Short label for pickers, e.g. "20250101_120000 · Acme · 12 nodos"."""
+        title = self.brand_record.get("title", "?")
+        status = "con errores" if self.finished is not None else "interrumpida"
+        return f"{self.created or self.run_id} · {title} · {len(self.nodes)} nodos · {status}"
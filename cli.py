@@ -0,0 +1,377 @@
+"""
+Headless campaign runner for Social-GPT.
+
+Runs the same generation pipeline as the Streamlit app from campaign spec files
+(JSON, or YAML when PyYAML is installed) and writes the exports, e.g. from cron:
+
+    python cli.py campaigns/acme.yaml campaigns/others.json --output-dir exports
+
+With --parallel-brands all campaigns run at the same time, sharing the request
+rate limit and taking turns for the concurrency slots (see multi_brand.py).
+
+A spec file holds one campaign, a list of campaigns, or {"campaigns": [...]}:
+
+    brand:
+      title: Acme                 # a saved brand, or define it inline:
+      description: Tienda online de café de especialidad
+      style: [Profesional, Cercano]
+    topic_count: 3
+    ideas_per_topic: 2
+    language: Español
+    platforms: [Twitter, LinkedIn]
+    quality: medium               # low | medium | high
+    topics_ideas_prompt_expansion: ""
+    posts_prompt_expansion: ""
+    generate_images: true
+    image_settings: {size: 1024x1024, quality: standard, transport: b64_json}
+    combine_platforms: true
+    bulk_ideas: true
+    export: [csv, json]           # csv | json | txt
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from brands import Brand
+from llm import LLM, GenerationMode, GenerationItemType
+from logger import Logger
+from pipeline import ContentPipeline, CampaignSettings, DEFAULT_MAX_CONCURRENCY, DEFAULT_IMAGE_SETTINGS, PLATFORMS
+from generators.image_generator import IMAGE_MODEL, IMAGE_SIZES, IMAGE_QUALITIES, IMAGE_TRANSPORTS
+from style import default_writting_style_definitions
+from utils import prepare_directories, export_content_to_csv, export_content_to_json, export_content_to_txt
+
+try:
+    import yaml
+except ImportError:  # YAML specs are optional
+    yaml = None
+
+
+EXPORTERS = {
+    "csv": export_content_to_csv,
+    "json": export_content_to_json,
+    "txt": export_content_to_txt,
+}
+
+CACHE_TYPES = {
+    "topics": GenerationItemType.TOPICS,
+    "ideas": GenerationItemType.IDEAS,
+    "posts": GenerationItemType.POST,
+    "image_prompts": GenerationItemType.IMAGE_PROMPT,
+}
+
+
+class SpecError(Exception):
+    """A campaign spec is missing a field or has an invalid value."""
+
+
+class CampaignError(Exception):
+    """A campaign ran but some of its nodes failed; its exports are not written."""
+
+
+def check_campaign(content: Dict[str, Any], errors: int):
+    """Raise CampaignError for a campaign with failed nodes or nothing generated."""
+    if errors:
+        raise CampaignError(f"{errors} generation step(s) failed")
+    if not content["topics"] or not any(content["posts"].values()):
+        raise CampaignError("no posts were generated")
+
+
+def parse_generation_mode(value) -> GenerationMode:
+    if isinstance(value, GenerationMode):
+        return value
+    text = str(value or "medium").strip()
+    if text.upper() in GenerationMode.__members__:
+        return GenerationMode[text.upper()]
+    mode = GenerationMode.from_string(text)
+    if mode is None:
+        raise SpecError(f"Unknown quality '{value}', expected low, medium or high")
+    return mode
+
+
+class CampaignSpec:
+    """One campaign read from a spec file: a brand plus its CampaignSettings."""
+
+    def __init__(self, data: Dict[str, Any], source: str = ""):
+        self.data = data
+        self.source = source
+
+    @property
+    def name(self) -> str:
+        return self.data.get("name") or self.brand_title
+
+    @property
+    def brand_title(self) -> str:
+        brand = self.data.get("brand")
+        return brand.get("title", "") if isinstance(brand, dict) else str(brand or "")
+
+    def brand(self) -> Brand:
+        """The saved brand with this title, or the brand defined inline in the spec."""
+        data = self.data.get("brand")
+        if not data:
+            raise SpecError(f"{self.source}: the campaign has no brand")
+        if isinstance(data, str):
+            data = {"title": data}
+
+        if data.get("description"):
+            return Brand(data.get("title", ""), data["description"],
+                         list(data.get("style") or default_writting_style_definitions))
+        brand = Brand.from_title(data.get("title", ""))
+        if brand is None:
+            raise SpecError(f"{self.source}: brand '{data.get('title')}' is not saved and has no description")
+        return brand
+
+    def count(self, field: str, default: int) -> int:
+        value = self.data.get(field, default)
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise SpecError(f"{self.source}: {field} must be a positive integer, got {value!r}")
+        return value
+
+    def image_settings(self) -> Dict[str, str]:
+        image_settings = {**DEFAULT_IMAGE_SETTINGS, **(self.data.get("image_settings") or {})}
+        allowed = {"model": (IMAGE_MODEL,), "size": IMAGE_SIZES, "quality": IMAGE_QUALITIES,
+                   "transport": IMAGE_TRANSPORTS}
+        for key, value in image_settings.items():
+            if key not in allowed:
+                raise SpecError(f"{self.source}: unknown image setting '{key}'")
+            if value not in allowed[key]:
+                raise SpecError(f"{self.source}: image {key} must be one of {', '.join(allowed[key])}, got {value!r}")
+        return image_settings
+
+    def settings(self) -> CampaignSettings:
+        data = self.data
+        platforms = data.get("platforms") or []
+        if isinstance(platforms, str):
+            platforms = [platforms]
+        if not platforms:
+            raise SpecError(f"{self.source}: the campaign has no platforms")
+        unknown = [platform for platform in platforms if platform not in PLATFORMS]
+        if unknown:
+            raise SpecError(f"{self.source}: unknown platform(s) {', '.join(map(str, unknown))}, "
+                            f"expected {', '.join(PLATFORMS)}")
+        return CampaignSettings(
+            topic_count=self.count("topic_count", 3),
+            ideas_per_topic=self.count("ideas_per_topic", 2),
+            language=data.get("language", "Español"),
+            platforms=list(platforms),
+            generation_mode=parse_generation_mode(data.get("quality")),
+            topics_ideas_prompt_expansion=data.get("topics_ideas_prompt_expansion", ""),
+            posts_prompt_expansion=data.get("posts_prompt_expansion", ""),
+            generate_images=bool(data.get("generate_images", False)),
+            image_settings=self.image_settings(),
+            combine_platforms=bool(data.get("combine_platforms", True)),
+            bulk_ideas=bool(data.get("bulk_ideas", True)),
+        )
+
+    def export_formats(self, default: List[str]) -> List[str]:
+        formats = self.data.get("export") or default
+        if isinstance(formats, str):
+            formats = [formats]
+        unknown = [fmt for fmt in formats if fmt not in EXPORTERS]
+        if unknown:
+            raise SpecError(f"{self.source}: unknown export format(s) {', '.join(unknown)}")
+        return list(formats)
+
+
+def load_specs(path: str) -> List[CampaignSpec]:
+    """Read the campaigns of a JSON or YAML spec file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise SpecError(f"{path}: reading YAML specs requires PyYAML (pip install pyyaml)")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if isinstance(data, dict) and "campaigns" in data:
+        data = data["campaigns"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise SpecError(f"{path}: expected a campaign object or a list of campaigns")
+    return [CampaignSpec(item, f"{path}#{i + 1}") for i, item in enumerate(data)]
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "campaign"
+
+
+def export_content(content: Dict[str, Any], name: str, formats: List[str], output_dir: str) -> List[str]:
+    """Write one export file per format and return their paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    paths = []
+    base = os.path.join(output_dir, f"{slugify(name)}_{timestamp}")
+    # Campaigns of the same brand can finish within the same second
+    suffix = 2
+    while any(os.path.exists(f"{base}.{fmt}") for fmt in formats):
+        base = os.path.join(output_dir, f"{slugify(name)}_{timestamp}_{suffix}")
+        suffix += 1
+    for fmt in formats:
+        paths.append(EXPORTERS[fmt](content, f"{base}.{fmt}"))
+    return paths
+
+
+def run_campaign(spec: CampaignSpec, args) -> Dict[str, Any]:
+    """Generate one campaign and return its content dictionary; raises CampaignError when it failed."""
+    brand = spec.brand()
+    settings = spec.settings()
+    Logger.log("Campaña", f"{spec.name}: {settings.topic_count} temas x {settings.ideas_per_topic} ideas, "
+                          f"{', '.join(settings.platforms)}")
+
+    if args.batch:
+        from batch import BatchCampaignRunner
+        runner = BatchCampaignRunner(brand, settings, poll_interval=args.poll_interval,
+                                     max_concurrency=args.max_concurrency)
+        content = runner.run()
+        check_campaign(content, runner.errors)
+        return content
+
+    def on_error(task, error):
+        Logger.log("Error", f"{spec.name} - {task.stage} '{task.label}': {error}")
+
+    pipeline = ContentPipeline(brand, settings, max_concurrency=args.max_concurrency)
+    content = pipeline.run(on_error=on_error)
+    check_campaign(content, pipeline.errors)
+    return content
+
+
+def run_campaigns_in_parallel(specs: List[CampaignSpec], args) -> List[Tuple[Dict[str, Any], int]]:
+    """Generate every campaign concurrently and return (content, failed nodes) for each, in order."""
+    from multi_brand import MultiBrandRunner
+    for spec in specs:
+        Logger.log("Campaña", f"{spec.name} (en paralelo)")
+    names = {}
+
+    def on_error(task, error):
+        Logger.log("Error", f"{names[task.group]} - {task.stage} '{task.label}': {error}")
+
+    # One cap shared by all campaigns; the executor hands its slots out to the brands in turn
+    runner = MultiBrandRunner([(spec.brand(), spec.settings()) for spec in specs],
+                              max_concurrency=args.max_concurrency)
+    names.update((pipeline, spec.name) for pipeline, spec in zip(runner.pipelines, specs))
+    contents = runner.run(on_error=on_error)
+    return [(content, len(runner.errors[pipeline])) for pipeline, content in zip(runner.pipelines, contents)]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate social media campaigns without the Streamlit UI")
+    parser.add_argument("specs", nargs="+", help="Campaign spec files (.json, .yaml, .yml)")
+    parser.add_argument("--output-dir", default="exports", help="Directory for the export files")
+    parser.add_argument("--format", action="append", choices=sorted(EXPORTERS),
+                        help="Export format when the spec sets none (repeatable, default: json)")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Maximum OpenAI calls in flight per campaign, or in total with --parallel-brands")
+    parser.add_argument("--cache", default="", help="Comma-separated cached types: "
+                        + ", ".join(list(CACHE_TYPES) + ["images"]))
+    parser.add_argument("--batch", action="store_true",
+                        help="Use the OpenAI Batch API (cheaper, completes asynchronously)")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between batch status checks")
+    parser.add_argument("--parallel-brands", action="store_true",
+                        help="Run all campaigns at the same time instead of one after another (not with --batch)")
+    parser.add_argument("--metrics-jsonl", help="Write one JSON line per OpenAI call (tokens, latency, retries, cost)")
+    parser.add_argument("--metrics-prom", help="Write the call counters in the Prometheus text format")
+    return parser
+
+
+def configure_caches(cache_option: str):
+    names = [name.strip() for name in cache_option.split(",") if name.strip()]
+    unknown = [name for name in names if name not in CACHE_TYPES and name != "images"]
+    if unknown:
+        raise SpecError(f"Unknown cache type(s): {', '.join(unknown)}")
+    text_types = [CACHE_TYPES[name] for name in names if name in CACHE_TYPES]
+    if text_types:
+        LLM.enable_cache(text_types)
+    if "images" in names:
+        from image_cache import ImageCache
+        ImageCache.enable()
+
+
+def report_failure(spec: CampaignSpec, error: Exception):
+    Logger.log("Error en la campaña", f"{spec.name}: {error}")
+    print(f"Campaign failed: {spec.name}: {error}", file=sys.stderr)
+
+
+def run_specs(specs: List[CampaignSpec], args) -> int:
+    """Run and export every campaign; returns the exit code."""
+    failures = 0
+    if args.parallel_brands:
+        try:
+            results = run_campaigns_in_parallel(specs, args)
+        except Exception as e:
+            Logger.log("Error en las campañas", str(e))
+            print(f"Campaigns failed: {e}", file=sys.stderr)
+            return 1
+        for spec, (content, errors) in zip(specs, results):
+            try:
+                check_campaign(content, errors)
+                paths = export_content(content, spec.name, spec.export_formats(args.format or ["json"]), args.output_dir)
+                Logger.log("Exportado", "\n".join(paths))
+            except Exception as e:
+                failures += 1
+                report_failure(spec, e)
+        return 1 if failures else 0
+
+    for spec in specs:
+        try:
+            content = run_campaign(spec, args)
+            paths = export_content(content, spec.name, spec.export_formats(args.format or ["json"]), args.output_dir)
+            Logger.log("Exportado", "\n".join(paths))
+        except Exception as e:
+            failures += 1
+            report_failure(spec, e)
+
+    return 1 if failures else 0
+
+
+def write_metrics(args):
+    """Log the per-brand call summary and write the requested metrics exports."""
+    for row in LLM.metrics.summary(("brand",)):
+        Logger.log("Llamadas", f"{row['brand'] or '-'}: {row['calls']} llamadas, {row['retries']} reintentos, "
+                               f"{row['prompt_tokens']}+{row['completion_tokens']} tokens, ${row['cost']:.4f}")
+    if args.metrics_jsonl:
+        LLM.metrics.export_jsonl(args.metrics_jsonl)
+    if args.metrics_prom:
+        LLM.metrics.export_prometheus(args.metrics_prom)
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.parallel_brands and args.batch:
+        # Batch campaigns wait on the Batch API stage by stage and cannot share the executor
+        parser.error("--parallel-brands cannot be combined with --batch")
+    load_dotenv()
+    if not os.environ.get("OPENAI_API_KEY"):
+        print("OPENAI_API_KEY is not set", file=sys.stderr)
+        return 2
+    prepare_directories()
+
+    try:
+        configure_caches(args.cache)
+        specs = [spec for path in args.specs for spec in load_specs(path)]
+        # Validate every spec before spending any tokens
+        for spec in specs:
+            spec.brand()
+            spec.settings()
+            spec.export_formats(args.format or ["json"])
+    except (OSError, ValueError, SpecError) as e:
+        print(f"Invalid campaign spec: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        return run_specs(specs, args)
+    finally:
+        write_metrics(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
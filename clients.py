@@ -0,0 +1,140 @@
+"""
+Process-wide registry of pooled HTTP clients for Social-GPT.
+Reusing clients keeps TLS sessions and keep-alive connections alive across
+requests instead of paying a new handshake for every completion or image.
+"""
+
+import asyncio
+import os
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+class ClientRegistry:
+    """
+    Holds one OpenAI client per API key (and one AsyncOpenAI client per API key
+    and event loop), all sharing the same pool and timeout settings.
+    The clients' built-in retries are disabled: retries go through LLM.retry_policy.
+    """
+
+    # Pool sizing and timeouts, see ClientRegistry.configure
+    max_connections = 64
+    max_keepalive_connections = 32
+    keepalive_expiry = 120.0
+    timeout = 60.0
+    connect_timeout = 10.0
+
+    _clients = {}
+    _async_clients = {}
+    _http_session = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def configure(max_connections: int = None, max_keepalive_connections: int = None,
+                  keepalive_expiry: float = None, timeout: float = None, connect_timeout: float = None):
+        """
+        Change the pool settings. Existing clients are closed so the next call
+        builds new ones with the updated configuration.
+        """
+        if max_connections is not None:
+            ClientRegistry.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            ClientRegistry.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            ClientRegistry.keepalive_expiry = keepalive_expiry
+        if timeout is not None:
+            ClientRegistry.timeout = timeout
+        if connect_timeout is not None:
+            ClientRegistry.connect_timeout = connect_timeout
+        ClientRegistry.close_all()
+
+    @staticmethod
+    def _limits():
+        return httpx.Limits(
+            max_connections=ClientRegistry.max_connections,
+            max_keepalive_connections=ClientRegistry.max_keepalive_connections,
+            keepalive_expiry=ClientRegistry.keepalive_expiry,
+        )
+
+    @staticmethod
+    def _timeout():
+        return httpx.Timeout(ClientRegistry.timeout, connect=ClientRegistry.connect_timeout)
+
+    @staticmethod
+    def _resolve_key(api_key: str = None) -> str:
+        return api_key or os.environ.get("OPENAI_API_KEY")
+
+    @staticmethod
+    def get_client(api_key: str = None) -> OpenAI:
+        """Get the shared OpenAI client for an API key (defaults to OPENAI_API_KEY)."""
+        api_key = ClientRegistry._resolve_key(api_key)
+        with ClientRegistry._lock:
+            client = ClientRegistry._clients.get(api_key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    timeout=ClientRegistry._timeout(),
+                    max_retries=0,
+                    http_client=DefaultHttpxClient(
+                        limits=ClientRegistry._limits(),
+                        timeout=ClientRegistry._timeout(),
+                    ),
+                )
+                ClientRegistry._clients[api_key] = client
+            return client
+
+    @staticmethod
+    def get_async_client(api_key: str = None) -> AsyncOpenAI:
+        """
+        Get the shared AsyncOpenAI client for an API key.
+        Async connection pools are bound to the event loop that created them, so a
+        new client is only built when called from a different running loop.
+        """
+        api_key = ClientRegistry._resolve_key(api_key)
+        loop = asyncio.get_running_loop()
+        with ClientRegistry._lock:
+            entry = ClientRegistry._async_clients.get(api_key)
+            if entry is None or entry[0] is not loop:
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    timeout=ClientRegistry._timeout(),
+                    max_retries=0,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=ClientRegistry._limits(),
+                        timeout=ClientRegistry._timeout(),
+                    ),
+                )
+                entry = (loop, client)
+                ClientRegistry._async_clients[api_key] = entry
+            return entry[1]
+
+    @staticmethod
+    def get_http_session() -> requests.Session:
+        """Get the shared requests session used for downloads (e.g. generated images)."""
+        with ClientRegistry._lock:
+            if ClientRegistry._http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=ClientRegistry.max_keepalive_connections,
+                    pool_maxsize=ClientRegistry.max_connections,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                ClientRegistry._http_session = session
+            return ClientRegistry._http_session
+
+    @staticmethod
+    def close_all():
+        """Close every pooled client. Async clients are dropped and closed by their loop."""
+        with ClientRegistry._lock:
+            for client in ClientRegistry._clients.values():
+                client.close()
+            ClientRegistry._clients = {}
+            ClientRegistry._async_clients = {}
+            if ClientRegistry._http_session is not None:
+                ClientRegistry._http_session.close()
+                ClientRegistry._http_session = None
@@ -8,3 +8,12 @@ class Files:
 
     brand_descriptions = 'cache/brand-descriptions.txt'
     brand_styles = 'cache/brand-styles.txt'
+    brand_store = 'cache/brands.json'
+
+    llm_response_cache = 'cache/llm-responses.sqlite3'
+    batch_dir = 'cache/batches'
+    run_checkpoints_dir = 'cache/runs'
+
+    images_dir = 'results/images'
+    image_cache_dir = 'cache/images'
+    image_cache_manifest = 'cache/image-cache.sqlite3'
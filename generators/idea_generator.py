@@ -1,13 +1,23 @@
 """Idea Generator for Social-GPT using modern OpenAI API."""
+import asyncio
+import json
+
 from utils import format_list, add_item_to_file
-from prompts import Prompts
+from prompts import PromptBuilder
 from files import Files
 from brands import Brand
 from logger import Logger
 from llm import LLM, GenerationMode, GenerationItemType
+from generators.list_output import list_response_format, parse_list_response, clean_items, top_up_list, atop_up_list
 
 
 class IdeaGenerator:
+    # Rough output size of one idea, used to split bulk requests below the output limit
+    estimated_tokens_per_idea = 60
+    bulk_output_token_budget = 3000
+    # Follow-up requests made when a response has fewer ideas than requested
+    max_top_up_requests = 2
+
     def __init__(self, brand: Brand, number_of_ideas: int, prompt_expansion: str, generation_mode: GenerationMode):
         self.brand = brand
         self.number_of_ideas = number_of_ideas
@@ -24,51 +34,212 @@ class IdeaGenerator:
         Returns:
             List of generated ideas
         """
-        # Build the system prompt with brand description
-        system_prompt = {
-            "role": "system",
-            "content": f"""Eres un experto creativo en marketing digital y contenido para redes sociales especializado en la marca siguiente:
-{self.brand.description}
-
-Tu trabajo es crear ideas específicas y atractivas para posts de redes sociales basadas en un tema dado.
-Si las instrucciones del usuario mencionan promocionar un producto o servicio específico, SIEMPRE asegúrate de que las ideas de post promocionen directamente ese producto o servicio, enfatizando sus beneficios, características o valor único.
-"""
-        }
-        
-        # Build the user prompt with topic and additional instructions
-        base_prompt = f"""Genera {self.number_of_ideas} ideas creativas y específicas para posts de redes sociales sobre el tema '{topic}' en formato de lista:
-- [Idea 1]
-- [Idea 2]
-- etc.
+        messages = self.build_messages(topic)
+        return self.complete_response(messages, self.request(messages))
 
-Cada idea debe:
-1. Ser una propuesta concreta de contenido para un único post
-2. Incluir un enfoque o ángulo específico (no solo el tema general)
-3. Ser atractiva, original y adaptada a la marca
-4. Estar lista para desarrollarse en un post completo{Prompts.get_avoids()}{Prompts.build_style_prompt(self.brand.style)}"""
+    async def agenerate_ideas(self, topic):
+        """Async variant of generate_ideas."""
+        messages = self.build_messages(topic)
+        return await self.acomplete_response(messages, await self.arequest(messages))
+
+    def request(self, messages):
+        """Request an idea list and return the raw content."""
+        return LLM.generate(
+            messages, GenerationItemType.IDEAS, self.generation_mode, response_format=self.response_format()
+        ).content
+
+    async def arequest(self, messages):
+        return (await LLM.agenerate(
+            messages, GenerationItemType.IDEAS, self.generation_mode, response_format=self.response_format()
+        )).content
+
+    def response_format(self):
+        """JSON schema for {"ideas": [...]}."""
+        return list_response_format("ideas", "ideas")
+
+    def complete_response(self, messages, content: str, ideas=None):
+        """
+        Parse a response (or take already parsed `ideas`), request only the
+        missing ideas if it came up short, then save them.
+        """
+        ideas = top_up_list(
+            self.parse_response(content) if ideas is None else ideas, self.number_of_ideas,
+            messages, "ideas", "ideas", self.request, self.max_top_up_requests
+        )
+        return self.save_ideas(ideas)
+
+    async def acomplete_response(self, messages, content: str, ideas=None):
+        """Async variant of complete_response."""
+        ideas = await atop_up_list(
+            self.parse_response(content) if ideas is None else ideas, self.number_of_ideas,
+            messages, "ideas", "ideas", self.arequest, self.max_top_up_requests
+        )
+        return self.save_ideas(ideas)
+
+    def generate_ideas_bulk(self, topics):
+        """
+        Generate ideas for several topics with one structured completion per chunk.
+        Topics are chunked so each response stays within bulk_output_token_budget;
+        topics missing from a response or with too few ideas are topped up with
+        a per-topic request for the missing ideas only.
         
-        if self.prompt_expansion:
-            base_prompt += f"\n\nInstrucciones adicionales (MUY IMPORTANTES, DEBEN SER PRIORIZADAS): {self.prompt_expansion}"
+        Args:
+            topics: The general topics to generate ideas for
             
-        user_prompt = {
-            "role": "user",
-            "content": base_prompt
+        Returns:
+            Dict mapping each topic to its list of generated ideas
+        """
+        ideas_by_topic = {}
+        for chunk in self.chunk_topics(topics):
+            response = LLM.generate(
+                self.build_bulk_messages(chunk),
+                GenerationItemType.IDEAS,
+                self.generation_mode,
+                response_format=self.bulk_response_format()
+            )
+            ideas_by_topic.update(self.process_bulk_response(chunk, response.content))
+        
+        return {
+            topic: self.complete_response(self.build_messages(topic), "", ideas_by_topic.get(topic, []))
+            for topic in topics
         }
+
+    async def agenerate_ideas_bulk(self, topics):
+        """Async variant of generate_ideas_bulk; chunks are requested concurrently."""
+        chunks = self.chunk_topics(topics)
+        responses = await asyncio.gather(*[
+            LLM.agenerate(
+                self.build_bulk_messages(chunk),
+                GenerationItemType.IDEAS,
+                self.generation_mode,
+                response_format=self.bulk_response_format()
+            )
+            for chunk in chunks
+        ])
         
-        # Generate ideas using the LLM
-        response = LLM.generate(
-            [system_prompt, user_prompt],
-            GenerationItemType.IDEAS,
-            self.generation_mode
+        ideas_by_topic = {}
+        for chunk, response in zip(chunks, responses):
+            ideas_by_topic.update(self.process_bulk_response(chunk, response.content))
+        
+        completed = await asyncio.gather(*[
+            self.acomplete_response(self.build_messages(topic), "", ideas_by_topic.get(topic, []))
+            for topic in topics
+        ])
+        return dict(zip(topics, completed))
+
+    def chunk_topics(self, topics):
+        """Split topics into groups whose expected output fits in the token budget."""
+        per_topic = max(1, self.number_of_ideas) * self.estimated_tokens_per_idea
+        chunk_size = max(1, self.bulk_output_token_budget // per_topic)
+        return [topics[i:i + chunk_size] for i in range(0, len(topics), chunk_size)]
+
+    def bulk_response_format(self):
+        """JSON schema for a list of {topic, ideas} objects."""
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "ideas_by_topic",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "topics": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "topic": {"type": "string"},
+                                    "ideas": {"type": "array", "items": {"type": "string"}}
+                                },
+                                "required": ["topic", "ideas"],
+                                "additionalProperties": False
+                            }
+                        }
+                    },
+                    "required": ["topics"],
+                    "additionalProperties": False
+                }
+            }
+        }
+
+    def build_bulk_messages(self, topics):
+        """Build the system and user messages for idea generation on several topics."""
+        topic_list = "\n".join(f"- {topic}" for topic in topics)
+        return (
+            self.prompt_builder()
+            .add_static("""Devuelve un objeto JSON con la clave "topics": una lista con un elemento por tema, en el mismo orden, con el texto exacto del tema en "topic" y sus ideas en "ideas".""")
+            .add_variable(f"""Genera {self.number_of_ideas} ideas creativas y específicas para posts de redes sociales para cada uno de estos temas:
+{topic_list}""")
+            .add_instructions(self.prompt_expansion, "Instrucciones adicionales (MUY IMPORTANTES, DEBEN SER PRIORIZADAS)")
+            .build()
         )
+
+    def process_bulk_response(self, topics, content: str):
+        """
+        Map a bulk JSON response back to the requested topics (without saving).
+        Entries are matched by topic text first and by position otherwise.
+        """
+        try:
+            entries = json.loads(content).get("topics", [])
+        except (json.JSONDecodeError, AttributeError):
+            Logger.log("Respuesta de ideas no válida", content)
+            return {}
         
-        # Process the response to extract the ideas
-        ideas = [
-            i.replace("- ", "")
-            for i in response.content.strip().split("\n")
-            if len(i) > 2
-        ][: self.number_of_ideas]
+        entries = [entry for entry in entries if isinstance(entry, dict)]
+        by_text = {str(entry.get("topic", "")).strip(): entry for entry in entries}
         
+        ideas_by_topic = {}
+        for position, topic in enumerate(topics):
+            entry = by_text.get(topic.strip())
+            if entry is None and position < len(entries) and len(entries) == len(topics):
+                entry = entries[position]
+            if entry is None:
+                continue
+            
+            ideas = entry.get("ideas", [])
+            ideas_by_topic[topic] = clean_items(ideas if isinstance(ideas, list) else [])[: self.number_of_ideas]
+        
+        return ideas_by_topic
+
+    def prompt_builder(self):
+        """
+        PromptBuilder with the static part shared by every idea request of the
+        campaign: role, brand, requirements, avoid notes and style.
+        """
+        return (
+            PromptBuilder("""Eres un experto creativo en marketing digital y contenido para redes sociales especializado en la marca siguiente:""")
+            .add_brand(self.brand)
+            .add_static("""Tu trabajo es crear ideas específicas y atractivas para posts de redes sociales basadas en un tema dado.
+Si las instrucciones del usuario mencionan promocionar un producto o servicio específico, SIEMPRE asegúrate de que las ideas de post promocionen directamente ese producto o servicio, enfatizando sus beneficios, características o valor único.""")
+            .add_static("""Cada idea debe:
+1. Ser una propuesta concreta de contenido para un único post
+2. Incluir un enfoque o ángulo específico (no solo el tema general)
+3. Ser atractiva, original y adaptada a la marca
+4. Estar lista para desarrollarse en un post completo""")
+            .add_avoids()
+            .add_style(self.brand.style)
+        )
+
+    def build_messages(self, topic):
+        """Build the system and user messages for idea generation on a topic."""
+        return (
+            self.prompt_builder()
+            .add_static("""Devuelve un objeto JSON con la clave "ideas": una lista con el texto de cada idea, sin numeración.""")
+            .add_variable(f"Genera {self.number_of_ideas} ideas creativas y específicas para posts de redes sociales sobre el tema '{topic}'.")
+            .add_instructions(self.prompt_expansion, "Instrucciones adicionales (MUY IMPORTANTES, DEBEN SER PRIORIZADAS)")
+            .build()
+        )
+
+    def parse_response(self, content: str):
+        """Extract the ideas from the model response."""
+        return parse_list_response(content, "ideas")[: self.number_of_ideas]
+
+    def process_response(self, content: str):
+        """Extract, log and save the ideas from the model response."""
+        return self.save_ideas(self.parse_response(content))
+
+    def save_ideas(self, ideas):
+        """Log the ideas and append them to the ideas results file."""
         # Log the results
         Logger.log("Ideas generadas", format_list(ideas))
         
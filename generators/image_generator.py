@@ -4,14 +4,27 @@ Image Generation Module for Social-GPT using OpenAI's GPT-image-1 model.
 
 import os
 import time
-import requests
+import base64
 import io
 from PIL import Image
-from datetime import datetime
 import openai
+from typing import Optional
 from logger import Logger
-from utils import count_files_in_directory
+from clients import ClientRegistry
+from image_store import ImageStore
+from image_cache import ImageCache
+from image_derivatives import ImageDerivatives
 from llm import LLM, GenerationMode
+from metrics import SOURCE_CACHE
+
+# How the generated image is sent back: inline as base64 (one round trip) or as a
+# temporary URL that has to be downloaded separately
+IMAGE_TRANSPORTS = ("b64_json", "url")
+DEFAULT_IMAGE_TRANSPORT = "b64_json"
+
+IMAGE_MODEL = "dall-e-3"
+IMAGE_SIZES = ("1024x1024", "1792x1024", "1024x1792")
+IMAGE_QUALITIES = ("standard", "hd")
 
 def analyze_image_complexity(prompt: str) -> str:
     """
@@ -42,12 +55,156 @@ def analyze_image_complexity(prompt: str) -> str:
     else:
         return "high"
 
+def request_image_generation(client, **params):
+    """
+    Call images.generate through the shared rate limiter and retry policy,
+    waiting for image budget first and backing off on transient errors.
+    The call is recorded in LLM.metrics.
+    """
+    model = params["model"]
+    attempts = []
+
+    def attempt():
+        attempts.append(time.monotonic())
+        LLM.rate_limiter.acquire(model)
+        raw = client.images.with_raw_response.generate(**params)
+        LLM.rate_limiter.update_from_headers(model, raw.headers)
+        return raw.parse()
+
+    started = time.monotonic()
+    try:
+        response = LLM.retry_policy.call(attempt, LLM._on_retry(model))
+    except Exception as e:
+        LLM.metrics.record_image(model, params.get("size", ""), params.get("quality", ""),
+                                 time.monotonic() - started, max(len(attempts) - 1, 0), error=e)
+        raise
+    LLM.metrics.record_image(model, params.get("size", ""), params.get("quality", ""),
+                             time.monotonic() - started, len(attempts) - 1)
+    return response
+
+def download_image(url: str, store: ImageStore = None, chunk_size: int = 64 * 1024) -> str:
+    """
+    Stream a generated image into the image store through the pooled HTTP
+    session, retrying transient HTTP failures. Returns the saved path.
+    """
+    store = store or ImageStore.shared()
+
+    def attempt():
+        with ClientRegistry.get_http_session().get(url, stream=True, timeout=ClientRegistry.timeout) as image_response:
+            image_response.raise_for_status()
+            return store.write(image_response.iter_content(chunk_size=chunk_size))
+
+    return LLM.retry_policy.call(attempt)
+
+def iter_b64_chunks(data: str, chunk_size: int = 64 * 1024):
+    """
+    Decode a base64 image slice by slice, so only one chunk of decoded bytes
+    is held in memory next to the response text.
+    """
+    # Base64 decodes in groups of 4 characters
+    chunk_size -= chunk_size % 4
+    for start in range(0, len(data), chunk_size):
+        yield base64.b64decode(data[start:start + chunk_size])
+
+def save_image(image, store: ImageStore = None) -> str:
+    """
+    Write an images API result (b64_json or url) to the image store and return
+    its path. Thumbnails and previews are created in the background.
+    """
+    if getattr(image, "b64_json", None):
+        filepath = (store or ImageStore.shared()).write(iter_b64_chunks(image.b64_json))
+    elif getattr(image, "url", None):
+        filepath = download_image(image.url, store)
+    else:
+        raise ValueError("The image response contains neither b64_json nor url")
+    ImageDerivatives.shared().schedule(filepath)
+    return filepath
+
+def resolve_quality(quality: str, generation_mode: GenerationMode) -> str:
+    """Quality sent to the API: the given one, or derived from the generation mode."""
+    if quality not in ["standard", "hd"]:
+        return "hd" if generation_mode == GenerationMode.HIGH else "standard"
+    return quality
+
+def image_cache_key(prompt: str, generation_mode: GenerationMode, size: str, quality: str) -> Optional[str]:
+    """Key of the request in the image cache, or None when the cache is off."""
+    if ImageCache.active() is None:
+        return None
+    return ImageCache.make_key(prompt, size, resolve_quality(quality, generation_mode), IMAGE_MODEL)
+
+def find_cached_image(cache_key: Optional[str], store: ImageStore = None) -> Optional[str]:
+    """On a cache hit, add the cached image to the store and return its path."""
+    cache = ImageCache.active()
+    if cache_key is None or cache is None:
+        return None
+    cached_path = cache.get(cache_key)
+    if cached_path is None:
+        return None
+    filepath = (store or ImageStore.shared()).add_file(cached_path)
+    ImageDerivatives.shared().schedule(filepath)
+    LLM.metrics.record_image(IMAGE_MODEL, "", "", 0.0, source=SOURCE_CACHE)
+    return filepath
+
+def cache_image(cache_key: Optional[str], filepath: str, prompt: str, latency: float):
+    """Store a generated image; the key comes from image_cache_key and is None when the cache was off."""
+    if cache_key is not None:
+        ImageCache.instance().put(cache_key, filepath, prompt, IMAGE_MODEL, latency)
+
+def request_image(
+    prompt: str,
+    generation_mode: GenerationMode = GenerationMode.MEDIUM,
+    size: str = "1024x1024",
+    quality: str = "standard",
+    transport: str = DEFAULT_IMAGE_TRANSPORT
+):
+    """
+    Ask OpenAI for an image.
+    
+    Args:
+        prompt: The text prompt to use for generating the image
+        generation_mode: Quality setting for generation
+        size: Image dimensions
+        quality: Image quality setting
+        transport: "b64_json" to receive the image inline or "url" for a download link
+        
+    Returns:
+        The generated image object (with b64_json or url set), see save_image
+    """
+    if transport not in IMAGE_TRANSPORTS:
+        raise ValueError(f"Unknown image transport: {transport}")
+
+    # Make sure the OpenAI API key is set
+    api_key = openai.api_key or os.environ.get("OPENAI_API_KEY")
+        
+    if not api_key:
+        raise ValueError("OpenAI API key is not set. Please set the OPENAI_API_KEY environment variable.")
+    
+    # Analyze prompt complexity for logging purposes
+    complexity = analyze_image_complexity(prompt)
+    
+    # For GPT-image-1 model
+    Logger.log("Image Generation", f"Using GPT-image-1 for image generation (complexity: {complexity})")
+    
+    # Create a response using GPT-image-1
+    response = request_image_generation(
+        ClientRegistry.get_client(api_key),
+        model=IMAGE_MODEL,  # Specify GPT-image-1 model
+        prompt=prompt,
+        size=size,  # Use the specified size
+        quality=resolve_quality(quality, generation_mode),
+        n=1,  # Number of images to generate
+        response_format=transport,
+    )
+    
+    return response.data[0]
+
 def generate_image_with_openai(
     prompt: str, 
     generation_mode: GenerationMode = GenerationMode.MEDIUM,
     model_preference: str = "GPT-image-1",
     size: str = "1024x1024",
-    quality: str = "standard"
+    quality: str = "standard",
+    transport: str = DEFAULT_IMAGE_TRANSPORT
 ) -> str:
     """
     Generate an image using OpenAI's GPT-image-1 model.
@@ -58,62 +215,26 @@ def generate_image_with_openai(
         model_preference: Which model to use (always uses GPT-image-1)
         size: Image dimensions
         quality: Image quality setting
+        transport: "b64_json" or "url", see request_image
         
     Returns:
         str: Path to the saved image
     """
     try:
-        # Make sure the OpenAI API key is set
-        if not openai.api_key:
-            openai.api_key = os.environ.get("OPENAI_API_KEY")
-            
-        if not openai.api_key:
-            raise ValueError("OpenAI API key is not set. Please set the OPENAI_API_KEY environment variable.")
-        
-        # Analyze prompt complexity for logging purposes
-        complexity = analyze_image_complexity(prompt)
-        
-        # For GPT-image-1 model
-        Logger.log("Image Generation", f"Using GPT-image-1 for image generation (complexity: {complexity})")
-        
-        # Set quality based on parameter or generation mode
-        if quality not in ["standard", "hd"]:
-            quality = "hd" if generation_mode == GenerationMode.HIGH else "standard"
-        
-        # Create a response using GPT-image-1
-        response = openai.images.generate(
-            model="dall-e-3",  # Specify GPT-image-1 model
-            prompt=prompt,
-            size=size,  # Use the specified size
-            quality=quality,
-            n=1,  # Number of images to generate
-        )
-        
-        # Get the image URL
-        image_url = response.data[0].url
-        
-        # Download the image
-        image_response = requests.get(image_url)
-        if image_response.status_code != 200:
-            raise Exception(f"Failed to download image: {image_response.status_code}")
-        
-        image_content = image_response.content
-        
-        # Save the image
-        existing_images = count_files_in_directory("results/images")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"post_{existing_images + 1}_{timestamp}.png"
-        filepath = f"results/images/{filename}"
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Reuse the image of an identical earlier request when the image cache is on
+        cache_key = image_cache_key(prompt, generation_mode, size, quality)
+        cached_path = find_cached_image(cache_key)
+        if cached_path is not None:
+            Logger.log("Cached Image", f"Filename: {os.path.basename(cached_path)}\nPrompt: {prompt}")
+            return cached_path
         
-        # Save the image
-        with open(filepath, 'wb') as f:
-            f.write(image_content)
+        started = time.monotonic()
+        image = request_image(prompt, generation_mode, size, quality, transport)
+        filepath = save_image(image)
+        cache_image(cache_key, filepath, prompt, time.monotonic() - started)
         
         # Log the success
-        Logger.log(f"Generated Image", f"Filename: {filename}\nPrompt: {prompt}")
+        Logger.log(f"Generated Image", f"Filename: {os.path.basename(filepath)}\nPrompt: {prompt}")
         
         return filepath
     
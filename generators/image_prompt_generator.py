@@ -1,5 +1,6 @@
 """Generador de Prompts de Imágenes para Social-GPT optimizado para DALL-E 3."""
 from brands import Brand
+from prompts import PromptBuilder
 from llm import LLM, GenerationMode, GenerationItemType
 
 class ImagePromptGenerator:
@@ -16,29 +17,38 @@ class ImagePromptGenerator:
         Returns:
             str: Un prompt bien elaborado para la generación de imágenes con DALL-E 3
         """
-        # Prompt de sistema para el modelo
-        system_content = f"""Eres un experto en crear prompts detallados y creativos para el modelo DALL-E 3 de OpenAI. 
-Estás ayudando a crear imágenes para redes sociales para una marca con esta descripción: 
-{self.brand.description}"""
+        base_description = LLM.generate(
+            self.build_messages(),
+            GenerationItemType.IMAGE_PROMPT,
+            self.generation_mode
+        ).content
+        return self.process_response(base_description)
+
+    async def agenerate_prompt(self):
+        """Variante asíncrona de generate_prompt."""
+        response = await LLM.agenerate(
+            self.build_messages(),
+            GenerationItemType.IMAGE_PROMPT,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
+
+    def build_messages(self):
+        """Construye los mensajes de sistema y usuario para el prompt de imagen."""
+        # Contenido fijo primero (igual en todas las imágenes de la campaña), después la idea
+        builder = (
+            PromptBuilder("""Eres un experto en crear prompts detallados y creativos para el modelo DALL-E 3 de OpenAI. 
+Estás ayudando a crear imágenes para redes sociales para una marca con esta descripción:""")
+            .add_brand(self.brand)
+        )
 
         # Si hay instrucciones promocionales, añadirlas al prompt del sistema
         if self.additional_instructions and "PROMOCIONAL" in self.additional_instructions:
-            system_content += f"""
-
-IMPORTANTE: Esta imagen debe tener un enfoque PROMOCIONAL para un producto o servicio. 
+            builder.add_static("""IMPORTANTE: Esta imagen debe tener un enfoque PROMOCIONAL para un producto o servicio. 
 Asegúrate de que el prompt genere una imagen que comunique visualmente el valor y atractivo del producto/servicio.
-La imagen debe ser profesional, atractiva y orientada a marketing."""
+La imagen debe ser profesional, atractiva y orientada a marketing.""")
 
-        system_prompt = {
-            "role": "system", 
-            "content": system_content
-        }
-
-        # Prompt del usuario solicitando la descripción de la imagen
-        user_content = f"""Crea un prompt atractivo y detallado para una imagen de redes sociales sobre:
-'{self.post_idea}'
-
-El prompt debe:
+        builder.add_static("""El prompt debe:
 1. Ser visualmente descriptivo y atractivo (25-50 palabras)
 2. Relacionarse claramente con la idea del post y la identidad de la marca
 3. Evitar solicitar texto en la imagen (DALL-E tiene dificultades con el texto)
@@ -47,23 +57,18 @@ El prompt debe:
 6. Evitar mencionar "publicación de redes sociales" en la descripción
 7. Nunca solicitar contenido prohibido (personas reales, violencia, temas políticos)
 
-Devuelve SOLO el texto del prompt de la imagen sin explicaciones ni formato adicional."""
+Devuelve SOLO el texto del prompt de la imagen sin explicaciones ni formato adicional.""")
 
-        # Si hay instrucciones adicionales, añadirlas al prompt del usuario
+        # Las instrucciones adicionales son las mismas para toda la campaña
         if self.additional_instructions:
-            user_content += f"\n\nInstrucciones adicionales: {self.additional_instructions}"
-        
-        user_prompt = {
-            "role": "user",
-            "content": user_content
-        }
+            builder.add_static(f"Instrucciones adicionales: {self.additional_instructions}")
 
-        # Obtener la descripción base usando el LLM
-        base_description = LLM.generate(
-            [system_prompt, user_prompt], 
-            GenerationItemType.IMAGE_PROMPT, 
-            self.generation_mode
-        ).content.strip()
+        return builder.add_variable(f"""Crea un prompt atractivo y detallado para una imagen de redes sociales sobre:
+'{self.post_idea}'""").build()
+
+    def process_response(self, base_description: str):
+        """Añade los detalles de estilo y técnicos a la descripción base del modelo."""
+        base_description = base_description.strip()
         
         # Añadir detalles técnicos para crear el prompt final
         brand_style = ", ".join(self.brand.style)
@@ -1,6 +1,6 @@
 """Instagram Generator for Social-GPT using modern OpenAI API."""
 from utils import add_item_to_file
-from prompts import Prompts
+from prompts import PromptBuilder
 from brands import Brand
 from files import Files
 from logger import Logger
@@ -22,47 +22,62 @@ class InstagramGenerator:
         Returns:
             str: The generated Instagram post content
         """
-        # Build the system prompt with brand description
-        system_prompt = {
-            "role": "system",
-            "content": f"""Eres un experto en crear contenido altamente atractivo para Instagram que genera engagement y conecta con la audiencia.
-Vas a crear contenido para la siguiente marca:
-{self.brand.description}
+        response = LLM.generate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
-tu post DEBE enfocarse directamente en promocionar ese producto/servicio, enfatizando sus características visuales,
-beneficios clave y propuesta de valor única. Incluye un llamado a la acción claro.
-"""
-        }
-        
-        # Build the user prompt with language, idea, and brand style
-        prompt = f"""Escribe un post de Instagram en {self.language} que trate sobre esta idea específica:
-'{self.idea}'
+    async def agenerate_post(self):
+        """Async variant of generate_post."""
+        response = await LLM.agenerate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-El post debe:
+    def stream_post(self):
+        """
+        Stream the Instagram post as it is generated, yielding content deltas.
+        The complete Instagram post is cleaned, logged and saved when the stream ends
+        and is returned as the generator's return value.
+        """
+        chunks = []
+        for delta in LLM.stream(self.build_messages(), GenerationItemType.POST, self.generation_mode):
+            chunks.append(delta)
+            yield delta
+        return self.process_response("".join(chunks))
+
+    def build_messages(self):
+        """Build the system and user messages for the Instagram post."""
+        # Static content first (shared by every post of the campaign), then the idea
+        return (
+            PromptBuilder("""Eres un experto en crear contenido altamente atractivo para Instagram que genera engagement y conecta con la audiencia.
+Vas a crear contenido para la siguiente marca:""")
+            .add_brand(self.brand)
+            .add_static("""IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
+tu post DEBE enfocarse directamente en promocionar ese producto/servicio, enfatizando sus características visuales,
+beneficios clave y propuesta de valor única. Incluye un llamado a la acción claro.""")
+            .add_static("""El post debe:
 1. Tener un inicio cautivador que atrape la atención al deslizar
 2. Incluir texto descriptivo que complemente una imagen visual (aunque no describes la imagen)
 3. Utilizar emojis de manera estratégica para aumentar el engagement
 4. Incorporar hashtags relevantes que amplíen el alcance
-5. Terminar con una pregunta o llamado a la acción para fomentar la interacción{Prompts.get_avoids()}{Prompts.build_style_prompt(self.brand.style)}"""
-
-        if self.prompt_expansion:
-            prompt = prompt + f"\n\nInstrucciones adicionales (MUY IMPORTANTES): {self.prompt_expansion}"
-        
-        user_prompt = {
-            "role": "user",
-            "content": prompt
-        }
-        
-        # Generate post using the LLM
-        response = LLM.generate(
-            [system_prompt, user_prompt],
-            GenerationItemType.POST,
-            self.generation_mode
+5. Terminar con una pregunta o llamado a la acción para fomentar la interacción""")
+            .add_avoids()
+            .add_style(self.brand.style)
+            .add_variable(f"""Escribe un post de Instagram en {self.language} que trate sobre esta idea específica:
+'{self.idea}'""")
+            .add_instructions(self.prompt_expansion)
+            .build()
         )
-        
+
+    def process_response(self, content: str):
+        """Clean, log and save the generated Instagram post."""
         # Extract the post content
-        post = response.content.strip()
+        post = content.strip()
         
         # Log the result
         Logger.log("Post de Instagram generado", post)
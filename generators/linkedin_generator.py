@@ -1,6 +1,6 @@
 """LinkedIn Generator for Social-GPT using modern OpenAI API."""
 from utils import add_item_to_file
-from prompts import Prompts
+from prompts import PromptBuilder
 from brands import Brand
 from files import Files
 from logger import Logger
@@ -22,47 +22,62 @@ class LinkedInGenerator:
         Returns:
             str: The generated LinkedIn post content
         """
-        # Build the system prompt with brand description
-        system_prompt = {
-            "role": "system",
-            "content": f"""Eres un experto en crear contenido profesional y persuasivo para LinkedIn que genera credibilidad y posicionamiento de marca.
-Vas a crear contenido para la siguiente marca:
-{self.brand.description}
+        response = LLM.generate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
-tu post DEBE enfocarse directamente en promocionar ese producto/servicio desde un ángulo profesional y centrado en el valor.
-Destaca cómo resuelve problemas empresariales concretos y aporta beneficios medibles.
-"""
-        }
-        
-        # Build the user prompt with language, idea, and brand style
-        prompt = f"""Escribe un post de LinkedIn en {self.language} con 5-8 párrafos que trate sobre esta idea específica:
-'{self.idea}'
+    async def agenerate_post(self):
+        """Async variant of generate_post."""
+        response = await LLM.agenerate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-El post debe:
+    def stream_post(self):
+        """
+        Stream the LinkedIn post as it is generated, yielding content deltas.
+        The complete LinkedIn post is cleaned, logged and saved when the stream ends
+        and is returned as the generator's return value.
+        """
+        chunks = []
+        for delta in LLM.stream(self.build_messages(), GenerationItemType.POST, self.generation_mode):
+            chunks.append(delta)
+            yield delta
+        return self.process_response("".join(chunks))
+
+    def build_messages(self):
+        """Build the system and user messages for the LinkedIn post."""
+        # Static content first (shared by every post of the campaign), then the idea
+        return (
+            PromptBuilder("""Eres un experto en crear contenido profesional y persuasivo para LinkedIn que genera credibilidad y posicionamiento de marca.
+Vas a crear contenido para la siguiente marca:""")
+            .add_brand(self.brand)
+            .add_static("""IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
+tu post DEBE enfocarse directamente en promocionar ese producto/servicio desde un ángulo profesional y centrado en el valor.
+Destaca cómo resuelve problemas empresariales concretos y aporta beneficios medibles.""")
+            .add_static("""El post debe:
 1. Comenzar con un párrafo inicial potente que capte la atención profesional
 2. Desarrollar el contenido con información valiosa y perspectivas relevantes
 3. Incluir datos o ejemplos que refuercen el mensaje principal cuando sea posible
 4. Mantener un tono profesional y experto apropiado para LinkedIn
-5. Finalizar con un llamado a la acción claro para generar interacción{Prompts.get_avoids()}{Prompts.build_style_prompt(self.brand.style)}"""
-
-        if self.prompt_expansion:
-            prompt = prompt + f"\n\nInstrucciones adicionales (MUY IMPORTANTES): {self.prompt_expansion}"
-        
-        user_prompt = {
-            "role": "user",
-            "content": prompt
-        }
-        
-        # Generate post using the LLM
-        response = LLM.generate(
-            [system_prompt, user_prompt],
-            GenerationItemType.POST,
-            self.generation_mode
+5. Finalizar con un llamado a la acción claro para generar interacción""")
+            .add_avoids()
+            .add_style(self.brand.style)
+            .add_variable(f"""Escribe un post de LinkedIn en {self.language} con 5-8 párrafos que trate sobre esta idea específica:
+'{self.idea}'""")
+            .add_instructions(self.prompt_expansion)
+            .build()
         )
-        
+
+    def process_response(self, content: str):
+        """Clean, log and save the generated LinkedIn post."""
         # Extract the post content
-        post = response.content.strip()
+        post = content.strip()
         
         # Log the result
         Logger.log("Post de LinkedIn generado", post)
@@ -0,0 +1,115 @@
+"""Structured list output for Social-GPT: JSON schemas, parsing and top-up requests for list generators."""
+import json
+import re
+from typing import Awaitable, Callable, Dict, List
+
+from logger import Logger
+
+
+# Bullets and numbering models put in front of list items: "- ", "* ", "• ", "1. ", "2) "
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+
+def list_response_format(name: str, key: str) -> Dict:
+    """JSON schema for an object holding a list of strings under `key`."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    key: {"type": "array", "items": {"type": "string"}}
+                },
+                "required": [key],
+                "additionalProperties": False
+            }
+        }
+    }
+
+
+def clean_items(items) -> List[str]:
+    """Strip list markers, quotes and blanks, and drop duplicates keeping the first occurrence."""
+    cleaned = []
+    seen = set()
+    for item in items:
+        text = LIST_MARKER.sub("", str(item)).strip().strip('"').strip()
+        if not text or text.lower() in seen:
+            continue
+        seen.add(text.lower())
+        cleaned.append(text)
+    return cleaned
+
+
+def parse_list_response(content: str, key: str) -> List[str]:
+    """
+    Read the list under `key` from a JSON response. Responses that are not valid
+    JSON (e.g. from a model in plain-text mode) fall back to reading bulleted or
+    numbered lines, skipping preambles such as "Aquí tienes los temas:". JSON
+    that was cut short yields no items.
+    """
+    try:
+        data = json.loads(content)
+        items = data.get(key) if isinstance(data, dict) else data
+        if isinstance(items, list):
+            return clean_items(items)
+        Logger.log("Respuesta JSON sin la lista esperada", content)
+        return []
+    except json.JSONDecodeError:
+        if content.lstrip().startswith(("{", "[")):
+            # Cut short (e.g. max_tokens): nothing in it can be trusted, the top-up asks again
+            Logger.log("Respuesta JSON incompleta", content)
+            return []
+
+    Logger.log("Respuesta sin JSON, leyendo la lista como texto", content)
+    lines = [line for line in content.strip().split("\n") if line.strip()]
+    marked = [line for line in lines if LIST_MARKER.match(line)]
+    if marked:
+        return clean_items(marked)
+    return clean_items(line for line in lines if not line.strip().endswith(":"))
+
+
+def merge_items(items: List[str], new_items: List[str]) -> List[str]:
+    return clean_items(list(items) + list(new_items))
+
+
+def top_up_messages(messages: List[Dict], items: List[str], missing: int, key: str, label: str) -> List[Dict]:
+    """
+    Follow-up conversation asking only for the missing items. The original
+    messages are kept as they are so the request shares their prompt prefix.
+    """
+    return messages + [
+        {"role": "assistant", "content": json.dumps({key: items}, ensure_ascii=False)},
+        {"role": "user", "content": f"""Faltan {missing} {label}. Genera exactamente {missing} {label} nuevos, distintos de los anteriores y siguiendo las mismas indicaciones.
+Devuelve un objeto JSON con la clave "{key}" que contenga solo los nuevos."""}
+    ]
+
+
+def top_up_list(items: List[str], count: int, messages: List[Dict], key: str, label: str,
+                request: Callable[[List[Dict]], str], max_requests: int = 2) -> List[str]:
+    """
+    Request the missing items until there are `count` of them or `max_requests`
+    follow-ups were made. `request(messages)` returns the completion content.
+    """
+    for _ in range(max_requests):
+        if len(items) >= count:
+            break
+        missing = count - len(items)
+        Logger.log("Completando lista", f"Faltan {missing} {label}")
+        content = request(top_up_messages(messages, items, missing, key, label))
+        items = merge_items(items, parse_list_response(content, key))
+    return items[:count]
+
+
+async def atop_up_list(items: List[str], count: int, messages: List[Dict], key: str, label: str,
+                       request: Callable[[List[Dict]], Awaitable[str]], max_requests: int = 2) -> List[str]:
+    """Async variant of top_up_list."""
+    for _ in range(max_requests):
+        if len(items) >= count:
+            break
+        missing = count - len(items)
+        Logger.log("Completando lista", f"Faltan {missing} {label}")
+        content = await request(top_up_messages(messages, items, missing, key, label))
+        items = merge_items(items, parse_list_response(content, key))
+    return items[:count]
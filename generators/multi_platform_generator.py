@@ -0,0 +1,159 @@
+"""Multi-platform Generator for Social-GPT: every platform variant of an idea in one completion."""
+import json
+
+from utils import add_item_to_file
+from prompts import PromptBuilder
+from brands import Brand
+from files import Files
+from logger import Logger
+from llm import LLM, GenerationMode, GenerationItemType
+
+
+# Per-platform output key, requirements, results file and log title
+PLATFORMS = {
+    "Twitter": {
+        "key": "twitter",
+        "rules": """Un tweet que:
+1. Sea conciso y efectivo (máximo 280 caracteres)
+2. Incluya un mensaje claro y un llamado a la acción cuando sea apropiado
+3. Sea atractivo y relevante para la audiencia objetivo
+4. Represente fielmente la voz de la marca""",
+        "file": Files.twitter_results,
+        "log_title": "Tweet generado",
+    },
+    "Facebook": {
+        "key": "facebook",
+        "rules": """Un post de Facebook con 3-6 párrafos que:
+1. Tenga una introducción atractiva que capte la atención
+2. Desarrolle la idea principal con información relevante
+3. Incluya un llamado a la acción claro al final
+4. Use un tono y estilo coherente con la identidad de la marca
+5. Esté optimizado para generar engagement (comentarios, compartidos, etc.)""",
+        "file": Files.facebook_results,
+        "log_title": "Post de Facebook generado",
+    },
+    "Instagram": {
+        "key": "instagram",
+        "rules": """Un post de Instagram que:
+1. Tenga un inicio cautivador que atrape la atención al deslizar
+2. Incluya texto descriptivo que complemente una imagen visual (aunque no describes la imagen)
+3. Utilice emojis de manera estratégica para aumentar el engagement
+4. Incorpore hashtags relevantes que amplíen el alcance
+5. Termine con una pregunta o llamado a la acción para fomentar la interacción""",
+        "file": Files.instagram_results,
+        "log_title": "Post de Instagram generado",
+    },
+    "LinkedIn": {
+        "key": "linkedin",
+        "rules": """Un post de LinkedIn con 5-8 párrafos que:
+1. Comience con un párrafo inicial potente que capte la atención profesional
+2. Desarrolle el contenido con información valiosa y perspectivas relevantes
+3. Incluya datos o ejemplos que refuercen el mensaje principal cuando sea posible
+4. Mantenga un tono profesional y experto apropiado para LinkedIn
+5. Finalice con un llamado a la acción claro para generar interacción""",
+        "file": Files.linkedin_results,
+        "log_title": "Post de LinkedIn generado",
+    },
+}
+
+
+class MultiPlatformGenerator:
+    def __init__(self, brand: Brand, language: str, idea: str, prompt_expansion: str,
+                 generation_mode: GenerationMode, platforms: list):
+        self.brand = brand
+        self.language = language
+        self.idea = idea
+        self.prompt_expansion = prompt_expansion
+        self.generation_mode = generation_mode
+        self.platforms = [platform for platform in platforms if platform in PLATFORMS]
+
+    def generate_posts(self):
+        """
+        Generate the posts for every selected platform in a single structured completion.
+
+        Returns:
+            dict: Platform name -> generated post. Platforms the model left out are omitted.
+        """
+        response = LLM.generate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode,
+            response_format=self.response_format()
+        )
+        return self.process_response(response.content)
+
+    async def agenerate_posts(self):
+        """Async variant of generate_posts."""
+        response = await LLM.agenerate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode,
+            response_format=self.response_format()
+        )
+        return self.process_response(response.content)
+
+    def response_format(self):
+        """JSON schema with one required string property per platform."""
+        properties = {PLATFORMS[platform]["key"]: {"type": "string"} for platform in self.platforms}
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "social_posts",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": list(properties.keys()),
+                    "additionalProperties": False
+                }
+            }
+        }
+
+    def build_messages(self):
+        """Build the system and user messages requesting every platform variant."""
+        # One section per platform with its own requirements
+        sections = "\n\n".join(
+            f'- "{PLATFORMS[platform]["key"]}": {PLATFORMS[platform]["rules"]}'
+            for platform in self.platforms
+        )
+        keys = ", ".join(f'"{PLATFORMS[platform]["key"]}"' for platform in self.platforms)
+
+        # Static content first (shared by every idea of the campaign), then the idea
+        return (
+            PromptBuilder("""Eres un experto en crear contenido efectivo para redes sociales que genera engagement y conversiones en cada plataforma.
+Vas a crear contenido para la siguiente marca:""")
+            .add_brand(self.brand)
+            .add_static("""IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico,
+cada post DEBE enfocarse directamente en promocionar ese producto/servicio y sus beneficios principales.""")
+            .add_static(f"""Devuelve un objeto JSON con las claves {keys}, cada una con el texto final del post:
+
+{sections}""")
+            .add_avoids()
+            .add_style(self.brand.style)
+            .add_variable(f"""Escribe en {self.language} una versión del contenido para cada plataforma sobre esta idea específica:
+'{self.idea}'""")
+            .add_instructions(self.prompt_expansion)
+            .build()
+        )
+
+    def process_response(self, content: str):
+        """Split the JSON response into per-platform posts, logging and saving each one."""
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            Logger.log("Respuesta multiplataforma no válida", content)
+            return {}
+
+        posts = {}
+        for platform in self.platforms:
+            spec = PLATFORMS[platform]
+            post = data.get(spec["key"]) if isinstance(data, dict) else None
+            if not isinstance(post, str) or not post.strip():
+                continue
+
+            post = post.strip()
+            Logger.log(spec["log_title"], post)
+            add_item_to_file(spec["file"], post)
+            posts[platform] = post
+
+        return posts
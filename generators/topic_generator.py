@@ -1,13 +1,17 @@
 """Topic Generator for Social-GPT using modern OpenAI API."""
 from utils import format_list, write_to_file
 from brands import Brand
-from prompts import Prompts
+from prompts import PromptBuilder
 from llm import LLM, GenerationMode, GenerationItemType
 from logger import Logger
 from files import Files
+from generators.list_output import list_response_format, parse_list_response, top_up_list, atop_up_list
 
 
 class TopicGenerator:
+    # Follow-up requests made when the response has fewer topics than requested
+    max_top_up_requests = 2
+
     def __init__(self, brand: Brand, topic_count: int, prompt_expansion: str, generation_mode: GenerationMode):
         self.brand = brand
         self.prompt_expansion = prompt_expansion
@@ -21,51 +25,76 @@ class TopicGenerator:
         Returns:
             List of generated topics
         """
-        # Build the system prompt with brand description
-        system_prompt = {
-            "role": "system",
-            "content": f"""Eres un experto en marketing digital y contenido para redes sociales especializado en la marca siguiente:
-{self.brand.description}
+        messages = self.build_messages()
+        return self.complete_response(messages, self.request(messages))
 
-Tu tarea es identificar y generar temas específicos y relevantes para campañas de redes sociales basados en las instrucciones del usuario.
-Si las instrucciones del usuario mencionan promocionar un producto o servicio específico, SIEMPRE asegúrate de que los temas estén directamente relacionados con ese producto o servicio.
-"""
-        }
-        
-        # Build the user prompt with topic count and any additional instructions
-        prompt = f"""Genera {self.topic_count} temas específicos para posts de redes sociales en el formato:
-- [Tema 1]
-- [Tema 2]
-- etc.
+    async def agenerate_topics(self):
+        """Async variant of generate_topics."""
+        messages = self.build_messages()
+        return await self.acomplete_response(messages, await self.arequest(messages))
+
+    def request(self, messages):
+        """Request a topic list and return the raw content."""
+        return LLM.generate(
+            messages, GenerationItemType.TOPICS, self.generation_mode, response_format=self.response_format()
+        ).content
+
+    async def arequest(self, messages):
+        return (await LLM.agenerate(
+            messages, GenerationItemType.TOPICS, self.generation_mode, response_format=self.response_format()
+        )).content
+
+    def response_format(self):
+        """JSON schema for {"topics": [...]}."""
+        return list_response_format("topics", "topics")
+
+    def complete_response(self, messages, content: str):
+        """Parse a response, request only the missing topics if it came up short, then save them."""
+        topics = top_up_list(
+            self.parse_response(content), self.topic_count, messages, "topics", "temas",
+            self.request, self.max_top_up_requests
+        )
+        return self.save_topics(topics)
+
+    async def acomplete_response(self, messages, content: str):
+        """Async variant of complete_response."""
+        topics = await atop_up_list(
+            self.parse_response(content), self.topic_count, messages, "topics", "temas",
+            self.arequest, self.max_top_up_requests
+        )
+        return self.save_topics(topics)
+
+    def build_messages(self):
+        """Build the system and user messages for topic generation."""
+        # Static content first, then the campaign-specific instructions
+        return (
+            PromptBuilder("""Eres un experto en marketing digital y contenido para redes sociales especializado en la marca siguiente:""")
+            .add_brand(self.brand)
+            .add_static("""Tu tarea es identificar y generar temas específicos y relevantes para campañas de redes sociales basados en las instrucciones del usuario.
+Si las instrucciones del usuario mencionan promocionar un producto o servicio específico, SIEMPRE asegúrate de que los temas estén directamente relacionados con ese producto o servicio.""")
+            .add_static("""Devuelve un objeto JSON con la clave "topics": una lista con el texto de cada tema, sin numeración.
 
 Los temas deben:
 1. Ser específicos, atractivos y directamente relevantes para la marca
 2. Estar orientados a la acción o beneficio cuando sea apropiado
 3. Ser claros, concisos y enfocados (5-10 palabras cada uno)
-4. Evitar ser demasiado genéricos{Prompts.get_avoids()}"""
-
-        if self.prompt_expansion:
-            prompt = prompt + f"\n\nInstrucciones adicionales (MUY IMPORTANTES, DEBEN SER PRIORIZADAS): {self.prompt_expansion}"
-            
-        user_prompt = {
-            "role": "user",
-            "content": prompt
-        }
-        
-        # Generate topics using the LLM
-        response = LLM.generate(
-            [system_prompt, user_prompt],
-            GenerationItemType.TOPICS,
-            self.generation_mode
+4. Evitar ser demasiado genéricos""")
+            .add_avoids()
+            .add_variable(f"Genera {self.topic_count} temas específicos para posts de redes sociales.")
+            .add_instructions(self.prompt_expansion, "Instrucciones adicionales (MUY IMPORTANTES, DEBEN SER PRIORIZADAS)")
+            .build()
         )
-        
-        # Process the response to extract the topics
-        topics = [
-            i.replace("- ", "")
-            for i in response.content.strip().split("\n")
-            if len(i) > 2
-        ][: self.topic_count]
-        
+
+    def parse_response(self, content: str):
+        """Extract the topics from the model response."""
+        return parse_list_response(content, "topics")[: self.topic_count]
+
+    def process_response(self, content: str):
+        """Extract, log and save the topics from the model response."""
+        return self.save_topics(self.parse_response(content))
+
+    def save_topics(self, topics):
+        """Log the topics and append them to the topics results file."""
         # Log the results
         print('\n---------')
         Logger.log("Temas generados", format_list(topics))
@@ -1,6 +1,6 @@
 """Tweet Generator for Social-GPT using modern OpenAI API."""
 from utils import add_item_to_file
-from prompts import Prompts
+from prompts import PromptBuilder
 from brands import Brand
 from files import Files
 from logger import Logger
@@ -22,45 +22,60 @@ class TweetGenerator:
         Returns:
             str: The generated tweet content
         """
-        # Build the system prompt with brand description
-        system_prompt = {
-            "role": "system",
-            "content": f"""Eres un experto en crear tweets efectivos y atractivos para marcas. 
-Vas a crear contenido para la siguiente marca:
-{self.brand.description}
+        response = LLM.generate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
-tu tweet DEBE enfocarse directamente en promocionar ese producto/servicio y sus beneficios principales.
-"""
-        }
-        
-        # Build the user prompt with language, idea, and brand style
-        prompt = f"""Escribe un tweet en {self.language} para la cuenta que trata sobre esta idea específica:
-'{self.idea}'
+    async def agenerate_tweet(self):
+        """Async variant of generate_tweet."""
+        response = await LLM.agenerate(
+            self.build_messages(),
+            GenerationItemType.POST,
+            self.generation_mode
+        )
+        return self.process_response(response.content)
 
-El tweet debe:
+    def stream_tweet(self):
+        """
+        Stream the tweet as it is generated, yielding content deltas.
+        The complete tweet is cleaned, logged and saved when the stream ends
+        and is returned as the generator's return value.
+        """
+        chunks = []
+        for delta in LLM.stream(self.build_messages(), GenerationItemType.POST, self.generation_mode):
+            chunks.append(delta)
+            yield delta
+        return self.process_response("".join(chunks))
+
+    def build_messages(self):
+        """Build the system and user messages for the tweet."""
+        # Static content first (shared by every post of the campaign), then the idea
+        return (
+            PromptBuilder("""Eres un experto en crear tweets efectivos y atractivos para marcas. 
+Vas a crear contenido para la siguiente marca:""")
+            .add_brand(self.brand)
+            .add_static("""IMPORTANTE: Si la idea o las instrucciones del usuario mencionan promocionar un producto o servicio específico, 
+tu tweet DEBE enfocarse directamente en promocionar ese producto/servicio y sus beneficios principales.""")
+            .add_static("""El tweet debe:
 1. Ser conciso y efectivo (máximo 280 caracteres)
 2. Incluir un mensaje claro y un llamado a la acción cuando sea apropiado
 3. Ser atractivo y relevante para la audiencia objetivo
-4. Representar fielmente la voz de la marca{Prompts.get_avoids()}{Prompts.build_style_prompt(self.brand.style)}"""
-
-        if self.prompt_expansion:
-            prompt = prompt + f"\n\nInstrucciones adicionales (MUY IMPORTANTES): {self.prompt_expansion}"
-        
-        user_prompt = {
-            "role": "user",
-            "content": prompt
-        }
-        
-        # Generate tweet using the LLM
-        response = LLM.generate(
-            [system_prompt, user_prompt],
-            GenerationItemType.POST,
-            self.generation_mode
+4. Representar fielmente la voz de la marca""")
+            .add_avoids()
+            .add_style(self.brand.style)
+            .add_variable(f"""Escribe un tweet en {self.language} para la cuenta que trata sobre esta idea específica:
+'{self.idea}'""")
+            .add_instructions(self.prompt_expansion)
+            .build()
         )
-        
+
+    def process_response(self, content: str):
+        """Clean, log and save the generated tweet."""
         # Extract the tweet content
-        tweet = response.content.strip()
+        tweet = content.strip()
         
         # Log the result
         Logger.log("Tweet generado", tweet)
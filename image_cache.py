@@ -0,0 +1,196 @@
+"""
+Persistent cache for generated images.
+Entries map a hash of (final prompt, size, quality, model) to an image file kept
+under cache/images, indexed by a SQLite manifest with a disk quota and LRU
+eviction. A regenerated campaign with the same image prompts skips DALL-E.
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from files import Files
+from image_store import ImageStore
+
+
+class ImageCache:
+    """
+    On-disk LRU cache of generated images.
+
+    Cached files live in their own ImageStore (hard links to the generated
+    image when possible), so evicting an entry never removes an image that a
+    campaign saved under results/images.
+    """
+
+    _instance = None
+    _enabled = False
+    _active_lock = threading.Lock()
+
+    # Whether calls made in the current context use the cache; None means the process-wide setting
+    _scoped = contextvars.ContextVar("image_cache_enabled", default=None)
+
+    def __init__(self, path: str = Files.image_cache_manifest, root: str = Files.image_cache_dir,
+                 max_bytes: int = 1024 * 1024 * 1024, max_entries: int = 5000):
+        self.path = path
+        self.store = ImageStore(root)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                latency REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS images_last_access ON images (last_access)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def enable(**cache_options) -> "ImageCache":
+        """Turn on the process-wide image cache (rebuilt when options are given)."""
+        with ImageCache._active_lock:
+            if ImageCache._instance is None or cache_options:
+                ImageCache._instance = ImageCache(**cache_options)
+            ImageCache._enabled = True
+            return ImageCache._instance
+
+    @staticmethod
+    def disable():
+        """Stop using the image cache. Stored images are kept on disk."""
+        with ImageCache._active_lock:
+            ImageCache._enabled = False
+
+    @staticmethod
+    @contextlib.contextmanager
+    def scope(enabled: bool):
+        """Turn the cache on or off for the calls made inside the block only."""
+        token = ImageCache._scoped.set(enabled)
+        try:
+            yield
+        finally:
+            ImageCache._scoped.reset(token)
+
+    @staticmethod
+    def instance(create: bool = True) -> Optional["ImageCache"]:
+        """The cache shared by the process, whether or not it is turned on."""
+        with ImageCache._active_lock:
+            if ImageCache._instance is None and create:
+                ImageCache._instance = ImageCache()
+            return ImageCache._instance
+
+    @staticmethod
+    def active() -> Optional["ImageCache"]:
+        """The cache to use for a call made in the current context, or None when it is off."""
+        enabled = ImageCache._scoped.get()
+        if enabled is None:
+            enabled = ImageCache._enabled
+        return ImageCache.instance() if enabled else None
+
+    @staticmethod
+    def make_key(prompt: str, size: str, quality: str, model: str) -> str:
+        payload = json.dumps(
+            {"prompt": prompt, "size": size, "quality": quality, "model": model},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached image path for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT path, latency FROM images WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or not os.path.exists(row[0]):
+                if row is not None:
+                    # The file was removed behind our back
+                    self._connection.execute("DELETE FROM images WHERE key = ?", (key,))
+                    self._connection.commit()
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE images SET last_access = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return row[0]
+
+    def put(self, key: str, image_path: str, prompt: str, model: str, latency: float = 0.0) -> str:
+        """Add a generated image to the cache and evict beyond the quota. Returns the cached path."""
+        cached_path = self.store.add_file(image_path)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO images (key, path, size, model, prompt, latency, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, cached_path, os.path.getsize(cached_path), model, prompt, latency, now, now)
+            )
+            self._evict()
+            self._connection.commit()
+        return cached_path
+
+    def _evict(self):
+        # Identical images share one file, so count each path once
+        count, total = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT DISTINCT path, size FROM images)"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT path, size FROM images GROUP BY path ORDER BY MAX(last_access) ASC"
+        ).fetchall()
+        for path, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM images WHERE path = ?", (path,))
+            if os.path.exists(path):
+                os.remove(path)
+            count -= 1
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            for (path,) in self._connection.execute("SELECT DISTINCT path FROM images").fetchall():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._connection.execute("DELETE FROM images")
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the generation time saved by cache hits."""
+        with self._lock:
+            count, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT DISTINCT path, size FROM images)"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "files": count,
+            "bytes": total,
+            "saved_seconds": self.saved_seconds,
+        }
@@ -0,0 +1,106 @@
+"""
+Thumbnail and preview derivatives of generated images.
+Each image gets a small thumbnail and a mid-size preview, compressed as WebP
+(JPEG when Pillow lacks WebP support), created once in a background thread when
+the image is saved and stored next to the original. The Streamlit image tab
+shows these instead of pushing full-resolution PNGs on every rerun.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+from PIL import Image, features
+
+from logger import Logger
+
+
+# Longest side in pixels of each derivative
+DERIVATIVE_SIZES = {
+    "thumb": 256,
+    "preview": 768,
+}
+
+
+class ImageDerivatives:
+    """
+    Creates and locates the derivatives of an image: for results/images/ab/abc.png
+    they are results/images/ab/abc.thumb.webp and results/images/ab/abc.preview.webp.
+    """
+
+    quality = 80
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, sizes: Dict[str, int] = None, max_workers: int = 2):
+        self.sizes = dict(sizes or DERIVATIVE_SIZES)
+        if features.check("webp"):
+            self.format, self.extension = "WEBP", ".webp"
+        else:
+            self.format, self.extension = "JPEG", ".jpg"
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-derivatives")
+
+    @staticmethod
+    def shared() -> "ImageDerivatives":
+        with ImageDerivatives._shared_lock:
+            if ImageDerivatives._shared is None:
+                ImageDerivatives._shared = ImageDerivatives()
+            return ImageDerivatives._shared
+
+    def path_for(self, image_path: str, kind: str) -> str:
+        return f"{os.path.splitext(image_path)[0]}.{kind}{self.extension}"
+
+    def schedule(self, image_path: str) -> Future:
+        """Create the missing derivatives of an image in the background."""
+        return self.executor.submit(self._create_logged, image_path)
+
+    def _create_logged(self, image_path: str) -> Dict[str, str]:
+        try:
+            return self.create(image_path)
+        except Exception as e:
+            Logger.log("Error creating image previews", f"{image_path}: {e}")
+            raise
+
+    def create(self, image_path: str) -> Dict[str, str]:
+        """Create the missing derivatives of an image now. Returns {kind: path}."""
+        paths = {kind: self.path_for(image_path, kind) for kind in self.sizes}
+        missing = [kind for kind, path in paths.items() if not os.path.exists(path)]
+        if not missing:
+            return paths
+
+        with Image.open(image_path) as original:
+            image = original.convert("RGBA" if self.format == "WEBP" else "RGB")
+        # Largest first, so each smaller derivative is resized from the previous one
+        for kind in sorted(missing, key=lambda kind: self.sizes[kind], reverse=True):
+            image.thumbnail((self.sizes[kind], self.sizes[kind]), Image.LANCZOS)
+            self._save(image, paths[kind])
+        return paths
+
+    def _save(self, image: Image.Image, path: str):
+        # Write under a temporary name so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=self.extension + ".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=self.format, quality=self.quality)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, image_path: str, kind: str) -> str:
+        """
+        Path of a derivative, created on the spot if the background job has not
+        finished. Falls back to the original image if it cannot be decoded.
+        """
+        path = self.path_for(image_path, kind)
+        if os.path.exists(path):
+            return path
+        try:
+            return self.create(image_path)[kind]
+        except Exception as e:
+            Logger.log("Error creating image previews", f"{image_path}: {e}")
+            return image_path
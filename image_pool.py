@@ -0,0 +1,99 @@
+"""
+Image worker pool for Social-GPT.
+Image generation is pipelined in two stages: generation workers call the
+images API (bounded by the dall-e-3 rate limit), then hand the result to save
+workers that decode or download the file to disk. Callers get a Future for the
+saved path.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from llm import GenerationMode
+from image_store import ImageStore
+from logger import Logger
+from generators.image_generator import (
+    DEFAULT_IMAGE_TRANSPORT, request_image, save_image,
+    image_cache_key, find_cached_image, cache_image
+)
+
+
+class ImageWorkerPool:
+    """
+    Accepts image jobs and returns futures resolving to the saved image path.
+    A generation slot is released as soon as the API returns the image, so
+    saving finished images overlaps with the next generation calls.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_generation_workers: int = 4, max_download_workers: int = 4,
+                 store: ImageStore = None):
+        self.store = store or ImageStore.shared()
+        self.generation_pool = ThreadPoolExecutor(
+            max_workers=max_generation_workers, thread_name_prefix="image-generate"
+        )
+        self.download_pool = ThreadPoolExecutor(
+            max_workers=max_download_workers, thread_name_prefix="image-download"
+        )
+
+    @staticmethod
+    def shared() -> "ImageWorkerPool":
+        """Process-wide pool used by the generation pipeline."""
+        with ImageWorkerPool._shared_lock:
+            if ImageWorkerPool._shared is None:
+                ImageWorkerPool._shared = ImageWorkerPool()
+            return ImageWorkerPool._shared
+
+    def submit(self, prompt: str, generation_mode: GenerationMode = GenerationMode.MEDIUM,
+               size: str = "1024x1024", quality: str = "standard",
+               transport: str = DEFAULT_IMAGE_TRANSPORT) -> Future:
+        """
+        Queue an image job. The returned future resolves to the saved file path;
+        it is already resolved when the image cache holds an identical request.
+        """
+        result = Future()
+        result.set_running_or_notify_cancel()
+
+        cache_key = image_cache_key(prompt, generation_mode, size, quality)
+        cached_path = find_cached_image(cache_key, self.store)
+        if cached_path is not None:
+            Logger.log("Cached Image", f"Filename: {os.path.basename(cached_path)}\nPrompt: {prompt}")
+            result.set_result(cached_path)
+            return result
+        started = time.monotonic()
+
+        def on_generated(generation: Future):
+            error = generation.exception()
+            if error is not None:
+                Logger.log("Error generating image", str(error))
+                result.set_exception(error)
+                return
+            self.download_pool.submit(save, generation.result())
+
+        def save(image):
+            try:
+                filepath = save_image(image, self.store)
+                cache_image(cache_key, filepath, prompt, time.monotonic() - started)
+            except Exception as e:
+                Logger.log("Error generating image", str(e))
+                result.set_exception(e)
+                return
+            Logger.log("Generated Image", f"Filename: {os.path.basename(filepath)}\nPrompt: {prompt}")
+            result.set_result(filepath)
+
+        # Run in the caller's context so the call keeps its metrics labels (run, brand, stage)
+        context = contextvars.copy_context()
+        generation = self.generation_pool.submit(
+            context.run, request_image, prompt, generation_mode, size, quality, transport
+        )
+        generation.add_done_callback(on_generated)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        self.generation_pool.shutdown(wait=wait)
+        self.download_pool.shutdown(wait=wait)
@@ -0,0 +1,99 @@
+"""
+Image storage for Social-GPT.
+Generated images are stored under a name derived from their content, sharded
+into subdirectories, and written through a temporary file that is renamed into
+place, so concurrent writers never collide and saving an image costs the same
+whether the folder holds ten files or ten thousand.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Iterable
+
+from files import Files
+
+
+class ImageStore:
+    """
+    Content-addressed image files: <root>/<first hash chars>/<sha256>.png.
+    Saving the same bytes twice yields the same path and a single file.
+    """
+
+    # Hex characters of the hash used as the shard directory (256 shards)
+    shard_chars = 2
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root: str = Files.images_dir, extension: str = ".png"):
+        self.root = root
+        self.extension = extension
+        self.tmp_dir = os.path.join(root, ".tmp")
+
+    @staticmethod
+    def shared() -> "ImageStore":
+        """Process-wide store rooted at Files.images_dir."""
+        with ImageStore._shared_lock:
+            if ImageStore._shared is None:
+                ImageStore._shared = ImageStore()
+            return ImageStore._shared
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:self.shard_chars], digest + self.extension)
+
+    def write(self, chunks: Iterable[bytes]) -> str:
+        """
+        Write the chunks to a temporary file while hashing them, then rename it
+        to its content-addressed path. Returns that path. A failure part way
+        leaves no partial image behind.
+        """
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=self.extension + ".part")
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            path = self.path_for(digest.hexdigest())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Atomic on the same filesystem; identical content replaces itself
+            os.replace(tmp_path, path)
+            return path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def write_bytes(self, data: bytes) -> str:
+        return self.write([data])
+
+    def add_file(self, source_path: str) -> str:
+        """
+        Add an image that already lives in another ImageStore. Its name is its
+        hash, so the file is hard-linked (or copied across filesystems) without
+        reading it again.
+        """
+        digest = os.path.splitext(os.path.basename(source_path))[0]
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix=self.extension + ".part")
+        os.close(fd)
+        try:
+            os.remove(tmp_path)
+            try:
+                os.link(source_path, tmp_path)
+            except OSError:
+                shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
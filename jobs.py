@@ -0,0 +1,200 @@
+"""
+Background generation jobs for Social-GPT.
+Campaigns run in a process-wide worker pool instead of the Streamlit script
+thread, so closing the tab or a dropped websocket does not stop a run and a
+long campaign does not block other sessions. The UI polls job snapshots.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from logger import Logger
+from pipeline import ContentPipeline, PipelineTask
+
+
+class GenerationJob:
+    """
+    One ContentPipeline run in the background. Progress, errors, streamed post
+    text and a copy of the content are updated from the job's thread and read
+    from any other thread through the accessors below.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, pipeline: ContentPipeline, label: str = "", owner: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.pipeline = pipeline
+        self.label = label or pipeline.brand.title
+        # Token of the session that started the job; only that session can see it
+        self.owner = owner
+        self.status = GenerationJob.QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.completed = 0
+        self.total = pipeline.settings.estimated_total()
+        self.last_step = ""
+        self.errors = []
+        self.failure = None
+        self.future = None
+        # Text of the posts being streamed, keyed by (stage, label); removed once complete
+        self._streamed = OrderedDict()
+        self._content = GenerationJob.copy_content(pipeline.content)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def copy_content(content: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a content dictionary that the pipeline can keep filling safely."""
+        return {
+            "topics": list(content["topics"]),
+            "ideas": list(content["ideas"]),
+            "posts": {platform: list(posts) for platform, posts in content["posts"].items()},
+            "images": list(content["images"]),
+        }
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """Checkpoint journal of the run, if any."""
+        return self.pipeline.checkpoint.run_id if self.pipeline.checkpoint is not None else None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (GenerationJob.DONE, GenerationJob.FAILED, GenerationJob.CANCELLED)
+
+    @property
+    def progress(self) -> float:
+        if self.status == GenerationJob.DONE:
+            return 1.0
+        return min(self.completed / self.total, 1.0) if self.total else 0.0
+
+    def run(self):
+        """Run the pipeline; called in a JobManager worker thread."""
+        with self._lock:
+            if self.status == GenerationJob.CANCELLED:
+                return
+            self.status = GenerationJob.RUNNING
+            self.started = time.time()
+        on_event = self._on_event if self.pipeline.settings.stream_posts else None
+        try:
+            self.pipeline.run(self._on_complete, self._on_error, on_event)
+            status = GenerationJob.DONE
+        except Exception as e:
+            Logger.log("Error en la generación", f"{self.label}: {e}")
+            status = GenerationJob.FAILED
+            self.failure = str(e)
+        with self._lock:
+            self._content = GenerationJob.copy_content(self.pipeline.content)
+            self._streamed.clear()
+            self.status = status
+            self.finished = time.time()
+
+    def _on_complete(self, task: PipelineTask, result: Any):
+        with self._lock:
+            if task.stage == "topics":
+                self.total = self.pipeline.settings.estimated_total(len(result))
+            self.completed += 1
+            self.last_step = f"{task.stage} - {task.label}"
+            self._streamed.pop((task.stage, task.label), None)
+            self._content = GenerationJob.copy_content(self.pipeline.content)
+
+    def _on_error(self, task: PipelineTask, error: Exception):
+        with self._lock:
+            self.completed += 1
+            self.errors.append((task.stage, task.label, str(error)))
+            self._streamed.pop((task.stage, task.label), None)
+
+    def _on_event(self, task: PipelineTask, delta: str):
+        with self._lock:
+            key = (task.stage, task.label)
+            self._streamed[key] = self._streamed.get(key, "") + delta
+
+    def content(self) -> Dict[str, Any]:
+        """The results generated so far (sorted once the job is finished)."""
+        with self._lock:
+            return GenerationJob.copy_content(self._content)
+
+    def streamed(self) -> List[tuple]:
+        """(stage, label, text) of the posts currently being streamed."""
+        with self._lock:
+            return [(stage, label, text) for (stage, label), text in self._streamed.items()]
+
+    def cancel(self) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._lock:
+            if self.status != GenerationJob.QUEUED:
+                return False
+            self.status = GenerationJob.CANCELLED
+            self.finished = time.time()
+        if self.future is not None:
+            self.future.cancel()
+        return True
+
+
+class JobManager:
+    """
+    Process-wide queue of generation jobs. Jobs run in a bounded worker pool;
+    each job still uses its pipeline's own concurrency cap, and all of them
+    share the OpenAI rate limiter. Finished jobs are kept for a while so a
+    reconnecting session can pick up the results. Jobs carry the token of the
+    session that started them, so sessions only see their own jobs.
+    """
+
+    # Finished jobs kept in memory before the oldest are dropped
+    max_finished_jobs = 20
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = 2):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="generation-job")
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> "JobManager":
+        """Job manager shared by every session of the app."""
+        with JobManager._shared_lock:
+            if JobManager._shared is None:
+                JobManager._shared = JobManager()
+            return JobManager._shared
+
+    def submit(self, pipeline: ContentPipeline, label: str = "", owner: Optional[str] = None) -> GenerationJob:
+        job = GenerationJob(pipeline, label, owner)
+        with self._lock:
+            self._prune()
+            self.jobs[job.id] = job
+        job.future = self.pool.submit(job.run)
+        return job
+
+    def get(self, job_id: Optional[str], owner: Optional[str] = None) -> Optional[GenerationJob]:
+        """The job with this id; with an owner, only if that owner started it."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def list_jobs(self, owner: Optional[str] = None) -> List[GenerationJob]:
+        """Known jobs, newest first; with an owner, only the jobs it started."""
+        with self._lock:
+            jobs = list(reversed(self.jobs.values()))
+        return [job for job in jobs if owner is None or job.owner == owner]
+
+    def active_jobs(self, owner: Optional[str] = None) -> List[GenerationJob]:
+        return [job for job in self.list_jobs(owner) if not job.is_finished]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[:max(len(finished) - JobManager.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)
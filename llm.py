@@ -3,11 +3,24 @@ LLM (Language Model) module for Social-GPT.
 Uses the modern OpenAI Python client directly instead of LangChain.
 """
 
+import contextlib
+import contextvars
 import os
+import threading
+import time
 from enum import Enum
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Union
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from clients import ClientRegistry
+from response_cache import ResponseCache
+from rate_limiter import RateLimitScheduler
+from retry import RetryPolicy, is_rate_limit_error
+from metrics import CallMetrics, SOURCE_CACHE
+
+
+# Models that accept response_format={"type": "json_schema", ...}
+STRUCTURED_OUTPUT_MODELS = {"gpt-4o", "gpt-4o-mini"}
 
 
 class GenerationItemType(Enum):
@@ -54,18 +67,139 @@ class GenerationMode(Enum):
             return GenerationMode.HIGH
 
 
+class TokenUsage:
+    """Token counts of one completion, including the prompt tokens served from OpenAI's prompt cache."""
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cached_tokens = cached_tokens
+
+    @staticmethod
+    def from_usage(usage) -> Optional["TokenUsage"]:
+        """Read the usage object of a completion (None when the API sent none)."""
+        if usage is None:
+            return None
+        details = getattr(usage, "prompt_tokens_details", None)
+        return TokenUsage(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+        )
+
+    @staticmethod
+    def from_dict(usage: Optional[Dict[str, Any]]) -> Optional["TokenUsage"]:
+        """Read the usage of a completion given as JSON, e.g. in a Batch API output line."""
+        if not usage:
+            return None
+        details = usage.get("prompt_tokens_details") or {}
+        return TokenUsage(
+            prompt_tokens=usage.get("prompt_tokens") or 0,
+            completion_tokens=usage.get("completion_tokens") or 0,
+            cached_tokens=details.get("cached_tokens") or 0,
+        )
+
+
 class LLM:
     """
     LLM service manager that handles model selection and content generation.
     Uses different models based on content type and quality settings.
     """
     
+    temperature = 0.7
+
+    # Optional ResponseCache, see LLM.enable_cache
+    response_cache: Optional[ResponseCache] = None
+    _cache_lock = threading.Lock()
+    # Content types cached for the calls made in the current context; None means the process-wide setting
+    _cached_types = contextvars.ContextVar("llm_cached_types", default=None)
+
+    # Per-model RPM/TPM budgeting shared by every completion and image request
+    rate_limiter = RateLimitScheduler()
+
+    # Backoff for every OpenAI call (429, 5xx, timeouts)
+    retry_policy = RetryPolicy()
+    # Per-call latency, token, retry and cost records (completions and images)
+    metrics = CallMetrics()
+
+    @staticmethod
+    def enable_cache(enabled_types=(GenerationItemType.TOPICS, GenerationItemType.IDEAS,
+                                    GenerationItemType.POST, GenerationItemType.IMAGE_PROMPT),
+                     **cache_options) -> ResponseCache:
+        """
+        Turn on the persistent response cache for the given content types.
+        Extra keyword arguments are passed to ResponseCache (path, max_entries, ttl_seconds...).
+        """
+        if LLM.response_cache is None or cache_options:
+            LLM.response_cache = ResponseCache(enabled_types=enabled_types, **cache_options)
+        else:
+            LLM.response_cache.enabled_types = set(enabled_types)
+        return LLM.response_cache
+
+    @staticmethod
+    def disable_cache():
+        """Stop using the response cache. Stored entries are kept on disk."""
+        if LLM.response_cache is not None:
+            LLM.response_cache.enabled_types = set()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def cache_scope(enabled_types):
+        """
+        Use the response cache for exactly these content types in the calls made
+        inside the block, whatever the process-wide setting is.
+        """
+        token = LLM._cached_types.set(frozenset(enabled_types))
+        try:
+            yield
+        finally:
+            LLM._cached_types.reset(token)
+
+    @staticmethod
+    def active_cache(type: GenerationItemType) -> Optional[ResponseCache]:
+        """The response cache to use for a call of this type, or None when caching is off."""
+        scoped = LLM._cached_types.get()
+        if scoped is None:
+            cache = LLM.response_cache
+            return cache if cache is not None and cache.is_enabled_for(type) else None
+        if type not in scoped:
+            return None
+        with LLM._cache_lock:
+            if LLM.response_cache is None:
+                LLM.response_cache = ResponseCache()
+            return LLM.response_cache
+
+    @staticmethod
+    def _cache_key(type: GenerationItemType, request: Dict[str, Any]) -> Optional[str]:
+        """Return the cache key for a request, or None when caching is off for this type."""
+        if LLM.active_cache(type) is None:
+            return None
+        params = {k: v for k, v in request.items() if k not in ("model", "messages")}
+        return ResponseCache.make_key(request["model"], request["messages"], **params)
+
+    @staticmethod
+    def _cache_store(key: Optional[str], type: GenerationItemType, model: str, completion, latency: float):
+        if key is None:
+            return
+        usage = getattr(completion, "usage", None)
+        LLM.response_cache.put(
+            key, type, model, completion.choices[0].message.content, latency,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
     # Initialize OpenAI client
     @staticmethod
-    def get_client():
-        """Get initialized OpenAI client."""
-        api_key = os.environ.get("OPENAI_API_KEY")
-        return OpenAI(api_key=api_key)
+    def get_client() -> OpenAI:
+        """Get the shared, pooled OpenAI client."""
+        return ClientRegistry.get_client(os.environ.get("OPENAI_API_KEY"))
+
+    @staticmethod
+    def get_async_client() -> AsyncOpenAI:
+        """
+        Get the shared AsyncOpenAI client for the running event loop.
+        The client and its HTTP connection pool are reused by every coroutine on that loop.
+        """
+        return ClientRegistry.get_async_client(os.environ.get("OPENAI_API_KEY"))
     
     # Model mapping
     @staticmethod
@@ -125,7 +259,8 @@ class LLM:
         return model
     
     @staticmethod
-    def generate(prompt_messages, type: GenerationItemType, mode: GenerationMode):
+    def generate(prompt_messages, type: GenerationItemType, mode: GenerationMode,
+                 response_format: Optional[Dict[str, Any]] = None):
         """
         Generate content using the appropriate model based on content type and quality mode.
         This is a drop-in replacement for the LangChain ChatOpenAI model.
@@ -134,14 +269,229 @@ class LLM:
             prompt_messages: List of message dictionaries for the conversation
             type: GenerationItemType enum value
             mode: GenerationMode enum value
+            response_format: Optional OpenAI response_format (e.g. a JSON schema)
             
         Returns:
             Message object with generated content
         """
         client = LLM.get_client()
-        model = LLM.get_model_for_type_and_mode(type, mode)
+        request = LLM.build_request(prompt_messages, type, mode, response_format)
+        
+        # Serve identical requests from the response cache when enabled
+        cache_key = LLM._cache_key(type, request)
+        if cache_key is not None:
+            cached = LLM.response_cache.get(cache_key)
+            if cached is not None:
+                LLM.metrics.record_completion(type.name, request["model"], 0.0, source=SOURCE_CACHE)
+                return MessageResponse(cached)
+        
+        # Generate completion
+        started = time.monotonic()
+        completion = LLM._complete(client, request, type)
+        LLM._cache_store(cache_key, type, request["model"], completion, time.monotonic() - started)
+        
+        # Create a response object similar to what LangChain would return
+        return MessageResponse(completion.choices[0].message.content, TokenUsage.from_usage(completion.usage))
+
+    @staticmethod
+    async def agenerate(prompt_messages, type: GenerationItemType, mode: GenerationMode,
+                        response_format: Optional[Dict[str, Any]] = None):
+        """
+        Async variant of generate, built on the shared AsyncOpenAI client.
+        
+        Args:
+            prompt_messages: List of message dictionaries for the conversation
+            type: GenerationItemType enum value
+            mode: GenerationMode enum value
+            response_format: Optional OpenAI response_format (e.g. a JSON schema)
+            
+        Returns:
+            Message object with generated content
+        """
+        client = LLM.get_async_client()
+        request = LLM.build_request(prompt_messages, type, mode, response_format)
+        
+        cache_key = LLM._cache_key(type, request)
+        if cache_key is not None:
+            cached = LLM.response_cache.get(cache_key)
+            if cached is not None:
+                LLM.metrics.record_completion(type.name, request["model"], 0.0, source=SOURCE_CACHE)
+                return MessageResponse(cached)
+        
+        started = time.monotonic()
+        completion = await LLM._acomplete(client, request, type)
+        LLM._cache_store(cache_key, type, request["model"], completion, time.monotonic() - started)
+        
+        return MessageResponse(completion.choices[0].message.content, TokenUsage.from_usage(completion.usage))
+
+    @staticmethod
+    def stream(prompt_messages, type: GenerationItemType, mode: GenerationMode) -> Iterator[str]:
+        """
+        Streaming variant of generate that yields content deltas as the model emits them.
+        Retries only happen before the first delta; cache hits are yielded in one piece.
+        
+        Args:
+            prompt_messages: List of message dictionaries for the conversation
+            type: GenerationItemType enum value
+            mode: GenerationMode enum value
+            
+        Yields:
+            Pieces of the generated content, in order
+        """
+        client = LLM.get_client()
+        request = LLM.build_request(prompt_messages, type, mode)
+        model = request["model"]
+        
+        cache_key = LLM._cache_key(type, request)
+        if cache_key is not None:
+            cached = LLM.response_cache.get(cache_key)
+            if cached is not None:
+                LLM.metrics.record_completion(type.name, model, 0.0, source=SOURCE_CACHE)
+                yield cached
+                return
+        
+        estimated = RateLimitScheduler.estimate_tokens(request)
+        started = time.monotonic()
+        attempts = []
+
+        def open_stream():
+            attempts.append(started)
+            LLM.rate_limiter.acquire(model, estimated)
+            raw = client.chat.completions.with_raw_response.create(
+                **request, stream=True, stream_options={"include_usage": True}
+            )
+            LLM.rate_limiter.update_from_headers(model, raw.headers)
+            return raw.parse()
+
+        chunks = []
+        usage = None
+        try:
+            for chunk in LLM.retry_policy.call(open_stream, LLM._on_retry(model)):
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    chunks.append(delta)
+                    yield delta
+        except Exception as e:
+            LLM.metrics.record_completion(type.name, model, time.monotonic() - started,
+                                          retries=max(len(attempts) - 1, 0), error=e)
+            raise
         
-        # Convert LangChain-style messages to OpenAI API format
+        LLM.rate_limiter.record_usage(model, estimated, getattr(usage, "total_tokens", None))
+        LLM.metrics.record_completion(type.name, model, time.monotonic() - started,
+                                      TokenUsage.from_usage(usage), max(len(attempts) - 1, 0))
+        if cache_key is not None:
+            LLM.response_cache.put(
+                cache_key, type, model, "".join(chunks), time.monotonic() - started,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            )
+
+    @staticmethod
+    def _complete(client: OpenAI, request: Dict[str, Any], type: Optional[GenerationItemType] = None):
+        """
+        Send a chat completion through the rate limiter and the retry policy.
+        A 429 also pauses the model in the rate limiter so queued work waits.
+        The call (retries included) is recorded in LLM.metrics.
+        """
+        model = request["model"]
+        estimated = RateLimitScheduler.estimate_tokens(request)
+        attempts = []
+
+        def attempt():
+            attempts.append(time.monotonic())
+            LLM.rate_limiter.acquire(model, estimated)
+            raw = client.chat.completions.with_raw_response.create(**request)
+            LLM.rate_limiter.update_from_headers(model, raw.headers)
+            completion = raw.parse()
+            LLM.rate_limiter.record_usage(model, estimated, getattr(completion.usage, "total_tokens", None))
+            return completion
+
+        started = time.monotonic()
+        try:
+            completion = LLM.retry_policy.call(attempt, LLM._on_retry(model))
+        except Exception as e:
+            LLM._record_call(type, model, started, attempts, error=e)
+            raise
+        LLM._record_call(type, model, started, attempts, completion=completion)
+        return completion
+
+    @staticmethod
+    async def _acomplete(client: AsyncOpenAI, request: Dict[str, Any], type: Optional[GenerationItemType] = None):
+        """Async variant of _complete."""
+        model = request["model"]
+        estimated = RateLimitScheduler.estimate_tokens(request)
+        attempts = []
+
+        async def attempt():
+            attempts.append(time.monotonic())
+            await LLM.rate_limiter.aacquire(model, estimated)
+            raw = await client.chat.completions.with_raw_response.create(**request)
+            LLM.rate_limiter.update_from_headers(model, raw.headers)
+            completion = raw.parse()
+            LLM.rate_limiter.record_usage(model, estimated, getattr(completion.usage, "total_tokens", None))
+            return completion
+
+        started = time.monotonic()
+        try:
+            completion = await LLM.retry_policy.acall(attempt, LLM._on_retry(model))
+        except Exception as e:
+            LLM._record_call(type, model, started, attempts, error=e)
+            raise
+        LLM._record_call(type, model, started, attempts, completion=completion)
+        return completion
+
+    @staticmethod
+    def _record_call(type: Optional[GenerationItemType], model: str, started: float, attempts: List[float],
+                     completion=None, error: Optional[Exception] = None):
+        usage = TokenUsage.from_usage(completion.usage) if completion is not None else None
+        LLM.metrics.record_completion(
+            type.name if type is not None else "UNKNOWN", model, time.monotonic() - started,
+            usage, max(len(attempts) - 1, 0), error=error
+        )
+
+    @staticmethod
+    def _on_retry(model: str):
+        """
+        Retry hook that pauses the model in the rate limiter after a 429. The
+        retry then waits in the limiter like any queued request, so the policy
+        does not sleep the same delay again.
+        """
+        def on_retry(error: Exception, attempt: int, delay: float) -> Optional[float]:
+            if is_rate_limit_error(error):
+                LLM.rate_limiter.throttle(model, delay)
+                return 0.0
+            return None
+        return on_retry
+
+    @staticmethod
+    def build_request(prompt_messages, type: GenerationItemType, mode: GenerationMode,
+                      response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Resolve the model and build the keyword arguments for chat.completions.create."""
+        model = LLM.get_model_for_type_and_mode(type, mode)
+        request = {
+            "model": model,
+            "messages": LLM.format_messages(prompt_messages),
+            "temperature": LLM.temperature,
+        }
+        if response_format is not None:
+            request["response_format"] = LLM.adapt_response_format(model, response_format)
+        return request
+
+    @staticmethod
+    def adapt_response_format(model: str, response_format: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Models without structured outputs (gpt-3.5-turbo) only accept JSON mode,
+        so JSON schemas are downgraded to {"type": "json_object"} for them.
+        """
+        if response_format.get("type") == "json_schema" and model not in STRUCTURED_OUTPUT_MODELS:
+            return {"type": "json_object"}
+        return response_format
+
+    @staticmethod
+    def format_messages(prompt_messages) -> List[Dict[str, str]]:
+        """Convert LangChain-style messages to OpenAI API format."""
         formatted_messages = []
         for message in prompt_messages:
             if hasattr(message, 'type') and message.type == 'human':
@@ -164,16 +514,7 @@ class LLM:
             else:
                 # Assume it's already in the correct format
                 formatted_messages.append(message)
-        
-        # Generate completion
-        completion = client.chat.completions.create(
-            model=model,
-            messages=formatted_messages,
-            temperature=0.7,
-        )
-        
-        # Create a response object similar to what LangChain would return
-        return MessageResponse(completion.choices[0].message.content)
+        return formatted_messages
 
     @staticmethod
     def request_generation_mode(default=GenerationMode.MEDIUM):
@@ -188,8 +529,10 @@ class MessageResponse:
     """
     Simple message response class to maintain compatibility with LangChain's interface.
     """
-    def __init__(self, content: str):
+    def __init__(self, content: str, usage: Optional[TokenUsage] = None):
         self.content = content
+        # Token usage of the completion; None for cache hits
+        self.usage = usage
         self.type = "ai"
         
     def __call__(self, messages):
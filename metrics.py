@@ -0,0 +1,285 @@
+"""
+Per-call instrumentation for Social-GPT.
+Every completion and image request is recorded with its content type, model,
+token counts, latency, retries and estimated cost, labelled with the run and
+brand it belongs to. Records can be summarized per run, brand, stage or model
+and exported as JSONL or in the Prometheus text exposition format.
+"""
+
+import contextlib
+import contextvars
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Estimated USD per 1M tokens: (input, cached input, output). Update when prices change.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# Estimated USD per image by (model, size, quality)
+IMAGE_PRICES = {
+    ("dall-e-3", "1024x1024", "standard"): 0.040,
+    ("dall-e-3", "1792x1024", "standard"): 0.080,
+    ("dall-e-3", "1024x1792", "standard"): 0.080,
+    ("dall-e-3", "1024x1024", "hd"): 0.080,
+    ("dall-e-3", "1792x1024", "hd"): 0.120,
+    ("dall-e-3", "1024x1792", "hd"): 0.120,
+}
+
+# Where a result came from: the OpenAI API, the Batch API or one of the local caches
+SOURCE_API = "api"
+SOURCE_BATCH = "batch"
+SOURCE_CACHE = "cache"
+
+# Batch API requests are billed at half the regular token prices
+BATCH_PRICE_FACTOR = 0.5
+
+# Labels of the Prometheus series; run ids are left out to keep cardinality bounded
+PROMETHEUS_LABELS = ("item_type", "model", "brand", "source")
+
+
+def estimate_completion_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimated USD cost of a completion; 0.0 for models without a known price."""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+def estimate_image_cost(model: str, size: str, quality: str) -> float:
+    return IMAGE_PRICES.get((model, size, quality), 0.0)
+
+
+class CallRecord:
+    """One completion or image request."""
+    def __init__(self, item_type: str, model: str, latency: float, prompt_tokens: int = 0,
+                 completion_tokens: int = 0, cached_tokens: int = 0, retries: int = 0, cost: float = 0.0,
+                 source: str = SOURCE_API, error: Optional[str] = None, labels: Optional[Dict[str, str]] = None):
+        self.timestamp = time.time()
+        self.item_type = item_type
+        self.model = model
+        self.latency = latency
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.cached_tokens = cached_tokens
+        self.retries = retries
+        self.cost = cost
+        self.source = source
+        self.error = error
+        self.labels = labels or {}
+
+    @property
+    def run(self) -> str:
+        return self.labels.get("run", "")
+
+    @property
+    def brand(self) -> str:
+        return self.labels.get("brand", "")
+
+    @property
+    def stage(self) -> str:
+        return self.labels.get("stage", "")
+
+    def field(self, name: str) -> Any:
+        return self.labels.get(name, "") if name in ("run", "brand", "stage") else getattr(self, name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "run": self.run,
+            "brand": self.brand,
+            "stage": self.stage,
+            "item_type": self.item_type,
+            "model": self.model,
+            "source": self.source,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "latency": round(self.latency, 4),
+            "retries": self.retries,
+            "cost": round(self.cost, 6),
+            "error": self.error,
+        }
+
+
+class CallMetrics:
+    """
+    Thread-safe store of CallRecords. The most recent `max_records` calls are
+    kept for summaries and JSONL export; the Prometheus counters are cumulative
+    for the life of the process.
+
+    Labels such as the run and brand are taken from the context of the calling
+    thread, see CallMetrics.labels.
+    """
+
+    _labels = contextvars.ContextVar("call_metrics_labels", default={})
+
+    def __init__(self, max_records: int = 20000):
+        self.records = deque(maxlen=max_records)
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def labels(**labels: str):
+        """Attach labels (e.g. run, brand, stage) to every call made inside the block."""
+        token = CallMetrics._labels.set({**CallMetrics._labels.get(), **labels})
+        try:
+            yield
+        finally:
+            CallMetrics._labels.reset(token)
+
+    @staticmethod
+    def current_labels() -> Dict[str, str]:
+        return dict(CallMetrics._labels.get())
+
+    def record(self, record: CallRecord):
+        if not record.labels:
+            record.labels = CallMetrics.current_labels()
+        key = tuple(str(record.field(name)) for name in PROMETHEUS_LABELS)
+        with self._lock:
+            self.records.append(record)
+            counters = self._counters.setdefault(key, {
+                "calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cached_tokens": 0, "latency": 0.0, "cost": 0.0,
+            })
+            counters["calls"] += 1
+            counters["errors"] += 1 if record.error else 0
+            counters["retries"] += record.retries
+            counters["prompt_tokens"] += record.prompt_tokens
+            counters["completion_tokens"] += record.completion_tokens
+            counters["cached_tokens"] += record.cached_tokens
+            counters["latency"] += record.latency
+            counters["cost"] += record.cost
+
+    def record_completion(self, item_type: str, model: str, latency: float, usage=None, retries: int = 0,
+                          source: str = SOURCE_API, error: Optional[Exception] = None):
+        """Record a chat completion; `usage` is a TokenUsage or None (cache hits, failures)."""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0)
+        completion_tokens = getattr(usage, "completion_tokens", 0)
+        cached_tokens = getattr(usage, "cached_tokens", 0)
+        cost = estimate_completion_cost(model, prompt_tokens, completion_tokens, cached_tokens) \
+            if source != SOURCE_CACHE else 0.0
+        if source == SOURCE_BATCH:
+            cost *= BATCH_PRICE_FACTOR
+        self.record(CallRecord(
+            item_type, model, latency, prompt_tokens, completion_tokens, cached_tokens,
+            retries, cost, source, str(error) if error is not None else None
+        ))
+
+    def record_image(self, model: str, size: str, quality: str, latency: float, retries: int = 0,
+                     source: str = SOURCE_API, error: Optional[Exception] = None):
+        cost = estimate_image_cost(model, size, quality) if source == SOURCE_API and error is None else 0.0
+        self.record(CallRecord(
+            "IMAGE", model, latency, retries=retries, cost=cost, source=source,
+            error=str(error) if error is not None else None
+        ))
+
+    def select(self, **filters: str) -> List[CallRecord]:
+        """Kept records whose fields or labels match all filters, e.g. select(run=run_id)."""
+        with self._lock:
+            records = list(self.records)
+        return [record for record in records
+                if all(record.field(name) == value for name, value in filters.items())]
+
+    def summary(self, group_by: Iterable[str] = ("item_type", "model"), **filters: str) -> List[Dict[str, Any]]:
+        """
+        Totals per group of kept records, e.g. summary(("brand",)) or
+        summary(("stage",), run=run_id). Latencies cover API calls only.
+        """
+        group_by = tuple(group_by)
+        groups = {}
+        for record in self.select(**filters):
+            key = tuple(record.field(name) for name in group_by)
+            row = groups.setdefault(key, {
+                **dict(zip(group_by, key)), "calls": 0, "cache_hits": 0, "errors": 0, "retries": 0,
+                "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost": 0.0, "_latencies": [],
+            })
+            row["calls"] += 1
+            row["cache_hits"] += 1 if record.source == SOURCE_CACHE else 0
+            row["errors"] += 1 if record.error else 0
+            row["retries"] += record.retries
+            row["prompt_tokens"] += record.prompt_tokens
+            row["cached_tokens"] += record.cached_tokens
+            row["completion_tokens"] += record.completion_tokens
+            row["cost"] += record.cost
+            if record.source == SOURCE_API:
+                row["_latencies"].append(record.latency)
+
+        rows = []
+        for row in groups.values():
+            latencies = sorted(row.pop("_latencies"))
+            row["cost"] = round(row["cost"], 6)
+            # Share of the prompt tokens served from OpenAI's prompt cache
+            row["cached_ratio"] = round(row["cached_tokens"] / row["prompt_tokens"], 3) if row["prompt_tokens"] else 0.0
+            row["latency_avg"] = round(sum(latencies) / len(latencies), 3) if latencies else 0.0
+            # Nearest-rank percentile
+            row["latency_p95"] = round(latencies[math.ceil(0.95 * len(latencies)) - 1], 3) if latencies else 0.0
+            row["latency_max"] = round(latencies[-1], 3) if latencies else 0.0
+            rows.append(row)
+        return sorted(rows, key=lambda row: row["cost"], reverse=True)
+
+    def totals(self, **filters: str) -> Dict[str, Any]:
+        """Summary of all matching records as a single row."""
+        rows = self.summary((), **filters)
+        return rows[0] if rows else {}
+
+    def to_jsonl(self, **filters: str) -> str:
+        return "".join(json.dumps(record.to_dict(), ensure_ascii=False) + "\n" for record in self.select(**filters))
+
+    def export_jsonl(self, path: str, **filters: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_jsonl(**filters))
+        return path
+
+    def prometheus_text(self) -> str:
+        """Cumulative counters in the Prometheus text exposition format."""
+        with self._lock:
+            counters = {key: dict(values) for key, values in self._counters.items()}
+
+        metrics = [
+            ("socialgpt_calls_total", "Completion and image requests", "calls"),
+            ("socialgpt_call_errors_total", "Requests that failed after all retries", "errors"),
+            ("socialgpt_call_retries_total", "Retried attempts", "retries"),
+            ("socialgpt_prompt_tokens_total", "Prompt tokens", "prompt_tokens"),
+            ("socialgpt_cached_prompt_tokens_total", "Prompt tokens served from the prompt cache", "cached_tokens"),
+            ("socialgpt_completion_tokens_total", "Completion tokens", "completion_tokens"),
+            ("socialgpt_call_latency_seconds_total", "Total request latency including retries", "latency"),
+            ("socialgpt_estimated_cost_usd_total", "Estimated cost in USD", "cost"),
+        ]
+        lines = []
+        for name, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, values in sorted(counters.items()):
+                lines.append(f"{name}{{{CallMetrics._format_labels(key)}}} {CallMetrics._format_value(values[field])}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_value(value) -> str:
+        return str(value) if isinstance(value, int) else repr(round(value, 6))
+
+    @staticmethod
+    def _format_labels(key: Tuple[str, ...]) -> str:
+        def escape(value: str) -> str:
+            return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return ",".join(f'{name}="{escape(value)}"' for name, value in zip(PROMETHEUS_LABELS, key))
+
+    def export_prometheus(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._counters = {}
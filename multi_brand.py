@@ -0,0 +1,47 @@
+"""
+Multi-brand campaign runner for Social-GPT.
+Runs the content pipelines of several brands side by side on one executor.
+All of them share the process-wide OpenAI rate limiter and image worker pool,
+and the executor hands out its slots round-robin between brands, so a brand
+with a large campaign cannot starve the others.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from brands import Brand
+from logger import Logger
+from pipeline import CampaignSettings, ContentPipeline, PipelineExecutor, PipelineTask, DEFAULT_MAX_CONCURRENCY
+
+
+class MultiBrandRunner:
+    """
+    Generates one campaign per (brand, settings) pair concurrently.
+    An error in one brand's task only skips that branch of its graph; the
+    other brands keep running and the failure is reported in `errors`.
+    """
+    def __init__(self, campaigns: List[Tuple[Brand, CampaignSettings]],
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.executor = PipelineExecutor(max_concurrency)
+        self.pipelines = [
+            ContentPipeline(brand, settings, executor=self.executor) for brand, settings in campaigns
+        ]
+        self.errors = {pipeline: [] for pipeline in self.pipelines}
+
+    def run(self, on_complete: Optional[Callable[[PipelineTask, Any], None]] = None,
+            on_error: Optional[Callable[[PipelineTask, Exception], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Run every campaign and return their content dictionaries, in the order
+        the campaigns were given. `task.group` is the ContentPipeline of the
+        task, so callbacks can tell brands apart with `task.group.brand`.
+        """
+        def record_error(task, error):
+            self.errors[task.group].append((task, error))
+            if on_error:
+                on_error(task, error)
+            else:
+                Logger.log("Error", f"{task.group.brand.title} - {task.stage} '{task.label}': {error}")
+
+        self.executor.run([pipeline.topics_task() for pipeline in self.pipelines], on_complete, record_error)
+        for pipeline in self.pipelines:
+            pipeline.sort_content()
+        return [pipeline.content for pipeline in self.pipelines]
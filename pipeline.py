@@ -0,0 +1,570 @@
+"""
+Concurrent generation pipeline for Social-GPT.
+Builds the topic -> idea -> post / image prompt -> image dependency graph and
+runs every ready node in a thread pool with a configurable concurrency cap.
+"""
+
+import contextlib
+import os
+import queue
+import uuid
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+from brands import Brand
+from llm import LLM, GenerationMode, GenerationItemType
+from generators.topic_generator import TopicGenerator
+from generators.idea_generator import IdeaGenerator
+from generators.tweet_generator import TweetGenerator
+from generators.facebook_generator import FacebookGenerator
+from generators.instagram_generator import InstagramGenerator
+from generators.linkedin_generator import LinkedInGenerator
+from generators.multi_platform_generator import MultiPlatformGenerator
+from generators.image_prompt_generator import ImagePromptGenerator
+from image_pool import ImageWorkerPool
+from checkpoint import RunCheckpoint
+from image_cache import ImageCache
+from metrics import CallMetrics
+from generators.image_generator import DEFAULT_IMAGE_TRANSPORT
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# How often the driving thread wakes up to deliver streamed events
+EVENT_POLL_INTERVAL = 0.1
+
+PROMOTIONAL_KEYWORDS = ["promocion", "promoción", "venta", "producto", "servicio",
+                        "app", "aplicación", "lanzamiento", "nueva"]
+
+DEFAULT_IMAGE_SETTINGS = {
+    "model": "dall-e-3",
+    "size": "1024x1024",
+    "quality": "standard",
+    "transport": DEFAULT_IMAGE_TRANSPORT
+}
+
+
+class PipelineTask:
+    """
+    A single node of the generation graph.
+
+    `run` is executed in a worker thread. If it returns a Future (e.g. a job
+    handed to another pool), the task completes when that future does.
+    `on_result` is executed in the thread that drives the executor and returns
+    the child tasks unlocked by the result. Tasks with different `group`
+    values (e.g. one per brand) share the executor's slots fairly.
+    """
+    def __init__(self, stage: str, label: str, run: Callable[[], Any],
+                 on_result: Optional[Callable[[Any], List["PipelineTask"]]] = None, group: Any = None):
+        self.stage = stage
+        self.label = label
+        self.run = run
+        self.on_result = on_result
+        self.group = group
+
+
+class FairTaskQueue:
+    """
+    Pending tasks kept per group and handed out round-robin across groups, so a
+    group with a large backlog cannot starve the others. Within a group, tasks
+    pushed to the front (children of a finished task) come out first.
+    """
+    def __init__(self, tasks: List[PipelineTask] = ()):
+        self.queues = OrderedDict()
+        for task in tasks:
+            self.queues.setdefault(task.group, deque()).append(task)
+
+    def __len__(self):
+        return sum(len(tasks) for tasks in self.queues.values())
+
+    def push_front(self, tasks: List[PipelineTask]):
+        for task in reversed(tasks):
+            self.queues.setdefault(task.group, deque()).appendleft(task)
+
+    def pop(self) -> PipelineTask:
+        """Take the next task of the next group in turn."""
+        group, tasks = next(iter(self.queues.items()))
+        task = tasks.popleft()
+        # The group goes to the back of the rotation
+        del self.queues[group]
+        if tasks:
+            self.queues[group] = tasks
+        return task
+
+    def clear(self):
+        self.queues.clear()
+
+
+class PipelineExecutor:
+    """
+    Runs a dynamic graph of PipelineTask objects concurrently.
+    Children of a task are scheduled as soon as their parent completes, so the
+    wall-clock time of a run scales with the depth of the graph, not its size.
+    A task may return a Future for work delegated elsewhere (e.g. the image
+    worker pool); waiting for it does not take one of the max_concurrency slots.
+    """
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.events = queue.Queue()
+
+    def emit(self, task: PipelineTask, payload: Any):
+        """Send an intermediate event (e.g. a streamed delta) from a worker thread."""
+        self.events.put((task, payload))
+
+    def _deliver_events(self, on_event):
+        while True:
+            try:
+                task, payload = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if on_event:
+                on_event(task, payload)
+
+    def run(self, tasks: List[PipelineTask],
+            on_complete: Optional[Callable[[PipelineTask, Any], None]] = None,
+            on_error: Optional[Callable[[PipelineTask, Exception], None]] = None,
+            on_event: Optional[Callable[[PipelineTask, Any], None]] = None):
+        """
+        Execute the given root tasks and every task they unlock.
+
+        Args:
+            tasks: Root tasks with no dependencies
+            on_complete: Called in the calling thread after each successful task
+            on_error: Called in the calling thread when a task raises. Children of
+                a failed task are skipped. If not provided the error is re-raised.
+            on_event: Called in the calling thread for every event sent with emit
+        """
+        pending = FairTaskQueue(tasks)
+        running = {}
+        # Futures returned by tasks; their own pools bound them, not max_concurrency
+        delegated = {}
+        timeout = EVENT_POLL_INTERVAL if on_event else None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while pending or running or delegated:
+                while pending and len(running) < self.max_concurrency:
+                    task = pending.pop()
+                    running[pool.submit(task.run)] = task
+
+                done, _ = wait(list(running) + list(delegated), timeout=timeout, return_when=FIRST_COMPLETED)
+                self._deliver_events(on_event)
+                for future in done:
+                    task = running.pop(future, None) or delegated.pop(future)
+                    try:
+                        result = future.result()
+                        if isinstance(result, Future):
+                            # Wait for the delegated job without holding a slot
+                            delegated[result] = task
+                            continue
+                    except Exception as e:
+                        if on_error is None:
+                            pending.clear()
+                            raise
+                        on_error(task, e)
+                        continue
+
+                    children = task.on_result(result) if task.on_result else []
+                    if on_complete:
+                        on_complete(task, result)
+                    # Deeper nodes go first so slow stages (images) start early
+                    pending.push_front(children or [])
+
+
+class CampaignSettings:
+    """User settings for one content generation run."""
+    def __init__(self, topic_count: int, ideas_per_topic: int, language: str, platforms: List[str],
+                 generation_mode: GenerationMode, topics_ideas_prompt_expansion: str = "",
+                 posts_prompt_expansion: str = "", generate_images: bool = True,
+                 image_settings: Optional[Dict[str, str]] = None, combine_platforms: bool = False,
+                 bulk_ideas: bool = False, stream_posts: bool = False,
+                 cached_types: Optional[List[GenerationItemType]] = None):
+        self.topic_count = topic_count
+        self.ideas_per_topic = ideas_per_topic
+        self.language = language
+        self.platforms = platforms
+        self.generation_mode = generation_mode
+        self.topics_ideas_prompt_expansion = topics_ideas_prompt_expansion or ""
+        self.posts_prompt_expansion = posts_prompt_expansion or ""
+        self.generate_images = generate_images
+        self.image_settings = image_settings or dict(DEFAULT_IMAGE_SETTINGS)
+        self.combine_platforms = combine_platforms
+        self.bulk_ideas = bulk_ideas
+        self.stream_posts = stream_posts
+        # Content types served from the local caches during this run; None keeps the process-wide setting
+        self.cached_types = list(cached_types) if cached_types is not None else None
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-serializable form, stored in run checkpoints."""
+        return {
+            "topic_count": self.topic_count,
+            "ideas_per_topic": self.ideas_per_topic,
+            "language": self.language,
+            "platforms": list(self.platforms),
+            "generation_mode": self.generation_mode.name,
+            "topics_ideas_prompt_expansion": self.topics_ideas_prompt_expansion,
+            "posts_prompt_expansion": self.posts_prompt_expansion,
+            "generate_images": self.generate_images,
+            "image_settings": dict(self.image_settings),
+            "combine_platforms": self.combine_platforms,
+            "bulk_ideas": self.bulk_ideas,
+            "stream_posts": self.stream_posts,
+            "cached_types": [item_type.name for item_type in self.cached_types]
+            if self.cached_types is not None else None,
+        }
+
+    @staticmethod
+    def from_record(record: Dict[str, Any]) -> "CampaignSettings":
+        cached_types = record.get("cached_types")
+        return CampaignSettings(**{
+            **record,
+            "generation_mode": GenerationMode[record["generation_mode"]],
+            "cached_types": [GenerationItemType[name] for name in cached_types] if cached_types is not None else None,
+        })
+
+    def cache_scope(self) -> contextlib.AbstractContextManager:
+        """Apply this run's cache choices to the calls made inside the block."""
+        if self.cached_types is None:
+            return contextlib.nullcontext()
+        scope = contextlib.ExitStack()
+        scope.enter_context(LLM.cache_scope(
+            [item_type for item_type in self.cached_types if item_type != GenerationItemType.IMAGE]
+        ))
+        scope.enter_context(ImageCache.scope(GenerationItemType.IMAGE in self.cached_types))
+        return scope
+
+    @property
+    def is_promotional(self) -> bool:
+        """Detect whether the user instructions ask to promote a product or service."""
+        expansion = self.topics_ideas_prompt_expansion.lower()
+        return any(keyword in expansion for keyword in PROMOTIONAL_KEYWORDS)
+
+    def topic_prompt(self) -> str:
+        if self.is_promotional:
+            return f"IMPORTANTE: Este contenido debe promocionar o vender un producto/servicio. {self.topics_ideas_prompt_expansion}"
+        return self.topics_ideas_prompt_expansion
+
+    def idea_prompt(self) -> str:
+        if self.is_promotional:
+            return f"IMPORTANTE: Estas ideas deben promocionar directamente el producto/servicio mencionado: {self.topics_ideas_prompt_expansion}"
+        return self.topics_ideas_prompt_expansion
+
+    def post_prompt(self) -> str:
+        if self.is_promotional:
+            return f"IMPORTANTE - PROMOCIÓN: {self.topics_ideas_prompt_expansion}\nEstilo específico: {self.posts_prompt_expansion}"
+        return self.posts_prompt_expansion
+
+    def image_instructions(self) -> Optional[str]:
+        if self.is_promotional:
+            return f"PROMOCIONAL: {self.topics_ideas_prompt_expansion}"
+        return None
+
+    @property
+    def uses_combined_posts(self) -> bool:
+        """
+        Whether all platform posts of an idea are requested in a single completion.
+        Streamed posts are always requested per platform so they can be shown as they arrive.
+        """
+        return self.combine_platforms and len(self.platforms) > 1 and not self.stream_posts
+
+    def items_per_idea(self) -> int:
+        """Post nodes plus image prompt and image nodes for one idea."""
+        post_nodes = 1 if self.uses_combined_posts else len(self.platforms)
+        return post_nodes + (2 if self.generate_images else 0)
+
+    def estimated_total(self, topic_count: Optional[int] = None) -> int:
+        """Estimated number of nodes in the graph for progress reporting."""
+        topics = self.topic_count if topic_count is None else topic_count
+        ideas = topics * self.ideas_per_topic
+        idea_nodes = 1 if self.bulk_ideas else topics
+        return 1 + idea_nodes + ideas * self.items_per_idea()
+
+
+# Platforms with a post generator
+PLATFORMS = ("Twitter", "Facebook", "Instagram", "LinkedIn")
+
+
+def generate_platform_post(brand: Brand, platform: str, language: str, idea: str,
+                           prompt_expansion: str, generation_mode: GenerationMode) -> str:
+    """Generate a post for a single platform."""
+    if platform == "Twitter":
+        return TweetGenerator(brand, language, idea, prompt_expansion, generation_mode).generate_tweet()
+    if platform == "Facebook":
+        return FacebookGenerator(brand, language, idea, prompt_expansion, generation_mode).generate_post()
+    if platform == "Instagram":
+        return InstagramGenerator(brand, language, idea, prompt_expansion, generation_mode).generate_post()
+    if platform == "LinkedIn":
+        return LinkedInGenerator(brand, language, idea, prompt_expansion, generation_mode).generate_post()
+    raise ValueError(f"Unknown platform: {platform}")
+
+
+def stream_platform_post(brand: Brand, platform: str, language: str, idea: str,
+                         prompt_expansion: str, generation_mode: GenerationMode):
+    """Stream a post for a single platform; the generator returns the final post."""
+    if platform == "Twitter":
+        return TweetGenerator(brand, language, idea, prompt_expansion, generation_mode).stream_tweet()
+    if platform == "Facebook":
+        return FacebookGenerator(brand, language, idea, prompt_expansion, generation_mode).stream_post()
+    if platform == "Instagram":
+        return InstagramGenerator(brand, language, idea, prompt_expansion, generation_mode).stream_post()
+    if platform == "LinkedIn":
+        return LinkedInGenerator(brand, language, idea, prompt_expansion, generation_mode).stream_post()
+    raise ValueError(f"Unknown platform: {platform}")
+
+
+def drain_stream(stream, on_delta: Callable[[str], None]):
+    """Forward every delta of a generator to on_delta and return its return value."""
+    while True:
+        try:
+            on_delta(next(stream))
+        except StopIteration as stop:
+            return stop.value
+
+
+class ContentPipeline:
+    """
+    Builds the generation graph for a brand and streams results into a
+    content dictionary with the same layout used by the export helpers:
+    {"topics": [...], "ideas": [(topic, idea)], "posts": {platform: [(topic, idea, post)]},
+     "images": [(topic, idea, image_path)]}
+    """
+    def __init__(self, brand: Brand, settings: CampaignSettings, content: Optional[Dict[str, Any]] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, executor: Optional[PipelineExecutor] = None,
+                 checkpoint: Optional[RunCheckpoint] = None):
+        self.brand = brand
+        self.settings = settings
+        self.content = content if content is not None else ContentPipeline.empty_content(settings.platforms)
+        # A shared executor (see MultiBrandRunner) runs several pipelines side by side
+        self.executor = executor or PipelineExecutor(max_concurrency)
+        self.image_pool = ImageWorkerPool.shared()
+        # Journal of completed nodes; journaled nodes are replayed instead of generated again
+        self.checkpoint = checkpoint
+        self.errors = 0
+        # Labels the calls of this run in LLM.metrics
+        self.run_id = checkpoint.run_id if checkpoint is not None else uuid.uuid4().hex[:12]
+
+    @staticmethod
+    def from_checkpoint(checkpoint: RunCheckpoint, content: Optional[Dict[str, Any]] = None,
+                        max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> "ContentPipeline":
+        """Pipeline that resumes a journaled run with its original brand and settings."""
+        settings = CampaignSettings.from_record(checkpoint.settings_record)
+        return ContentPipeline(Brand.from_record(checkpoint.brand_record), settings, content,
+                               max_concurrency, checkpoint=checkpoint)
+
+    @staticmethod
+    def empty_content(platforms: List[str]) -> Dict[str, Any]:
+        return {
+            "topics": [],
+            "ideas": [],
+            "posts": {platform: [] for platform in platforms},
+            "images": []
+        }
+
+    def run(self, on_complete: Optional[Callable[[PipelineTask, Any], None]] = None,
+            on_error: Optional[Callable[[PipelineTask, Exception], None]] = None,
+            on_event: Optional[Callable[[PipelineTask, Any], None]] = None):
+        """
+        Run the whole campaign and return the filled content dictionary.
+        With settings.stream_posts, on_event receives (post task, text delta) pairs.
+        With a checkpoint, journaled nodes are replayed and the run is marked as
+        finished in the journal (with its error count) when it ends.
+        """
+        def count_error(task, error):
+            self.errors += 1
+            if on_error is None:
+                raise error
+            on_error(task, error)
+
+        self.errors = 0
+        # An exception leaves the journal without its "done" line, i.e. resumable
+        self.executor.run([self.topics_task()], on_complete, count_error, on_event)
+        if self.checkpoint is not None:
+            self.checkpoint.finish(self.errors)
+        self.sort_content()
+        return self.content
+
+    def task(self, stage: str, label: str, run: Callable[[], Any],
+             on_result: Optional[Callable[[Any], List[PipelineTask]]] = None,
+             inputs: Optional[List[Any]] = None,
+             replayable: Optional[Callable[[Any], bool]] = None) -> PipelineTask:
+        """
+        A task of this pipeline; its group keeps scheduling fair between pipelines.
+        `inputs` identify the node in the checkpoint journal: a journaled result
+        (accepted by `replayable`, if given) is returned without calling the API,
+        and new results are journaled before their children are scheduled.
+        API calls made by the task are labelled with the run, brand and stage,
+        and use the caches chosen in the campaign settings.
+        """
+        generate = run
+        metrics_labels = {"run": self.run_id, "brand": self.brand.title, "stage": stage}
+        settings = self.settings
+
+        def run():
+            with CallMetrics.labels(**metrics_labels), settings.cache_scope():
+                return generate()
+
+        checkpoint = self.checkpoint
+        if checkpoint is None or inputs is None:
+            return PipelineTask(stage, label, run, on_result, group=self)
+
+        key = RunCheckpoint.make_key(stage, inputs)
+        found, saved = checkpoint.get(key)
+        if found and (replayable is None or replayable(saved)):
+            return PipelineTask(stage, label, lambda: saved, on_result, group=self)
+
+        def record(result):
+            checkpoint.record(key, stage, inputs, result)
+            return on_result(result) if on_result else []
+
+        return PipelineTask(stage, label, run, record, group=self)
+
+    def topics_task(self) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            return TopicGenerator(
+                self.brand, settings.topic_count, settings.topic_prompt(), settings.generation_mode
+            ).generate_topics()
+
+        def on_result(topics):
+            self.content["topics"] = topics
+            if settings.bulk_ideas and topics:
+                return [self.bulk_ideas_task(topics)]
+            return [self.ideas_task(topic) for topic in topics]
+
+        return self.task("topics", "temas", run, on_result, inputs=[])
+
+    def ideas_task(self, topic: str) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            return IdeaGenerator(
+                self.brand, settings.ideas_per_topic, settings.idea_prompt(), settings.generation_mode
+            ).generate_ideas(topic)
+
+        def on_result(ideas):
+            return self.add_ideas(topic, ideas)
+
+        return self.task("ideas", topic, run, on_result, inputs=[topic])
+
+    def bulk_ideas_task(self, topics: List[str]) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            return IdeaGenerator(
+                self.brand, settings.ideas_per_topic, settings.idea_prompt(), settings.generation_mode
+            ).generate_ideas_bulk(topics)
+
+        def on_result(ideas_by_topic):
+            children = []
+            for topic in topics:
+                children.extend(self.add_ideas(topic, ideas_by_topic.get(topic, [])))
+            return children
+
+        return self.task("ideas", f"{len(topics)} temas", run, on_result, inputs=[topics])
+
+    def add_ideas(self, topic: str, ideas: List[str]) -> List[PipelineTask]:
+        """Record the ideas of a topic and return the post and image tasks they unlock."""
+        settings = self.settings
+        self.content["ideas"].extend([(topic, idea) for idea in ideas])
+        children = []
+        for idea in ideas:
+            if settings.uses_combined_posts:
+                children.append(self.combined_posts_task(topic, idea))
+            else:
+                children.extend(self.post_task(topic, idea, platform) for platform in settings.platforms)
+            if settings.generate_images:
+                children.append(self.image_prompt_task(topic, idea))
+        return children
+
+    def post_task(self, topic: str, idea: str, platform: str) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            if settings.stream_posts:
+                stream = stream_platform_post(
+                    self.brand, platform, settings.language, idea, settings.post_prompt(), settings.generation_mode
+                )
+                return drain_stream(stream, lambda delta: self.executor.emit(task, delta))
+            return generate_platform_post(
+                self.brand, platform, settings.language, idea, settings.post_prompt(), settings.generation_mode
+            )
+
+        def on_result(post):
+            self.content["posts"].setdefault(platform, []).append((topic, idea, post))
+            return []
+
+        task = self.task(f"post:{platform}", idea, run, on_result, inputs=[topic, idea])
+        return task
+
+    def combined_posts_task(self, topic: str, idea: str) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            posts = MultiPlatformGenerator(
+                self.brand, settings.language, idea, settings.post_prompt(),
+                settings.generation_mode, settings.platforms
+            ).generate_posts()
+            # Fall back to one request per platform for anything the model left out
+            for platform in settings.platforms:
+                if platform not in posts:
+                    posts[platform] = generate_platform_post(
+                        self.brand, platform, settings.language, idea,
+                        settings.post_prompt(), settings.generation_mode
+                    )
+            return posts
+
+        def on_result(posts):
+            for platform in settings.platforms:
+                self.content["posts"].setdefault(platform, []).append((topic, idea, posts[platform]))
+            return []
+
+        return self.task("posts", idea, run, on_result, inputs=[topic, idea, settings.platforms])
+
+    def image_prompt_task(self, topic: str, idea: str) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            return ImagePromptGenerator(
+                self.brand, idea, settings.generation_mode, settings.image_instructions()
+            ).generate_prompt()
+
+        def on_result(image_prompt):
+            return [self.image_task(topic, idea, image_prompt)]
+
+        return self.task("image_prompt", idea, run, on_result, inputs=[topic, idea])
+
+    def image_task(self, topic: str, idea: str, image_prompt: str) -> PipelineTask:
+        settings = self.settings
+
+        def run():
+            return self.image_pool.submit(
+                image_prompt,
+                settings.generation_mode,
+                size=settings.image_settings["size"],
+                quality=settings.image_settings["quality"],
+                transport=settings.image_settings.get("transport", DEFAULT_IMAGE_TRANSPORT)
+            )
+
+        def on_result(image_path):
+            self.content["images"].append((topic, idea, image_path))
+            return []
+
+        # A journaled image is only reused while its file is still on disk
+        return self.task("image", idea, run, on_result, inputs=[topic, idea, image_prompt],
+                         replayable=os.path.isfile)
+
+    def sort_content(self):
+        """Restore topic/idea order after results arrived in completion order."""
+        topic_order = {topic: i for i, topic in enumerate(self.content["topics"])}
+        self.content["ideas"].sort(key=lambda item: topic_order.get(item[0], len(topic_order)))
+        idea_order = {pair: i for i, pair in enumerate(self.content["ideas"])}
+
+        def by_idea(item):
+            return idea_order.get((item[0], item[1]), len(idea_order))
+
+        for posts in self.content["posts"].values():
+            posts.sort(key=by_idea)
+        self.content["images"].sort(key=by_idea)
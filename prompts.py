@@ -10,3 +10,51 @@ class Prompts:
 
     def build_style_prompt(style_items: str):
         return '\n\nSigue estas pautas de estilo:' + ', '.join(style_items)
+
+
+class PromptBuilder:
+    """
+    Assembles the system and user messages of a generator.
+
+    Static content (role, brand, rules, output format, avoid notes, style) goes
+    into the system message and variable content (topic, idea, instructions)
+    into the user message, in that order. Every request of a campaign then
+    starts with the same bytes, which OpenAI's automatic prompt caching reuses
+    (for prefixes of 1024+ tokens) to cut latency and input cost.
+    """
+
+    def __init__(self, role: str):
+        self.static_sections = [role.strip()]
+        self.variable_sections = []
+
+    def add_static(self, text: str) -> "PromptBuilder":
+        if text and text.strip():
+            self.static_sections.append(text.strip())
+        return self
+
+    def add_brand(self, brand: Brand) -> "PromptBuilder":
+        return self.add_static(brand.description)
+
+    def add_avoids(self) -> "PromptBuilder":
+        return self.add_static(Prompts.get_avoids())
+
+    def add_style(self, style_items) -> "PromptBuilder":
+        return self.add_static(Prompts.build_style_prompt(style_items))
+
+    def add_variable(self, text: str) -> "PromptBuilder":
+        if text and text.strip():
+            self.variable_sections.append(text.strip())
+        return self
+
+    def add_instructions(self, prompt_expansion: str,
+                         label: str = "Instrucciones adicionales (MUY IMPORTANTES)") -> "PromptBuilder":
+        if prompt_expansion:
+            self.add_variable(f"{label}: {prompt_expansion}")
+        return self
+
+    def build(self):
+        """Return [system message, user message]."""
+        return [
+            {"role": "system", "content": "\n\n".join(self.static_sections)},
+            {"role": "user", "content": "\n\n".join(self.variable_sections)},
+        ]
@@ -0,0 +1,213 @@
+"""
+Rate-limit-aware request scheduling for Social-GPT.
+Keeps a requests-per-minute and a tokens-per-minute token bucket per model so
+concurrent generation queues work below the account limits instead of
+triggering bursts of 429 responses.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# Requests and tokens per minute per model. These are conservative defaults;
+# they are replaced by the limits OpenAI reports in the response headers.
+DEFAULT_LIMITS = {
+    "gpt-3.5-turbo": {"rpm": 3500, "tpm": 200000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "dall-e-3": {"rpm": 7, "tpm": None},
+}
+FALLBACK_LIMITS = {"rpm": 500, "tpm": 30000}
+
+# Tokens reserved for the completion when the request does not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 600
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset headers such as '1s', '6m0s' or '20ms' into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        total += float(amount) * units[unit]
+        matched = True
+    return total if matched else None
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations. A caller reserves what it needs
+    immediately (the balance may go negative) and is told how long to wait, so
+    waiters are served in arrival order without polling.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` from the bucket and return the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, amount: float):
+        """Give back (positive) or charge (negative) tokens after the fact."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def set_limit(self, per_minute: float):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.capacity = float(per_minute)
+            self.rate = float(per_minute) / 60.0
+            self.tokens = min(self.tokens, self.capacity)
+
+    def observe_remaining(self, remaining: float):
+        """Never believe we have more budget than the server says is left."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, remaining)
+
+    def drain(self, seconds: float):
+        """Hold new work so the next request starts in `seconds` (e.g. after a 429 with Retry-After)."""
+        with self.lock:
+            self._refill(time.monotonic())
+            # Leave the next request's own token, so it waits `seconds` and not one interval more
+            self.tokens = min(self.tokens, min(1.0, self.capacity) - seconds * self.rate)
+
+
+class ModelBuckets:
+    """The request and token buckets of one model."""
+    def __init__(self, rpm: float, tpm: Optional[float]):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+
+class RateLimitScheduler:
+    """
+    Per-model RPM/TPM budgeting in front of every OpenAI call.
+
+    Callers reserve one request and their estimated tokens before dispatching,
+    wait if the budget is exhausted, then report the actual usage and the
+    rate-limit headers of the response.
+    """
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.limits = {model: dict(values) for model, values in (limits or DEFAULT_LIMITS).items()}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+        self.throttled = 0
+
+    def configure(self, model: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """Override the limits of a model."""
+        with self._lock:
+            limits = self.limits.setdefault(model, dict(FALLBACK_LIMITS))
+            if rpm is not None:
+                limits["rpm"] = rpm
+            if tpm is not None:
+                limits["tpm"] = tpm
+            self._buckets.pop(model, None)
+
+    def buckets(self, model: str) -> ModelBuckets:
+        with self._lock:
+            buckets = self._buckets.get(model)
+            if buckets is None:
+                limits = self.limits.get(model, FALLBACK_LIMITS)
+                buckets = ModelBuckets(limits["rpm"], limits.get("tpm"))
+                self._buckets[model] = buckets
+            return buckets
+
+    @staticmethod
+    def estimate_tokens(request: Dict[str, Any]) -> int:
+        """
+        Estimate the tokens a chat completion will consume: roughly 4 characters
+        per prompt token plus the completion allowance.
+        """
+        characters = 0
+        for message in request.get("messages", []):
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+            characters += len(content or "") + 16
+        completion = request.get("max_tokens") or request.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+        return characters // 4 + completion
+
+    def _reserve(self, model: str, tokens: int) -> float:
+        buckets = self.buckets(model)
+        wait = buckets.requests.reserve(1)
+        if buckets.tokens is not None and tokens:
+            wait = max(wait, buckets.tokens.reserve(tokens))
+        if wait > 0:
+            self.waited_seconds += wait
+        return wait
+
+    def acquire(self, model: str, tokens: int = 0):
+        """Reserve budget for one request, sleeping until it is available."""
+        wait = self._reserve(model, tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, model: str, tokens: int = 0):
+        """Async variant of acquire."""
+        wait = self._reserve(model, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, model: str, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket with the real usage reported by the API."""
+        buckets = self.buckets(model)
+        if buckets.tokens is not None and actual_tokens is not None:
+            buckets.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, model: str, headers):
+        """Sync the buckets with the x-ratelimit-* headers of a response."""
+        if headers is None:
+            return
+        buckets = self.buckets(model)
+
+        self._sync_bucket(buckets.requests, headers, "requests")
+        if buckets.tokens is not None:
+            self._sync_bucket(buckets.tokens, headers, "tokens")
+
+    @staticmethod
+    def _sync_bucket(bucket: TokenBucket, headers, kind: str):
+        limit = headers.get(f"x-ratelimit-limit-{kind}")
+        if limit and float(limit) != bucket.capacity:
+            bucket.set_limit(float(limit))
+
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        if remaining is None:
+            return
+        bucket.observe_remaining(float(remaining))
+
+        # Out of budget: hold new work until the server-side window resets
+        reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+        if float(remaining) <= 0 and reset:
+            bucket.drain(reset)
+
+    def throttle(self, model: str, retry_after: Optional[float] = None):
+        """Pause the model after a 429 so queued work waits instead of piling on."""
+        buckets = self.buckets(model)
+        seconds = retry_after if retry_after is not None else 60.0 / max(buckets.requests.capacity, 1.0)
+        buckets.requests.drain(seconds)
+        self.throttled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"waited_seconds": self.waited_seconds, "throttled": self.throttled}
@@ -0,0 +1,164 @@
+"""
+Persistent, content-addressed cache for LLM completions.
+Entries are keyed by a hash of the resolved model, the formatted messages and the
+sampling parameters, and stored in a SQLite file with TTL and LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from files import Files
+
+
+class ResponseCache:
+    """
+    On-disk LRU cache for completion texts.
+
+    Only the GenerationItemType values listed in `enabled_types` are cached, so
+    callers opt in per kind of content (e.g. topics and ideas but not posts).
+    """
+
+    def __init__(self, path: str = Files.llm_response_cache, enabled_types: Iterable = (),
+                 max_entries: int = 5000, max_bytes: int = 50 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        self.path = path
+        self.enabled_types = set(enabled_types)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                item_type TEXT NOT NULL,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL DEFAULT 0,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], **params) -> str:
+        """Hash the request so identical requests map to the same entry."""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_enabled_for(self, item_type) -> bool:
+        return item_type in self.enabled_types
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached content for a key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, created_at, latency, prompt_tokens, completion_tokens "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            content, created_at, latency, prompt_tokens, completion_tokens = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                self.misses += 1
+                return None
+
+            self._connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+            self.saved_seconds += latency
+            self.saved_prompt_tokens += prompt_tokens
+            self.saved_completion_tokens += completion_tokens
+            return content
+
+    def put(self, key: str, item_type, model: str, content: str, latency: float = 0.0,
+            prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Store a completion and evict least recently used entries beyond the limits."""
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, item_type, model, content, size, latency, prompt_tokens, completion_tokens, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, getattr(item_type, "name", str(item_type)), model, content, size,
+                 latency, prompt_tokens, completion_tokens, now, now)
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        if self.ttl_seconds is not None:
+            self._connection.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+
+        count, total = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        to_delete = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total -= size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus the latency and tokens saved by cache hits."""
+        with self._lock:
+            count, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": total,
+            "saved_seconds": self.saved_seconds,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens,
+        }
@@ -0,0 +1,150 @@
+"""
+Retry policy with exponential backoff, full jitter and error classification.
+Transient failures (429, 5xx, timeouts, dropped connections) are retried with
+randomized delays so concurrent workers do not retry in lockstep; request
+errors such as 400 or authentication failures are raised immediately.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+import openai
+import requests
+
+from logger import Logger
+from rate_limiter import parse_reset_duration
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def status_code_of(error: Exception) -> Optional[int]:
+    """HTTP status code carried by an OpenAI or requests error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After (or rate-limit reset) header of an error response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value:
+            try:
+                seconds = float(value)
+            except ValueError:
+                continue
+            return seconds / 1000.0 if header == "retry-after-ms" else seconds
+    resets = [parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}")) for kind in exhausted_limits(headers)]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+
+def exhausted_limits(headers) -> List[str]:
+    """Which rate limits ("requests", "tokens") a 429 response ran out of."""
+    remaining = {}
+    for kind in ("requests", "tokens"):
+        try:
+            remaining[kind] = float(headers.get(f"x-ratelimit-remaining-{kind}"))
+        except (TypeError, ValueError):
+            pass
+    exhausted = [kind for kind, value in remaining.items() if value <= 0]
+    if exhausted:
+        return exhausted
+    # Requests were left, so the request did not fit in the remaining token budget
+    return ["tokens"] if remaining.get("requests", 0) > 0 else ["requests"]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return isinstance(error, openai.RateLimitError) or status_code_of(error) == 429
+
+
+class RetryPolicy:
+    """
+    Retries a call on transient errors.
+
+    The delay before retry n (0-based) is drawn uniformly from
+    [0, min(max_delay, base_delay * 2 ** n)] ("full jitter"), unless the
+    server sent Retry-After, which is honored up to max_delay.
+    """
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 jitter: bool = True, retry_on: Optional[Callable[[Exception], bool]] = None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Classify an error as transient (retry) or permanent (raise)."""
+        if self.retry_on is not None:
+            return self.retry_on(error)
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            return True
+        status = status_code_of(error)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES
+        return False
+
+    def delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Seconds to wait before the retry following failed attempt `attempt` (0-based)."""
+        if error is not None:
+            retry_after = retry_after_seconds(error)
+            if retry_after is not None:
+                # A bad or hostile header must not stall the worker indefinitely
+                return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def _next_delay(self, attempt: int, error: Exception, on_retry) -> Optional[float]:
+        if attempt >= self.max_attempts - 1 or not self.is_retryable(error):
+            return None
+        delay = self.delay(attempt, error)
+        Logger.log("Reintentando", f"Intento {attempt + 1}/{self.max_attempts} falló: {error}\nNuevo intento en {delay:.2f}s")
+        if on_retry is not None:
+            # The hook may take over the wait (e.g. by holding the rate limiter) and return the sleep left
+            sleep = on_retry(error, attempt + 1, delay)
+            if sleep is not None:
+                return sleep
+        return delay
+
+    def call(self, fn: Callable[[], Any],
+             on_retry: Optional[Callable[[Exception, int, float], Optional[float]]] = None) -> Any:
+        """
+        Call `fn` until it succeeds, raising the last error when it is not
+        retryable or attempts run out. `on_retry(error, attempt, delay)` is
+        called before each sleep; when it returns a number, that is slept
+        instead of `delay`.
+        """
+        for attempt in range(self.max_attempts):
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._next_delay(attempt, e, on_retry)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]],
+                    on_retry: Optional[Callable[[Exception, int, float], Optional[float]]] = None) -> Any:
+        """Async variant of call; `fn` must return a new awaitable on each call."""
+        for attempt in range(self.max_attempts):
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._next_delay(attempt, e, on_retry)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
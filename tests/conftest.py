@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_server
+from clients import ClientRegistry
+from llm import LLM
+from rate_limiter import RateLimitScheduler
+from utils import prepare_directories
+
+
+@pytest.fixture
+def stand_in(tmp_path, monkeypatch):
+    """Batch stand-in on a free port, with the OpenAI clients pointed at it."""
+    server = batch_server.serve(port=0)
+    host, port = server.server_address[:2]
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "local")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://{host}:{port}/v1")
+    # Fresh budgets, so earlier tests do not use up the 7 rpm allowed for dall-e-3
+    monkeypatch.setattr(LLM, "rate_limiter", RateLimitScheduler())
+    ClientRegistry.close_all()
+    prepare_directories()
+    yield server
+    server.shutdown()
+    ClientRegistry.close_all()
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from batch import BatchCampaignRunner
+from brands import Brand
+from clients import ClientRegistry
+from llm import LLM, GenerationMode
+from metrics import CallMetrics, SOURCE_BATCH, estimate_completion_cost
+from pipeline import CampaignSettings
+
+
+@pytest.mark.parametrize("transport", ["b64_json", "url"])
+def test_full_batch_campaign_runs_offline(stand_in, transport):
+    settings = CampaignSettings(
+        topic_count=4,
+        ideas_per_topic=1,
+        language="Español",
+        platforms=["Twitter", "LinkedIn"],
+        generation_mode=GenerationMode.LOW,
+        generate_images=True,
+        image_settings={"model": "dall-e-3", "size": "1024x1024", "quality": "standard", "transport": transport},
+        combine_platforms=True,
+    )
+    content = BatchCampaignRunner(Brand("Acme", "Tienda de café", ["Cercano"]), settings, poll_interval=0.05).run()
+
+    assert len(content["topics"]) == 4
+    assert len(content["ideas"]) == 4
+    assert all(len(content["posts"][platform]) == 4 for platform in settings.platforms)
+    assert len(content["images"]) == 4
+    assert all(os.path.isfile(path) for _, _, path in content["images"])
+
+
+def test_stand_in_serves_fallback_requests(stand_in):
+    # Per-platform posts and top-ups skip the batch and call chat.completions directly
+    client = ClientRegistry.get_client()
+    completion = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": 'Genera exactamente 5 ideas. Devuelve un objeto JSON con la clave "ideas".'}],
+        response_format={"type": "json_object"},
+    )
+    assert '"ideas"' in completion.choices[0].message.content
+    assert completion.choices[0].message.content.count("Contenido simulado") == 5
+
+
+def test_batch_calls_are_recorded_at_batch_prices(stand_in, monkeypatch):
+    monkeypatch.setattr(LLM, "metrics", CallMetrics())
+    settings = CampaignSettings(topic_count=2, ideas_per_topic=1, language="Español", platforms=["Twitter"],
+                                generation_mode=GenerationMode.LOW, generate_images=False)
+    runner = BatchCampaignRunner(Brand("Acme", "Tienda de café", ["Cercano"]), settings, poll_interval=0.05)
+    runner.run()
+
+    records = LLM.metrics.select(source=SOURCE_BATCH, run=runner.pipeline.run_id, brand="Acme")
+    assert {record.stage for record in records} == {"topics", "ideas", "posts"}
+    assert {record.item_type for record in records} == {"TOPICS", "IDEAS", "POST"}
+    for record in records:
+        assert record.prompt_tokens > 0 and record.completion_tokens > 0
+        regular = estimate_completion_cost(record.model, record.prompt_tokens, record.completion_tokens)
+        assert record.cost == pytest.approx(regular / 2)
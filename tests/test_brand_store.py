@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from brand_store import BrandStore
+from brands import Brand
+from files import Files
+from utils import add_item_to_file
+
+
+@pytest.fixture
+def brands_dir(tmp_path, monkeypatch):
+    """Empty working directory with a fresh Brand repository."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Brand, "_store", None)
+    monkeypatch.setattr(Brand, "_memo", (None, [], {}))
+    return tmp_path
+
+
+def write_legacy_brand(brand):
+    add_item_to_file(Files.brand_descriptions, brand.to_description_cache_text())
+    add_item_to_file(Files.brand_styles, brand.to_style_cache_text())
+
+
+def test_legacy_text_files_are_migrated_once(brands_dir):
+    write_legacy_brand(Brand("Acme", "Tienda de café", ["Profesional", "Cercano"]))
+    write_legacy_brand(Brand("Panadería Sol", "Pan artesanal - desde 1980", ["Cercano"]))
+    # A description without styles is not a complete brand
+    add_item_to_file(Files.brand_descriptions, "Huérfana - Sin estilos")
+
+    brands = Brand.get_cached_brands()
+
+    assert [brand.title for brand in brands] == ["Acme", "Panadería Sol"]
+    assert Brand.from_title("Acme").style == ["Profesional", "Cercano"]
+    with open(Files.brand_store, encoding="utf-8") as f:
+        assert [record["title"] for record in json.load(f)["brands"]] == ["Acme", "Panadería Sol"]
+
+    # Once the JSON store exists the text files are no longer read
+    write_legacy_brand(Brand("Nueva", "Solo en texto", ["Cercano"]))
+    assert Brand.from_title("Nueva") is None
+
+
+def test_saving_an_existing_title_updates_it_in_place(brands_dir):
+    Brand("Acme", "Tienda de café", ["Cercano"]).save_in_cache()
+    Brand("Otra", "Panadería", ["Cercano"]).save_in_cache()
+    Brand("Acme", "Tostadores de café", ["Profesional"]).save_in_cache()
+
+    assert [brand.title for brand in Brand.get_cached_brands()] == ["Acme", "Otra"]
+    assert Brand.from_title("Acme").description == "Tostadores de café"
+
+
+def test_delete_removes_the_brand(brands_dir):
+    Brand("Acme", "Tienda de café", ["Cercano"]).save_in_cache()
+
+    assert Brand.delete("Acme")
+    assert not Brand.delete("Acme")
+    assert Brand.get_cached_brands() == []
+
+
+def test_store_picks_up_changes_written_by_another_process(brands_dir):
+    path = str(brands_dir / "brands.json")
+    store = BrandStore(path)
+    store.put({"title": "Acme", "description": "Tienda de café", "style": ["Cercano"]})
+    version = store.refresh()
+    assert store.refresh() == version
+
+    other = BrandStore(path)
+    other.put({"title": "Otra", "description": "Panadería", "style": ["Cercano"]})
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+
+    assert store.refresh() > version
+    assert [record["title"] for record in store.all()] == ["Acme", "Otra"]
@@ -0,0 +1,38 @@
+import os
+
+from checkpoint import RunCheckpoint
+
+
+def create_run(directory, title="Acme"):
+    return RunCheckpoint.create({"title": title}, {"topic_count": 1}, str(directory))
+
+
+def test_listing_only_rereads_changed_journals(tmp_path):
+    run = create_run(tmp_path)
+    first = RunCheckpoint.incomplete_runs(str(tmp_path))
+    assert RunCheckpoint.incomplete_runs(str(tmp_path))[0] is first[0]
+
+    RunCheckpoint.open(run.run_id, str(tmp_path)).finish()
+    assert RunCheckpoint.incomplete_runs(str(tmp_path)) == []
+    assert RunCheckpoint.list_runs(str(tmp_path))[0].is_complete
+
+
+def test_prune_caps_incomplete_runs_by_last_activity(tmp_path, monkeypatch):
+    monkeypatch.setattr(RunCheckpoint, "max_incomplete_runs", 2)
+    runs = [create_run(tmp_path, f"brand {i}") for i in range(3)]
+    # The oldest run was written to last, so the second one is the stalest
+    for age, run in zip((10, 300, 200), runs):
+        os.utime(run.path, (0, 1_000_000 - age))
+
+    RunCheckpoint.prune(str(tmp_path))
+
+    remaining = {run.run_id for run in RunCheckpoint.list_runs(str(tmp_path))}
+    assert remaining == {runs[0].run_id, runs[2].run_id}
+
+
+def test_incomplete_runs_are_listed_to_their_owner_only(tmp_path):
+    mine = RunCheckpoint.create({"title": "Acme"}, {}, str(tmp_path), owner="mine")
+    RunCheckpoint.create({"title": "Other"}, {}, str(tmp_path), owner="theirs")
+
+    assert [run.run_id for run in RunCheckpoint.incomplete_runs(str(tmp_path), owner="mine")] == [mine.run_id]
+    assert len(RunCheckpoint.incomplete_runs(str(tmp_path))) == 2
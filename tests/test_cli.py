@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import cli
+from clients import ClientRegistry
+
+
+class UnauthorizedHandler(BaseHTTPRequestHandler):
+    """Answers every request with 401, like a revoked API key."""
+
+    def do_POST(self):
+        body = json.dumps({"error": {"message": "Incorrect API key provided", "type": "invalid_request_error",
+                                     "code": "invalid_api_key"}}).encode("utf-8")
+        self.send_response(401)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def unauthorized(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UnauthorizedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "revoked")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://{host}:{port}/v1")
+    ClientRegistry.close_all()
+    yield server
+    server.shutdown()
+    ClientRegistry.close_all()
+
+
+def write_spec(directory, campaigns):
+    path = directory / "campaigns.json"
+    path.write_text(json.dumps({"campaigns": campaigns}), encoding="utf-8")
+    return str(path)
+
+
+def campaign(title="Acme", **fields):
+    return {"brand": {"title": title, "description": "Tienda de café"}, "topic_count": 2, "ideas_per_topic": 1,
+            "platforms": ["Twitter"], "quality": "low", **fields}
+
+
+def test_failed_campaign_exits_non_zero_without_exports(unauthorized, tmp_path, capsys):
+    spec = write_spec(tmp_path, [campaign()])
+
+    assert cli.main([spec, "--output-dir", str(tmp_path / "exports")]) == 1
+    assert not (tmp_path / "exports").exists() or not any((tmp_path / "exports").iterdir())
+    assert "Campaign failed: Acme" in capsys.readouterr().err
+
+
+def test_successful_campaign_is_exported(stand_in, tmp_path):
+    spec = write_spec(tmp_path, [campaign()])
+
+    assert cli.main([spec, "--output-dir", str(tmp_path / "exports")]) == 0
+    exports = list((tmp_path / "exports").iterdir())
+    assert len(exports) == 1
+    assert len(json.loads(exports[0].read_text(encoding="utf-8"))["topics"]) == 2
+
+
+@pytest.mark.parametrize("fields", [
+    {"platforms": ["TikTok"]},
+    {"topic_count": 0},
+    {"ideas_per_topic": "-1"},
+    {"image_settings": {"size": "512x512"}},
+    {"image_settings": {"style": "vivid"}},
+])
+def test_invalid_specs_are_rejected_before_any_call(fields, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "unused")
+    # Nothing is listening here: a request would fail instead of returning the validation exit code
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    spec = write_spec(tmp_path, [campaign(), campaign("Other", **fields)])
+
+    assert cli.main([spec]) == 2
+    assert "Invalid campaign spec" in capsys.readouterr().err
+
+
+def test_failed_brands_are_reported_and_not_exported_in_parallel(unauthorized, tmp_path, capsys):
+    spec = write_spec(tmp_path, [campaign("Acme"), campaign("Other")])
+
+    assert cli.main([spec, "--parallel-brands", "--output-dir", str(tmp_path / "exports")]) == 1
+    assert not (tmp_path / "exports").exists() or not any((tmp_path / "exports").iterdir())
+    errors = capsys.readouterr().err
+    assert "Campaign failed: Acme" in errors and "Campaign failed: Other" in errors
+
+
+def test_parallel_brands_and_batch_are_rejected(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([write_spec(tmp_path, [campaign()]), "--parallel-brands", "--batch"])
+    assert exit_info.value.code == 2
@@ -0,0 +1,17 @@
+from brands import Brand
+from jobs import JobManager
+from llm import GenerationMode
+from pipeline import CampaignSettings, ContentPipeline
+
+
+def test_sessions_only_see_their_own_jobs(stand_in):
+    manager = JobManager(max_workers=1)
+    settings = CampaignSettings(1, 1, "Español", ["Twitter"], GenerationMode.LOW, generate_images=False)
+    mine = manager.submit(ContentPipeline(Brand("Acme", "Tienda de café", ["Cercano"]), settings), owner="mine")
+    theirs = manager.submit(ContentPipeline(Brand("Other", "Panadería", ["Cercano"]), settings), owner="theirs")
+    manager.shutdown()
+
+    assert manager.list_jobs(owner="mine") == [mine]
+    assert manager.get(mine.id, owner="mine") is mine
+    assert manager.get(theirs.id, owner="mine") is None
+    assert manager.active_jobs(owner="theirs") == []
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+from generators.list_output import atop_up_list, parse_list_response, top_up_list
+
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"topics": ["Café", "Té"]}', ["Café", "Té"]),
+    ('["Café", "Té"]', ["Café", "Té"]),
+    # Markers, quotes, blanks and repeated items are cleaned up
+    ('{"topics": ["1. Café", "- \\"Té\\"", "", "café"]}', ["Café", "Té"]),
+    # Valid JSON without the expected list
+    ('{"ideas": ["Café"]}', []),
+    ('{"topics": "Café"}', []),
+    # Plain text: bulleted or numbered lines after a preamble
+    ("Aquí tienes los temas:\n\n1. Café\n2) Té\n- Chocolate", ["Café", "Té", "Chocolate"]),
+    # Plain text without markers: every line except headings
+    ("Temas:\nCafé\nTé\n", ["Café", "Té"]),
+    # JSON cut short yields nothing rather than one garbled item
+    ('{"topics": ["Café", "Té"', []),
+    ("", []),
+])
+def test_parse_list_response(content, expected):
+    assert parse_list_response(content, "topics") == expected
+
+
+def reply(*items):
+    return json.dumps({"topics": list(items)})
+
+
+def test_short_lists_are_topped_up_with_only_the_missing_items():
+    requests = []
+
+    def request(messages):
+        requests.append(messages)
+        return reply("Té", "Chocolate", "Mate")
+
+    messages = [{"role": "user", "content": "Genera 3 temas"}]
+    assert top_up_list(["Café"], 3, messages, "topics", "temas", request) == ["Café", "Té", "Chocolate"]
+
+    assert len(requests) == 1
+    follow_up = requests[0]
+    # The original prompt is kept as the prefix of the follow-up
+    assert follow_up[:1] == messages
+    assert json.loads(follow_up[1]["content"]) == {"topics": ["Café"]}
+    assert "Genera exactamente 2 temas" in follow_up[2]["content"]
+
+
+def test_truncated_answers_are_topped_up():
+    answers = iter([reply("Té", "Chocolate")])
+    items = parse_list_response('{"topics": ["Café", "T', "topics")
+    assert top_up_list(items, 2, [], "topics", "temas", lambda messages: next(answers)) == ["Té", "Chocolate"]
+
+
+def test_top_up_stops_after_max_requests_when_answers_stay_short():
+    answers = iter([reply("Café"), "no hay más", reply("Té")])
+    items = top_up_list(["Café"], 3, [], "topics", "temas", lambda messages: next(answers), max_requests=2)
+
+    # The repeated item adds nothing, the plain-text answer is read as one item and the third is never requested
+    assert items == ["Café", "no hay más"]
+
+
+def test_full_lists_are_not_topped_up():
+    def request(messages):
+        raise AssertionError("no follow-up expected")
+
+    assert top_up_list(["Café", "Té", "Mate"], 2, [], "topics", "temas", request) == ["Café", "Té"]
+
+
+def test_async_top_up():
+    async def request(messages):
+        return reply("Té")
+
+    assert asyncio.run(atop_up_list(["Café"], 2, [], "topics", "temas", request)) == ["Café", "Té"]
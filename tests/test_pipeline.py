@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from image_cache import ImageCache
+from llm import LLM, GenerationMode, GenerationItemType
+from pipeline import PipelineExecutor, PipelineTask, FairTaskQueue, CampaignSettings
+from utils import prepare_directories
+
+
+def delayed_future(seconds):
+    """A Future resolved by a timer, like an image waiting in ImageWorkerPool."""
+    future = Future()
+    timer = threading.Timer(seconds, future.set_result, args=("image.png",))
+    timer.daemon = True
+    timer.start()
+    return future
+
+
+def test_text_tasks_keep_flowing_while_delegated_futures_are_pending():
+    finished = {}
+    started = time.monotonic()
+
+    def post(i):
+        def run():
+            time.sleep(0.05)
+            return f"post {i}"
+        return PipelineTask("post", str(i), run)
+
+    def on_complete(task, result):
+        finished[(task.stage, task.label)] = time.monotonic() - started
+
+    images = [PipelineTask("image", str(i), lambda: delayed_future(2.0)) for i in range(8)]
+    posts = [post(i) for i in range(24)]
+    PipelineExecutor(max_concurrency=4).run(images + posts, on_complete=on_complete)
+
+    post_times = [elapsed for (stage, _), elapsed in finished.items() if stage == "post"]
+    image_times = [elapsed for (stage, _), elapsed in finished.items() if stage == "image"]
+    assert len(post_times) == 24 and len(image_times) == 8
+    # 24 posts of 0.05s on 4 slots take ~0.3s; they must not wait for the 2s images
+    assert max(post_times) < 1.0
+
+
+def test_fair_queue_alternates_between_groups():
+    queue = FairTaskQueue([PipelineTask("s", f"a{i}", None, group="a") for i in range(3)]
+                          + [PipelineTask("s", "b0", None, group="b")])
+    queue.push_front([PipelineTask("s", "b-child", None, group="b")])
+    assert [queue.pop().label for _ in range(len(queue))] == ["a0", "b-child", "a1", "b0", "a2"]
+
+
+def test_campaign_cache_choices_apply_to_its_calls_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    prepare_directories()
+    monkeypatch.setattr(LLM, "response_cache", None)
+    monkeypatch.setattr(ImageCache, "_instance", None)
+    monkeypatch.setattr(ImageCache, "_enabled", False)
+
+    settings = CampaignSettings(2, 1, "es", ["Twitter"], GenerationMode.LOW,
+                                cached_types=[GenerationItemType.POST, GenerationItemType.IMAGE])
+    settings = CampaignSettings.from_record(settings.to_record())
+
+    with settings.cache_scope():
+        assert LLM.active_cache(GenerationItemType.POST) is not None
+        assert LLM.active_cache(GenerationItemType.TOPICS) is None
+        assert ImageCache.active() is not None
+
+    # Nothing is left turned on for other sessions
+    assert LLM.active_cache(GenerationItemType.POST) is None
+    assert ImageCache.active() is None
+    with CampaignSettings(2, 1, "es", ["Twitter"], GenerationMode.LOW, cached_types=[]).cache_scope():
+        assert LLM.active_cache(GenerationItemType.POST) is None
+        assert ImageCache.active() is None
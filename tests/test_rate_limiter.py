@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimitScheduler, TokenBucket, parse_reset_duration
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def test_reserve_waits_in_arrival_order_once_the_bucket_is_empty(clock):
+    bucket = TokenBucket(60)  # one request per second
+    assert [bucket.reserve(1) for _ in range(60)] == [0.0] * 60
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_reserve_never_takes_more_than_the_capacity(clock):
+    bucket = TokenBucket(600)
+    assert bucket.reserve(5000) == 0.0
+    assert bucket.reserve(60) == pytest.approx(6.0)
+
+
+def test_adjust_gives_back_unused_tokens_up_to_the_capacity(clock):
+    bucket = TokenBucket(100)
+    bucket.reserve(80)
+    bucket.adjust(50)
+    assert bucket.tokens == pytest.approx(70)
+    bucket.adjust(500)
+    assert bucket.tokens == pytest.approx(100)
+    bucket.adjust(-130)
+    assert bucket.reserve(1) == pytest.approx(31 / (100 / 60))
+
+
+def test_drain_holds_the_next_request_for_exactly_the_given_seconds(clock):
+    bucket = TokenBucket(7)
+    bucket.drain(5.0)
+    assert bucket.reserve(1) == pytest.approx(5.0)
+
+
+def test_headers_set_the_limit_and_cap_the_remaining_budget(clock):
+    limiter = RateLimitScheduler({"model": {"rpm": 500, "tpm": 30000}})
+    limiter.update_from_headers("model", {
+        "x-ratelimit-limit-requests": "60", "x-ratelimit-remaining-requests": "10",
+        "x-ratelimit-limit-tokens": "1000", "x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "6s",
+    })
+    buckets = limiter.buckets("model")
+    assert buckets.requests.capacity == 60
+    assert buckets.requests.tokens == pytest.approx(10)
+    assert buckets.tokens.capacity == 1000
+    # Out of tokens until the server-side window resets
+    assert buckets.tokens.reserve(1) == pytest.approx(6.0)
+
+
+def test_acquire_sleeps_for_the_longest_of_both_buckets(clock):
+    limiter = RateLimitScheduler({"model": {"rpm": 60, "tpm": 600}})
+    limiter.acquire("model", 600)
+    started = clock.now
+    limiter.acquire("model", 300)
+    assert clock.now - started == pytest.approx(30.0)
+    assert limiter.waited_seconds == pytest.approx(30.0)
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m", 3720.0), ("0.5", 0.5), ("", None), ("soon", None),
+])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from llm import GenerationItemType
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def make_cache(tmp_path, **options):
+    return ResponseCache(str(tmp_path / "responses.sqlite"), enabled_types=[GenerationItemType.TOPICS], **options)
+
+
+def test_identical_requests_share_a_key():
+    messages = [{"role": "user", "content": "Genera 3 temas"}]
+    assert ResponseCache.make_key("gpt-4o", messages, temperature=0.7) == \
+        ResponseCache.make_key("gpt-4o", list(messages), temperature=0.7)
+    assert ResponseCache.make_key("gpt-4o", messages, temperature=0.7) != \
+        ResponseCache.make_key("gpt-4o", messages, temperature=0.2)
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put("key", GenerationItemType.TOPICS, "gpt-4o", "temas", latency=2.0, prompt_tokens=10)
+
+    clock.now += 59
+    assert cache.get("key") == "temas"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.saved_seconds == 2.0 and cache.saved_prompt_tokens == 10
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_entries(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put("a", GenerationItemType.TOPICS, "gpt-4o", "a")
+    clock.now += 1
+    cache.put("b", GenerationItemType.TOPICS, "gpt-4o", "b")
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == "a"
+    clock.now += 1
+    cache.put("c", GenerationItemType.TOPICS, "gpt-4o", "c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+
+
+def test_entries_are_evicted_beyond_max_bytes(tmp_path, clock):
+    cache = make_cache(tmp_path, max_bytes=10)
+    cache.put("a", GenerationItemType.TOPICS, "gpt-4o", "x" * 6)
+    clock.now += 1
+    cache.put("b", GenerationItemType.TOPICS, "gpt-4o", "y" * 6)
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+
+
+def test_only_enabled_types_are_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.is_enabled_for(GenerationItemType.TOPICS)
+    assert not cache.is_enabled_for(GenerationItemType.POST)
@@ -0,0 +1,71 @@
+import time
+from types import SimpleNamespace
+
+from llm import LLM
+from rate_limiter import RateLimitScheduler
+from retry import RetryPolicy, retry_after_seconds
+
+
+class TooManyRequests(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+def test_retry_after_a_429_waits_the_retry_after_delay_once(monkeypatch):
+    # 60 rpm: one extra bucket interval would add a full second
+    limiter = RateLimitScheduler({"model": {"rpm": 60, "tpm": None}})
+    monkeypatch.setattr(LLM, "rate_limiter", limiter)
+    calls = []
+
+    def attempt():
+        limiter.acquire("model")
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise TooManyRequests(0.5)
+        return "ok"
+
+    assert RetryPolicy().call(attempt, LLM._on_retry("model")) == "ok"
+    waited = calls[1] - calls[0]
+    assert 0.45 <= waited < 0.9
+    assert limiter.throttled == 1
+
+
+def test_on_retry_can_replace_the_sleep():
+    policy = RetryPolicy(base_delay=10.0, jitter=False, retry_on=lambda error: True)
+    calls = []
+
+    def attempt():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise TimeoutError()
+        return "ok"
+
+    started = time.monotonic()
+    assert policy.call(attempt, lambda error, attempt, delay: 0.0) == "ok"
+    assert time.monotonic() - started < 1.0
+
+
+def response_error(headers):
+    error = Exception("429 Too Many Requests")
+    error.status_code = 429
+    error.response = SimpleNamespace(headers=headers)
+    return error
+
+
+def test_retry_after_is_capped_at_max_delay():
+    policy = RetryPolicy(max_delay=30.0)
+    assert policy.delay(0, response_error({"retry-after": "86400"})) == 30.0
+    assert policy.delay(0, response_error({"retry-after-ms": "1500"})) == 1.5
+
+
+def test_reset_header_of_the_exhausted_limit_is_used():
+    tokens_exhausted = {"x-ratelimit-remaining-requests": "499", "x-ratelimit-reset-requests": "120ms",
+                        "x-ratelimit-remaining-tokens": "350", "x-ratelimit-reset-tokens": "6s"}
+    requests_exhausted = {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s",
+                          "x-ratelimit-remaining-tokens": "9000", "x-ratelimit-reset-tokens": "1m0s"}
+    assert retry_after_seconds(response_error(tokens_exhausted)) == 6.0
+    assert retry_after_seconds(response_error(requests_exhausted)) == 2.0
+    assert retry_after_seconds(response_error({"x-ratelimit-reset-requests": "3s"})) == 3.0
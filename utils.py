@@ -1,10 +1,14 @@
 import os
-import time
 from datetime import datetime
 import pandas as pd
 import json
 import threading
 import tempfile
+from logger import Logger
+from retry import RetryPolicy
+
+# Generators run concurrently and append to the same result files
+_file_lock = threading.Lock()
 
 def format_list(list_items):
     """Format a list for pretty printing."""
@@ -24,8 +28,9 @@ def write_to_file(file_path, content):
             pass
     
     # Append content with separator
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(f"{content}\n---\n")
+    with _file_lock:
+        with open(file_path, 'a', encoding='utf-8') as f:
+            f.write(f"{content}\n---\n")
 
 def add_item_to_file(file_path, content):
     """
@@ -41,8 +46,9 @@ def add_item_to_file(file_path, content):
             pass
     
     # Append content with separator
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(f"{content}\n---\n")
+    with _file_lock:
+        with open(file_path, 'a', encoding='utf-8') as f:
+            f.write(f"{content}\n---\n")
 
 def prepare_directories():
     """Create necessary directories for the application."""
@@ -74,16 +80,15 @@ def retry_n_times(n, fn):
     """
     Retry a function n times before giving up.
     Returns the result of the function, or None if all attempts fail.
+    Kept for compatibility: any exception is retried with jittered exponential
+    backoff. New code should use retry.RetryPolicy, which only retries transient errors.
     """
-    for i in range(n):
-        try:
-            return fn()
-        except Exception as e:
-            print(f"Attempt {i+1} failed: {e}")
-            if i < n - 1:  # if not the last attempt
-                print(f"Retrying in 2 seconds...")
-                time.sleep(2)
-    return None
+    policy = RetryPolicy(max_attempts=max(1, n), base_delay=2.0, retry_on=lambda error: True)
+    try:
+        return policy.call(fn)
+    except Exception as e:
+        Logger.log("Reintentos agotados", str(e))
+        return None
 
 def create_directory(directory):
     """Create a directory if it doesn't exist."""